@@ -1,18 +1,55 @@
 #!/usr/bin/env python3
-from mcp.server.fastmcp import FastMCP
+"""
+Template for a new MelechDSP MCP server.
+
+Built on tools/mcp/common/mcp_server_base.py, so it comes with:
+- an asyncio lifecycle: startup() -> warmup() -> serve, and on SIGINT/SIGTERM
+  new calls are refused while in-flight ones finish (MCP_DRAIN_TIMEOUT_S)
+- sync tools run on a bounded worker pool (MCP_WORKERS), never on the event loop
+- per-tool concurrency limits; calls beyond the wait queue are shed with an
+  "Error: ... overloaded" reply (MCP_TOOL_CONCURRENCY / MCP_TOOL_QUEUE, or
+  per tool via @self.tool(max_concurrency=..., max_queue=...))
+- call metrics (`server_stats` tool) and opt-in profiling (--profile)
+
+    python server.py                                  # stdio
+    python server.py --transport sse --port 3001
+"""
+
+import os
+import sys
+from typing import Any, Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "tools", "mcp", "common"))
+from mcp_server_base import MCPEnvSpec, MCPServerBase, MCPServerSpec  # noqa: E402
 
 SERVER_NAME = "MelechDSP MCP Server"
 
-mcp = FastMCP(SERVER_NAME)
+SPEC = MCPServerSpec(
+    name=SERVER_NAME,
+    env=MCPEnvSpec(required=(), optional=()),
+)
+
+
+class TemplateServer(MCPServerBase):
+    def __init__(self, spec: MCPServerSpec = SPEC):
+        super().__init__(spec)
+        self.index: Optional[Any] = None
+
+    async def startup(self) -> None:
+        # Load indexes off the event loop, on the bounded CPU pool, e.g.:
+        #     self.index = await self.runtime.run_cpu(load_index, INDEX_PATH, in_process=True)
+        # Picklable CPU-heavy work can drop in_process to use MCP_PROCESS_WORKERS
+        await super().startup()
+
+    def register_tools(self) -> None:
+        @self.tool(offload=False)
+        def health() -> str:
+            return f"{SERVER_NAME} OK"
 
-@mcp.tool()
-def health() -> str:
-    return f"{SERVER_NAME} OK"
+        @self.tool(offload=False)
+        def version() -> str:
+            return "melechdsp-mcp v1.0"
 
-@mcp.tool()
-def version() -> str:
-    return "melechdsp-mcp v1.0"
 
 if __name__ == "__main__":
-    print(f"{SERVER_NAME} running (stdio). Waiting for client...", flush=True)
-    mcp.run()
\ No newline at end of file
+    TemplateServer().main()
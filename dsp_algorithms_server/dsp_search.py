@@ -0,0 +1,178 @@
+"""
+In-memory search over the DSP index, built once at server startup.
+
+The index is either the packed binary file written by ingest.py
+(dsp_index.idx, read through mmap so records are decoded only when a tool
+returns them) or the older dsp_index.json.
+
+Ranking is BM25 over identifier tokens from `algorithm_name` (weighted up)
+and `code_snippet`. CamelCase and snake_case identifiers are indexed both
+whole and split, so `smoother`, `MeterBallistics` and `ballistics` all hit.
+Domain and SIMD filters are integer bitsets over document ids, applied
+before scoring.
+"""
+from __future__ import annotations
+
+import json
+import math
+import os
+import re
+import sys
+from collections import Counter
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tools", "mcp", "common"))
+from packed_index import PackedIndex, is_packed  # noqa: E402
+
+Entry = Dict[str, Any]
+
+_IDENT = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+_CAMEL = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|[0-9]+")
+
+NAME_WEIGHT = 3
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Too common in C++ to say anything about an algorithm
+_STOP = {
+    "include", "const", "void", "int", "float", "double", "return", "if", "else",
+    "for", "auto", "static", "class", "struct", "public", "private", "namespace",
+    "std", "juce", "the", "and", "this", "bool", "true", "false", "override",
+}
+
+
+def tokenize(text: str) -> List[str]:
+    tokens: List[str] = []
+    for ident in _IDENT.findall(text or ""):
+        low = ident.lower()
+        if low in _STOP or len(low) < 2:
+            continue
+        tokens.append(low)
+        parts = [p.lower() for p in _CAMEL.findall(ident.replace("_", " "))]
+        if len(parts) > 1:
+            tokens.extend(p for p in parts if len(p) > 1 and p not in _STOP)
+    return tokens
+
+
+class DspSearchIndex:
+    def __init__(self, entries: Sequence[Entry]):
+        self.entries = entries
+        self._postings: Dict[str, List[Tuple[int, int]]] = {}
+        self._doc_len: List[int] = []
+        self._domains: Dict[str, int] = {}
+        self._simd = 0
+        self._all = (1 << len(entries)) - 1
+        self._by_name: Dict[str, List[int]] = {}
+        domain_labels = set()
+
+        for doc, entry in enumerate(entries):
+            name = str(entry.get("algorithm_name", ""))
+            tf: Counter = Counter()
+            for tok in tokenize(name):
+                tf[tok] += NAME_WEIGHT
+            tf.update(tokenize(str(entry.get("code_snippet", ""))))
+            for tok, count in tf.items():
+                self._postings.setdefault(tok, []).append((doc, count))
+            self._doc_len.append(sum(tf.values()))
+
+            bit = 1 << doc
+            label = str(entry.get("processing_domain", ""))
+            domain_labels.add(label)
+            domain = label.casefold()
+            self._domains[domain] = self._domains.get(domain, 0) | bit
+            if entry.get("simd_optimized"):
+                self._simd |= bit
+            self._by_name.setdefault(name.casefold(), []).append(doc)
+
+        self._domain_labels = sorted(domain_labels)
+        n = len(entries)
+        self._avg_len = (sum(self._doc_len) / n) if n else 0.0
+        self._idf = {
+            tok: math.log(1.0 + (n - len(posts) + 0.5) / (len(posts) + 0.5))
+            for tok, posts in self._postings.items()
+        }
+
+    @classmethod
+    def load(cls, path: str) -> "DspSearchIndex":
+        if is_packed(path):
+            return cls(PackedIndex(path))
+        with open(path, "r", encoding="utf-8") as f:
+            entries = json.load(f)
+        if not isinstance(entries, list):
+            raise ValueError(f"{path} must contain a JSON list")
+        return cls(entries)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    @property
+    def domains(self) -> List[str]:
+        return self._domain_labels
+
+    def filter_mask(self, domain: Optional[str] = None, simd: Optional[bool] = None) -> int:
+        mask = self._all
+        if domain:
+            mask &= self._domains.get(domain.strip().casefold(), 0)
+        if simd is not None:
+            mask &= self._simd if simd else (self._all & ~self._simd)
+        return mask
+
+    def by_name(self, name: str) -> List[Entry]:
+        return [self.entries[i] for i in self._by_name.get((name or "").strip().casefold(), [])]
+
+    def search(
+        self,
+        query: str,
+        domain: Optional[str] = None,
+        simd: Optional[bool] = None,
+        k: int = 5,
+    ) -> List[Tuple[Entry, float]]:
+        mask = self.filter_mask(domain, simd)
+        if not mask:
+            return []
+
+        terms = set(tokenize(query))
+        if not terms:
+            # Filter-only query: list what matches, in index order
+            docs = _iter_bits(mask)
+            return [(self.entries[d], 0.0) for d in docs[: max(1, int(k))]]
+
+        scores: Dict[int, float] = {}
+        for term in terms:
+            idf = self._idf.get(term)
+            if idf is None:
+                continue
+            for doc, tf in self._postings[term]:
+                if not (mask >> doc) & 1:
+                    continue
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self._doc_len[doc] / (self._avg_len or 1.0))
+                scores[doc] = scores.get(doc, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+
+        ranked = sorted(scores.items(), key=lambda item: -item[1])[: max(1, int(k))]
+        return [(self.entries[doc], score) for doc, score in ranked]
+
+
+def _iter_bits(mask: int) -> List[int]:
+    out: List[int] = []
+    doc = 0
+    while mask:
+        if mask & 1:
+            out.append(doc)
+        mask >>= 1
+        doc += 1
+    return out
+
+
+def format_hit(entry: Entry, score: Optional[float] = None, snippet_chars: int = 600) -> str:
+    head = (
+        f"{entry.get('algorithm_name', '?')}  [{entry.get('processing_domain', '?')}]  "
+        f"simd={bool(entry.get('simd_optimized'))}  latency={entry.get('latency_samples', 0)}"
+    )
+    if entry.get("simd_isa"):
+        head += f" ({', '.join(entry['simd_isa'])})"
+    if score is not None:
+        head += f"  score={score:.2f}"
+    snippet = str(entry.get("code_snippet", ""))
+    if snippet_chars and len(snippet) > snippet_chars:
+        snippet = snippet[:snippet_chars].rstrip() + "\n// ..."
+    return f"{head}\n{snippet}" if snippet_chars else head
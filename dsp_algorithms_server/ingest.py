@@ -1,51 +1,136 @@
-import os
+import argparse
 import json
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tools", "mcp", "common"))
+from fs_scan import scan  # noqa: E402
+from packed_index import write_packed  # noqa: E402
 
 # CONFIGURATION: Updated to your specific path
 # We assume your shared library 'melechdsp-hq' is inside GitHubRepo
 SOURCE_DIR = "/Users/avishaylidani/DEV/GitHubRepo/MelechDSP/melechdsp-hq"
-OUTPUT_FILE = "dsp_index.json"
+# Packed binary index (see tools/mcp/common/packed_index.py); --json also
+# writes the older pretty-printed dsp_index.json
+OUTPUT_FILE = "dsp_index.idx"
+JSON_OUTPUT_FILE = "dsp_index.json"
 
-def detect_domain(content):
-    if "FFT" in content or "Spectral" in content:
-        return "FrequencyDomain"
-    if "processBlock" in content:
-        return "TimeDomain"
-    return "ControlRate"
+SOURCE_EXTENSIONS = (".h", ".cpp", ".hpp")
 
-def scan_files():
-    database = []
-    
-    if not os.path.exists(SOURCE_DIR):
-        print(f"ERROR: Path not found: {SOURCE_DIR}")
+# Below this many files a process pool costs more than it saves.
+MIN_PARALLEL_FILES = 16
+
+# Every marker we care about, as one alternation, so each file is scanned
+# in a single finditer pass. Group names say which feature matched.
+SCAN_PATTERN = re.compile(
+    r"(?P<latency_set>setLatencySamples\s*\(\s*(?P<latency_set_n>\d+)\s*\))"
+    r"|(?P<latency_get>getLatencySamples\s*\(\s*\)\s*(?:const\s*)?(?:noexcept\s*)?(?:override\s*)?"
+    r"\{\s*return\s+(?P<latency_get_n>\d+)\s*;)"
+    r"|(?P<avx>__m256[di]?\b|__m512[di]?\b|_mm256_\w+|_mm512_\w+|immintrin\.h)"
+    r"|(?P<sse>__m128[di]?\b|_mm_\w+|[xpet]mmintrin\.h|smmintrin\.h)"
+    r"|(?P<neon>arm_neon\.h|float32x[24]_t|int32x4_t|\bv(?:ld|st)1q?_\w+|\bv(?:add|sub|mul|mla)q_f32\b)"
+    r"|(?P<vdsp>vDSP_\w+|Accelerate/Accelerate\.h)"
+    r"|(?P<juce_simd>SIMDRegister)"
+    r"|(?P<fft>FFT|Spectral|STFT)"
+    r"|(?P<process>processBlock)"
+)
+
+SIMD_GROUPS = {
+    "sse": "SSE",
+    "avx": "AVX",
+    "neon": "NEON",
+    "vdsp": "vDSP",
+    "juce_simd": "JUCE SIMDRegister",
+}
+
+def classify(content):
+    """
+    One pass over the file. Returns (processing_domain, simd_isa, latency_samples).
+    latency_samples is the largest literal passed to setLatencySamples() or
+    returned from getLatencySamples(); 0 if none is found.
+    """
+    found = set()
+    latency = 0
+    for match in SCAN_PATTERN.finditer(content):
+        group = match.lastgroup
+        if group in ("latency_set", "latency_get"):
+            latency = max(latency, int(match.group(group + "_n")))
+        found.add(group)
+
+    if "fft" in found:
+        domain = "FrequencyDomain"
+    elif "process" in found:
+        domain = "TimeDomain"
+    else:
+        domain = "ControlRate"
+
+    simd_isa = [label for group, label in SIMD_GROUPS.items() if group in found]
+    return domain, simd_isa, latency
+
+def index_file(filepath):
+    """Worker: read + classify one source file. Returns (entry, error)."""
+    try:
+        with open(filepath, "r", encoding="utf-8") as f:
+            content = f.read()
+    except Exception as e:
+        return None, f"Skipping {os.path.basename(filepath)}: {e}"
+
+    domain, simd_isa, latency = classify(content)
+    entry = {
+        "algorithm_name": os.path.basename(filepath).split(".")[0],
+        "processing_domain": domain,
+        "latency_samples": latency,
+        "simd_optimized": bool(simd_isa),
+        "simd_isa": simd_isa,
+        "file_path": filepath,
+        "code_snippet": content[:2000]
+    }
+    return entry, None
+
+def find_sources(source_dirs):
+    files = []
+    for source_dir in source_dirs:
+        if not os.path.exists(source_dir):
+            print(f"ERROR: Path not found: {source_dir}")
+            continue
+        print(f"Scanning {source_dir}...")
+        files.extend(entry.path for entry in scan(source_dir, suffixes=SOURCE_EXTENSIONS))
+    return files
+
+def scan_files(source_dirs=(SOURCE_DIR,), workers=None, write_json=False):
+    files = find_sources(source_dirs)
+    if not files:
         print("Check if 'melechdsp-hq' folder exists inside GitHubRepo.")
         return
 
-    print(f"Scanning {SOURCE_DIR}...")
-    
-    for root, _, files in os.walk(SOURCE_DIR):
-        for file in files:
-            if file.endswith((".h", ".cpp", ".hpp")):
-                filepath = os.path.join(root, file)
-                try:
-                    with open(filepath, "r", encoding="utf-8") as f:
-                        content = f.read()
-                    
-                    entry = {
-                        "algorithm_name": file.split(".")[0],
-                        "processing_domain": detect_domain(content),
-                        "latency_samples": 0,
-                        "simd_optimized": "__m128" in content or "vDSP" in content,
-                        "code_snippet": content[:2000]
-                    }
-                    database.append(entry)
-                except Exception as e:
-                    print(f"Skipping {file}: {e}")
-
-    with open(OUTPUT_FILE, "w") as f:
-        json.dump(database, f, indent=2)
-    
-    print(f"Indexed {len(database)} DSP files to {OUTPUT_FILE}")
+    if len(files) >= MIN_PARALLEL_FILES and workers != 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(index_file, files, chunksize=16))
+    else:
+        results = [index_file(f) for f in files]
+
+    database = []
+    for entry, error in results:
+        if error:
+            print(error)
+        else:
+            database.append(entry)
+
+    write_packed(OUTPUT_FILE, database)
+    if write_json:
+        with open(JSON_OUTPUT_FILE, "w") as f:
+            json.dump(database, f, indent=2)
+
+    simd = sum(1 for e in database if e["simd_optimized"])
+    latent = sum(1 for e in database if e["latency_samples"])
+    print(f"Indexed {len(database)} DSP files to {OUTPUT_FILE} ({simd} SIMD, {latent} with latency)")
 
 if __name__ == "__main__":
-    scan_files()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Index DSP sources into dsp_index.idx")
+    parser.add_argument("sources", nargs="*", default=[SOURCE_DIR], help="source trees to scan")
+    parser.add_argument("--workers", type=int, default=None, help="scanner processes (default: CPU count)")
+    parser.add_argument("--json", action="store_true", help=f"also write {JSON_OUTPUT_FILE}")
+    args = parser.parse_args()
+    scan_files(args.sources, workers=args.workers, write_json=args.json)
@@ -1,17 +1,95 @@
 #!/usr/bin/env python3
 
 import os
+import sys
+from concurrent.futures import Future
+from typing import Callable, Optional
+
 from mcp.server.fastmcp import FastMCP
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tools", "mcp", "common"))
+from live_index import LiveReindexer, env_enabled, env_paths  # noqa: E402
+from metrics import instrument_server  # noqa: E402
+from profiling import profile_server  # noqa: E402
+
+import ingest  # noqa: E402
+from dsp_search import DspSearchIndex, format_hit  # noqa: E402
+
 # ===============================
 # MCP Setup
 # ===============================
 
 SERVER_NAME = "DSP Algorithms"
 
+_HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Output of ingest.py (run it from this folder): packed dsp_index.idx, or the
+# older dsp_index.json when no packed index exists yet
+DSP_INDEX_PATH = os.getenv("DSP_INDEX_PATH") or next(
+    (p for p in (os.path.join(_HERE, "dsp_index.idx"), os.path.join(_HERE, "dsp_index.json")) if os.path.exists(p)),
+    os.path.join(_HERE, "dsp_index.idx"),
+)
+
 mcp = FastMCP(SERVER_NAME)
 
 
+# ===============================
+# Index (loaded once at startup, by load())
+# ===============================
+
+def _load_index() -> DspSearchIndex:
+    try:
+        return DspSearchIndex.load(DSP_INDEX_PATH)
+    except FileNotFoundError:
+        print(f"DSP index not found at {DSP_INDEX_PATH}. Run ingest.py.", file=sys.stderr, flush=True)
+    except Exception as e:
+        print(f"Failed to load DSP index {DSP_INDEX_PATH}: {e}", file=sys.stderr, flush=True)
+    return DspSearchIndex([])
+
+
+INDEX = DspSearchIndex([])
+
+
+# ===============================
+# Live reindex (MCP_LIVE_REINDEX=1)
+# ===============================
+
+# Source trees to watch, os.pathsep-separated; defaults to ingest.py's SOURCE_DIR
+DSP_SOURCE_DIRS = env_paths("DSP_SOURCE_DIRS", [ingest.SOURCE_DIR])
+
+
+def _index_source(path: str):
+    entry, error = ingest.index_file(path)
+    if error:
+        print(error, file=sys.stderr, flush=True)
+    return entry
+
+
+def _swap_index(index: DspSearchIndex) -> None:
+    global INDEX
+    INDEX = index
+
+
+def load() -> None:
+    """Loads INDEX (mcp_host runs this on its CPU pool during startup)."""
+    _swap_index(_load_index())
+
+
+def start_live_reindex(submit: Optional[Callable[[Callable], Future]] = None) -> Optional[LiveReindexer]:
+    """Re-indexes edited sources in the background and swaps INDEX when done."""
+    if not env_enabled():
+        return None
+    return LiveReindexer(
+        SERVER_NAME,
+        DSP_SOURCE_DIRS,
+        ingest.SOURCE_EXTENSIONS,
+        load_file=_index_source,
+        build=lambda files: DspSearchIndex([files[p] for p in sorted(files)]),
+        on_swap=_swap_index,
+        submit=submit,
+    ).start()
+
+
 # ===============================
 # Tools
 # ===============================
@@ -21,23 +99,43 @@ def health() -> str:
     """
     Health check for MCP clients (Cursor / Claude).
     """
-    return f"{SERVER_NAME} OK"
+    return f"{SERVER_NAME} OK ({len(INDEX)} algorithms indexed)"
+
+
+@mcp.tool()
+def search_dsp(query: str, domain: Optional[str] = None, simd: Optional[bool] = None, k: int = 5) -> str:
+    """
+    Ranked search over the local DSP library (BM25 over names and code identifiers).
+    Optional filters: domain ("TimeDomain", "FrequencyDomain", "ControlRate")
+    and simd (True/False). Returns name, domain, SIMD/latency flags and a short snippet.
+    """
+    index = INDEX  # one snapshot for the whole call
+    k = max(1, min(int(k or 5), 20))
+    hits = index.search(query or "", domain=domain, simd=simd, k=k)
+    if not hits:
+        if domain and domain.strip().casefold() not in {d.casefold() for d in index.domains}:
+            return f"Unknown domain '{domain}'. Known domains: {', '.join(index.domains)}"
+        return "No results found."
+
+    return "\n\n---\n\n".join(format_hit(entry, score if query else None) for entry, score in hits)
 
 
 @mcp.tool()
-def juce_class(name: str) -> str:
+def get_dsp_algorithm(name: str) -> str:
     """
-    Simple JUCE API lookup stub.
-    Replace this with your real JUCE index / RAG logic.
+    Full indexed entry (including the code snippet) for an algorithm by name,
+    e.g. "Smoother". Falls back to the best search hit.
     """
     name = (name or "").strip()
     if not name:
-        return "Please provide a JUCE class name."
+        return "Please provide an algorithm name."
 
-    return (
-        f"JUCE class '{name}'\n\n"
-        "This server is running correctly.\n"
-        "Hook this tool to your JUCE docs index or RAG backend next."
+    index = INDEX
+    entries = index.by_name(name) or [entry for entry, _ in index.search(name, k=1)]
+    if not entries:
+        return "No results found."
+    return "\n\n---\n\n".join(
+        format_hit(entry, snippet_chars=0) + "\n" + str(entry.get("code_snippet", "")) for entry in entries
     )
 
 
@@ -46,5 +144,9 @@ def juce_class(name: str) -> str:
 # ===============================
 
 if __name__ == "__main__":
+    load()
+    start_live_reindex()
+    profile_server(mcp)
+    instrument_server(mcp, SERVER_NAME)
     print("DSP Algorithms MCP server running (stdio). Waiting for client...", flush=True)
-    mcp.run()
\ No newline at end of file
+    mcp.run()
@@ -1,10 +1,16 @@
 import os
-import requests
+from typing import Optional
+
 from dotenv import load_dotenv
 
+from completion_cache import chat_completion
+from context_packer import pack_context
+from http_client import RAG_BASE_URL, RagClientError, default_client
+
 load_dotenv()
 
-RAG_SEARCH_URL = os.environ.get("JUCE_RAG_SEARCH_URL", "http://localhost:8000/search")
+RAG_SEARCH_URL = os.environ.get("JUCE_RAG_SEARCH_URL", RAG_BASE_URL.rstrip("/") + "/search")
+RAG_BATCH_URL = os.environ.get("JUCE_RAG_BATCH_URL", RAG_SEARCH_URL.rstrip("/") + "/batch")
 
 
 def retrieve_docs(query: str, k: int = 5):
@@ -14,20 +20,47 @@ def retrieve_docs(query: str, k: int = 5):
         return []
 
     try:
-        resp = requests.post(RAG_SEARCH_URL, json={"query": query, "k": k}, timeout=30)
-        if resp.status_code == 200:
-            payload = resp.json()
-            # Expected: {"results":[{"content": "...", "source": "...", ...}, ...]}
-            results = payload.get("results", [])
-            if isinstance(results, list):
-                return results
-    except Exception as e:
+        payload = default_client().post_json(RAG_SEARCH_URL, {"query": query, "k": k})
+        # Expected: {"results":[{"content": "...", "source": "...", ...}, ...]}
+        results = payload.get("results", [])
+        if isinstance(results, list):
+            return results
+    except (RagClientError, ValueError) as e:
         print(f"RAG Connection Error: {e}")
 
     return []
 
 
-def query_juce_rag(query: str, top_k: int = 3):
+def retrieve_docs_batch(queries, k: int = 5):
+    """
+    Several retrievals in one POST /search/batch (one backend query).
+    Returns a list of result lists, aligned with `queries`.
+    """
+    queries = [(q or "").strip() for q in queries]
+    out = [[] for _ in queries]
+    wanted = [i for i, q in enumerate(queries) if q]
+    if not wanted:
+        return out
+
+    try:
+        payload = default_client().post_json(
+            RAG_BATCH_URL,
+            {"queries": [{"query": queries[i], "k": k} for i in wanted]},
+        )
+        for i, results in zip(wanted, payload.get("results", [])):
+            if isinstance(results, list):
+                out[i] = results
+    except (RagClientError, ValueError) as e:
+        print(f"RAG Connection Error: {e}")
+
+    return out
+
+
+def _hit_source(r) -> str:
+    return r.get("source") or r.get("file") or r.get("path") or "unknown"
+
+
+def query_juce_rag(query: str, top_k: int = 3, max_tokens: Optional[int] = None):
     """
     MCP bridge entry point.
     Returns (answer_text, sources_dict).
@@ -37,19 +70,16 @@ def query_juce_rag(query: str, top_k: int = 3):
     if not results:
         return ("No results from JUCE RAG store.", {"rag_url": RAG_SEARCH_URL})
 
-    # Build a compact, grounded response: top_k snippets
-    chunks = []
-    sources = {"rag_url": RAG_SEARCH_URL, "hits": []}
-
-    for r in results[: max(1, int(top_k))]:
-        content = (r.get("content") or "").strip()
-        src = r.get("source") or r.get("file") or r.get("path") or "unknown"
-
-        if content:
-            chunks.append(f"Source: {src}\n{content[:900]}")
-            sources["hits"].append(src)
+    # Build a compact, grounded response: distinct top_k snippets within the token budget
+    packed = pack_context(
+        results[: max(1, int(top_k))],
+        max_tokens,
+        fmt=lambda r: f"Source: {_hit_source(r)}\n{r['content']}",
+        separator="\n\n---\n\n",
+    )
+    sources = {"rag_url": RAG_SEARCH_URL, "hits": [_hit_source(r) for r in packed.hits]}
 
-    answer = "\n\n---\n\n".join(chunks) if chunks else "No usable content in results."
+    answer = packed.text or "No usable content in results."
     return (answer, sources)
 
 
@@ -70,19 +100,19 @@ def _get_openai_client():
     return OpenAI(api_key=api_key)
 
 
-def generate_code(user_query: str):
+def generate_code(user_query: str, use_cache: bool = True, max_tokens: Optional[int] = None):
     """
     Optional: LLM codegen using retrieved context.
-    Requires OPENAI_API_KEY.
+    Requires OPENAI_API_KEY. Identical requests (same query and retrieved
+    context) are answered from the on-disk completion cache.
+    The context is packed into `max_tokens` (default JUCE_RAG_CONTEXT_TOKENS).
     """
-    client = _get_openai_client()
-
     print(f"🔍 Searching docs for: '{user_query}'...")
     results = retrieve_docs(user_query, k=5)
 
-    context_text = "\n\n".join(
-        [f"--- DOCUMENTATION SEGMENT ---\n{(r.get('content') or '')}" for r in results]
-    )
+    context_text = pack_context(
+        results, max_tokens, fmt=lambda r: f"--- DOCUMENTATION SEGMENT ---\n{r['content']}"
+    ).text
 
     if not context_text:
         print("⚠️ Warning: No documentation found. LLM might hallucinate.")
@@ -101,17 +131,10 @@ You must ONLY use classes, functions, and method signatures found in the "DOCUME
 {context_text}
 """
 
-    response = client.chat.completions.create(
-        model="gpt-4o",
-        messages=[
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_query},
-        ],
-        temperature=0.1,
+    return chat_completion(
+        _get_openai_client, "gpt-4o", system_prompt, user_query, temperature=0.1, use_cache=use_cache
     )
 
-    return response.choices[0].message.content
-
 
 if __name__ == "__main__":
     prompt = "Explain how AudioProcessorValueTreeState attachments work."
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Per-request latency of the Chroma query path: a fresh client per request
+(the old /search behaviour) vs. the process-lifetime ChromaPool.
+
+Runs against fake_chroma.FakeChromaClient, so no Chroma service is needed.
+Latencies model network cost: --connect-ms for client setup and --rtt-ms per
+round-trip (get_or_create_collection and query each cost one).
+
+    python bench_chroma_pool.py --requests 200 --connect-ms 5 --rtt-ms 2
+"""
+from __future__ import annotations
+
+import argparse
+import statistics
+import time
+from typing import Callable, List
+
+from chroma_pool import ChromaPool
+from fake_chroma import FakeChromaClient
+
+QUERIES = [
+    "AudioProcessorValueTreeState attachments",
+    "AudioBuffer circular buffer delay implementation",
+    "juce::dsp::ProcessSpec",
+    "Component paint resized",
+]
+
+
+def _percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    idx = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * (len(ordered) - 1)))))
+    return ordered[idx]
+
+
+def _run(label: str, n: int, one_request: Callable[[str], None]) -> List[float]:
+    samples: List[float] = []
+    for i in range(n):
+        t0 = time.perf_counter()
+        one_request(QUERIES[i % len(QUERIES)])
+        samples.append((time.perf_counter() - t0) * 1000.0)
+    print(
+        f"{label:<18} mean={statistics.fmean(samples):7.3f}ms  "
+        f"p50={_percentile(samples, 50):7.3f}ms  p95={_percentile(samples, 95):7.3f}ms  "
+        f"p99={_percentile(samples, 99):7.3f}ms"
+    )
+    return samples
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    p.add_argument("--requests", type=int, default=200)
+    p.add_argument("--connect-ms", type=float, default=5.0)
+    p.add_argument("--rtt-ms", type=float, default=2.0)
+    p.add_argument("--k", type=int, default=5)
+    args = p.parse_args()
+
+    connect = args.connect_ms / 1000.0
+    rtt = args.rtt_ms / 1000.0
+
+    def make_client() -> FakeChromaClient:
+        return FakeChromaClient(connect_latency=connect, rtt=rtt)
+
+    def per_request(q: str) -> None:
+        col = make_client().get_or_create_collection("juce_docs")
+        col.query(query_texts=[q], n_results=args.k)
+
+    pool = ChromaPool(make_client, "juce_docs")
+
+    def pooled(q: str) -> None:
+        pool.query(query_texts=[q], n_results=args.k)
+
+    print(f"{args.requests} requests, connect={args.connect_ms}ms, rtt={args.rtt_ms}ms")
+    before = _run("client per request", args.requests, per_request)
+    after = _run("pooled", args.requests, pooled)
+    print(f"speedup (mean): {statistics.fmean(before) / statistics.fmean(after):.2f}x")
+
+
+if __name__ == "__main__":
+    main()
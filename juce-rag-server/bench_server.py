@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+Load test for the RAG HTTP server: /search, /search/batch and /search/stream
+at a fixed concurrency, replaying a recorded query mix.
+
+By default the real FastAPI app is started locally (uvicorn on a free port,
+in a child process) with Chroma replaced by fake_chroma.FakeChromaClient,
+so it works offline and the numbers only move when the server code does.
+--url targets an already running server instead.
+
+    python bench_server.py --requests 500 --concurrency 16
+    python bench_server.py --endpoints stream --no-cache --rtt-ms 5
+    python bench_server.py --json bench.json
+    python bench_server.py --baseline bench.json --max-regression 0.25
+
+Reports throughput and p50/p95/p99 latency per endpoint (and time to first
+line for the stream). With --baseline, exits 1 if any endpoint's p95 grew by
+more than --max-regression relative to the saved run.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import requests
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_QUERIES = os.path.join(_HERE, "bench_queries.jsonl")
+ENDPOINTS = ("search", "batch", "stream")
+
+
+def _percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    idx = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * (len(ordered) - 1)))))
+    return ordered[idx]
+
+
+def load_queries(path: str) -> List[Dict[str, Any]]:
+    """JSONL of {"query", "k"} request bodies, or plain text with one query per line."""
+    out: List[Dict[str, Any]] = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if line.startswith("{"):
+                item = json.loads(line)
+                out.append({"query": item["query"], "k": int(item.get("k", 5))})
+            else:
+                out.append({"query": line, "k": 5})
+    if not out:
+        raise SystemExit(f"No queries in {path}")
+    return out
+
+
+# =====================
+# LOCAL SERVER
+# =====================
+
+def _serve(rtt_ms: float, use_cache: bool, ports: Any) -> None:
+    """Child process: server.app on a free port against the fake Chroma backend."""
+    import uvicorn
+
+    import server
+    from chroma_pool import ChromaPool
+    from fake_chroma import FakeChromaClient
+    from query_cache import QueryCache
+
+    rtt = rtt_ms / 1000.0
+    server.CHROMA_HOST = "fake-chroma"
+    server._chroma_pool = ChromaPool(
+        lambda: FakeChromaClient(rtt=rtt),
+        server.JUCE_RAG_COLLECTION,
+        max_concurrency=server.JUCE_RAG_CHROMA_MAX_CONCURRENCY,
+    )
+    if not use_cache:
+        server._cache = QueryCache(max_entries=0)
+
+    uv = uvicorn.Server(uvicorn.Config(server.app, host="127.0.0.1", port=0, log_level="warning"))
+    thread = threading.Thread(target=uv.run, daemon=True)
+    thread.start()
+    while not uv.started:
+        if not thread.is_alive():
+            ports.put(None)
+            return
+        time.sleep(0.01)
+    ports.put(uv.servers[0].sockets[0].getsockname()[1])
+    thread.join()
+
+
+def start_local_server(rtt_ms: float, use_cache: bool) -> Tuple[str, Any]:
+    """
+    Starts the real app with the fake backend in a child process, so the load
+    generator does not share a GIL with the server. Returns (base URL, process).
+    """
+    ctx = multiprocessing.get_context("spawn")
+    ports = ctx.Queue()
+    proc = ctx.Process(target=_serve, args=(rtt_ms, use_cache, ports), daemon=True)
+    proc.start()
+    try:
+        port = ports.get(timeout=30)
+    except Exception:
+        port = None
+    if port is None:
+        proc.terminate()
+        raise SystemExit("Local benchmark server failed to start")
+    return f"http://127.0.0.1:{port}", proc
+
+
+# =====================
+# LOAD
+# =====================
+
+class _Worker(threading.local):
+    def __init__(self) -> None:
+        self.session = requests.Session()
+
+
+def _one_request(
+    worker: _Worker, base: str, endpoint: str, queries: List[Dict[str, Any]], i: int, batch_size: int
+) -> Tuple[float, Optional[float], Optional[str]]:
+    """(latency ms, first-line ms for streams, error or None)"""
+    item = queries[i % len(queries)]
+    t0 = time.perf_counter()
+    first: Optional[float] = None
+    try:
+        if endpoint == "search":
+            resp = worker.session.post(f"{base}/search", json=item, timeout=30)
+            resp.raise_for_status()
+            resp.json()
+        elif endpoint == "batch":
+            body = {"queries": [queries[(i + j) % len(queries)] for j in range(batch_size)]}
+            resp = worker.session.post(f"{base}/search/batch", json=body, timeout=30)
+            resp.raise_for_status()
+            resp.json()
+        else:
+            with worker.session.post(f"{base}/search/stream", json=item, timeout=30, stream=True) as resp:
+                resp.raise_for_status()
+                for line in resp.iter_lines():
+                    if line and first is None:
+                        first = (time.perf_counter() - t0) * 1000.0
+                    if line and b'"error"' in line[:10]:
+                        raise RuntimeError(line.decode("utf-8", "replace"))
+    except Exception as e:
+        status = getattr(getattr(e, "response", None), "status_code", None)
+        return (time.perf_counter() - t0) * 1000.0, first, f"HTTP {status}" if status else type(e).__name__
+    return (time.perf_counter() - t0) * 1000.0, first, None
+
+
+def run_endpoint(
+    base: str,
+    endpoint: str,
+    queries: List[Dict[str, Any]],
+    requests_n: int,
+    concurrency: int,
+    batch_size: int,
+    warmup: int,
+) -> Dict[str, Any]:
+    worker = _Worker()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(lambda i: _one_request(worker, base, endpoint, queries, i, batch_size), range(warmup)))
+        t0 = time.perf_counter()
+        results = list(pool.map(
+            lambda i: _one_request(worker, base, endpoint, queries, i, batch_size), range(requests_n)
+        ))
+        wall = time.perf_counter() - t0
+
+    latencies = [ms for ms, _, err in results if err is None]
+    firsts = [f for _, f, err in results if err is None and f is not None]
+    errors: Dict[str, int] = {}
+    for _, _, err in results:
+        if err is not None:
+            errors[err] = errors.get(err, 0) + 1
+
+    report: Dict[str, Any] = {
+        "endpoint": endpoint,
+        "requests": requests_n,
+        "concurrency": concurrency,
+        "errors": errors,
+        "wall_s": round(wall, 3),
+        "rps": round(requests_n / wall, 1) if wall > 0 else 0.0,
+    }
+    if endpoint == "batch":
+        report["batch_size"] = batch_size
+        report["queries_per_s"] = round(requests_n * batch_size / wall, 1) if wall > 0 else 0.0
+    if latencies:
+        report.update({
+            "mean_ms": round(statistics.fmean(latencies), 3),
+            "p50_ms": round(_percentile(latencies, 50), 3),
+            "p95_ms": round(_percentile(latencies, 95), 3),
+            "p99_ms": round(_percentile(latencies, 99), 3),
+            "max_ms": round(max(latencies), 3),
+        })
+    if firsts:
+        report["first_line_p50_ms"] = round(_percentile(firsts, 50), 3)
+        report["first_line_p95_ms"] = round(_percentile(firsts, 95), 3)
+    return report
+
+
+def _print_report(r: Dict[str, Any]) -> None:
+    line = (
+        f"{r['endpoint']:<7} {r['requests']} req @ c={r['concurrency']}  {r['rps']:8.1f} req/s  "
+        f"p50={r.get('p50_ms', 0):7.2f}ms  p95={r.get('p95_ms', 0):7.2f}ms  p99={r.get('p99_ms', 0):7.2f}ms  "
+        f"max={r.get('max_ms', 0):7.2f}ms"
+    )
+    if "queries_per_s" in r:
+        line += f"  ({r['queries_per_s']:.1f} queries/s)"
+    if "first_line_p50_ms" in r:
+        line += f"  first-line p50={r['first_line_p50_ms']:.2f}ms p95={r['first_line_p95_ms']:.2f}ms"
+    if r["errors"]:
+        line += f"  errors={r['errors']}"
+    print(line, flush=True)
+
+
+def compare(reports: List[Dict[str, Any]], baseline_path: str, max_regression: float) -> List[str]:
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = {r["endpoint"]: r for r in json.load(f).get("endpoints", [])}
+    regressions = []
+    for r in reports:
+        old = baseline.get(r["endpoint"])
+        if not old or "p95_ms" not in old or "p95_ms" not in r:
+            continue
+        ratio = r["p95_ms"] / old["p95_ms"] if old["p95_ms"] > 0 else 1.0
+        print(f"{r['endpoint']:<7} p95 {old['p95_ms']:.2f}ms -> {r['p95_ms']:.2f}ms ({ratio:.2f}x)")
+        if ratio > 1.0 + max_regression:
+            regressions.append(r["endpoint"])
+        if r["errors"] and not old.get("errors"):
+            regressions.append(f"{r['endpoint']} (errors)")
+    return regressions
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    p.add_argument("--url", default="", help="benchmark a running server instead of the local fake-backed one")
+    p.add_argument("--endpoints", default=",".join(ENDPOINTS), help="comma list of search,batch,stream")
+    p.add_argument("--queries", default=DEFAULT_QUERIES, help="recorded query mix (JSONL or one per line)")
+    p.add_argument("--requests", type=int, default=500, help="measured requests per endpoint")
+    p.add_argument("--warmup", type=int, default=20)
+    p.add_argument("--concurrency", type=int, default=16)
+    p.add_argument("--batch-size", type=int, default=8)
+    p.add_argument("--rtt-ms", type=float, default=2.0, help="fake Chroma latency per round-trip")
+    p.add_argument("--no-cache", action="store_true", help="disable the server result cache (local server only)")
+    p.add_argument("--seed", type=int, default=0, help="shuffle seed for the query order")
+    p.add_argument("--json", default="", help="write the report to this file")
+    p.add_argument("--baseline", default="", help="report from an earlier --json run to compare against")
+    p.add_argument("--max-regression", type=float, default=0.25, help="allowed p95 growth vs. baseline")
+    args = p.parse_args()
+
+    endpoints = [e.strip() for e in args.endpoints.split(",") if e.strip()]
+    unknown = [e for e in endpoints if e not in ENDPOINTS]
+    if unknown:
+        raise SystemExit(f"Unknown endpoints: {unknown} (expected {', '.join(ENDPOINTS)})")
+
+    queries = load_queries(args.queries)
+    random.Random(args.seed).shuffle(queries)
+
+    proc = None
+    if args.url:
+        base = args.url.rstrip("/")
+    else:
+        base, proc = start_local_server(args.rtt_ms, use_cache=not args.no_cache)
+
+    print(
+        f"{base}: {len(queries)} recorded queries, {args.requests} requests/endpoint, "
+        f"concurrency={args.concurrency}, cache={'off' if args.no_cache else 'on'}"
+        + ("" if args.url else f", fake rtt={args.rtt_ms}ms"),
+        flush=True,
+    )
+    reports = []
+    try:
+        for endpoint in endpoints:
+            r = run_endpoint(base, endpoint, queries, args.requests, args.concurrency, args.batch_size, args.warmup)
+            _print_report(r)
+            reports.append(r)
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.join(timeout=5)
+
+    if args.json:
+        keys = ("url", "requests", "concurrency", "batch_size", "rtt_ms", "no_cache", "queries")
+        meta = {k: getattr(args, k) for k in keys}
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"config": meta, "endpoints": reports}, f, indent=2)
+        print(f"Report written to {args.json}")
+
+    if args.baseline:
+        regressions = compare(reports, args.baseline, args.max_regression)
+        if regressions:
+            print(f"REGRESSION: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Process-lifetime Chroma client/collection handle for the RAG server.
+
+The client and collection are created lazily on first use and reused for
+every request. A query that fails with a connection or transport error drops
+the handles, reconnects (checked with client.heartbeat()) and retries once;
+other errors (bad requests, dimension mismatches) are raised as they are.
+Concurrent queries are capped so a slow Chroma backend sheds load instead of
+piling up threadpool workers.
+"""
+from __future__ import annotations
+
+import threading
+from typing import Any, Callable, List, Tuple
+
+
+class BackendBusy(RuntimeError):
+    pass
+
+
+def _connection_errors() -> tuple:
+    # chromadb.HttpClient talks over httpx (requests in older releases)
+    errors: List[type] = [ConnectionError, TimeoutError]
+    try:
+        import httpx
+
+        errors.append(httpx.TransportError)
+    except Exception:
+        pass
+    try:
+        import requests
+
+        errors += [requests.ConnectionError, requests.Timeout]
+    except Exception:
+        pass
+    return tuple(errors)
+
+
+CONNECTION_ERRORS = _connection_errors()
+
+
+class ChromaPool:
+    def __init__(
+        self,
+        client_factory: Callable[[], Any],
+        collection_name: str,
+        max_concurrency: int = 8,
+        acquire_timeout: float = 10.0,
+    ):
+        self._client_factory = client_factory
+        self.collection_name = collection_name
+        self.acquire_timeout = acquire_timeout
+        self._slots = threading.BoundedSemaphore(max(1, int(max_concurrency)))
+        self._lock = threading.Lock()
+        self._client: Any = None
+        self._collection: Any = None
+        self.reconnects = 0
+
+    def collection(self) -> Any:
+        col = self._collection
+        if col is not None:
+            return col
+        return self._handles()[1]
+
+    def _handles(self) -> Tuple[Any, Any]:
+        """(client, collection), connecting first if needed; read together under the lock."""
+        with self._lock:
+            if self._collection is None:
+                client = self._client_factory()
+                if client is None:
+                    raise RuntimeError("Chroma client factory returned None")
+                self._collection = client.get_or_create_collection(self.collection_name)
+                self._client = client
+            return self._client, self._collection
+
+    def reset(self) -> None:
+        with self._lock:
+            self._client = None
+            self._collection = None
+
+    def _reconnect(self) -> Any:
+        self.reset()
+        self.reconnects += 1
+        client, col = self._handles()
+        heartbeat = getattr(client, "heartbeat", None)
+        if callable(heartbeat):
+            heartbeat()
+        return col
+
+    def call(self, fn: Callable[[Any], Any]) -> Any:
+        """Runs fn(collection) inside a concurrency slot, reconnecting once on a connection error."""
+        if not self._slots.acquire(timeout=self.acquire_timeout):
+            raise BackendBusy("Chroma backend busy: too many concurrent queries")
+        try:
+            try:
+                return fn(self.collection())
+            except CONNECTION_ERRORS:
+                col = self._reconnect()
+                return fn(col)
+        finally:
+            self._slots.release()
+
+    def refresh(self) -> Any:
+        """
+        Re-fetches the collection handle. A handle's metadata is a snapshot from
+        when it was fetched, so this is how changes written by ingest show up.
+        """
+        def fetch(_col: Any) -> Any:
+            client, _ = self._handles()
+            col = client.get_collection(self.collection_name)
+            with self._lock:
+                # Unless a reset/reconnect replaced the client meanwhile
+                if self._client is client:
+                    self._collection = col
+            return col
+
+        return self.call(fetch)
+
+    def query(self, **kwargs: Any) -> Any:
+        return self.call(lambda col: col.query(**kwargs))
+
+    @property
+    def connected(self) -> bool:
+        return self._collection is not None
@@ -0,0 +1,209 @@
+"""
+Declaration-boundary chunking of C++ headers for RAG ingestion (ingest_docs.py).
+
+A header is split into segments wherever a new declaration can start: the
+first line after a `;`, `}`, access specifier or preprocessor line, at
+namespace scope or directly inside a class (never inside a function body).
+A doc comment stays with the declaration it documents. Segments are packed
+greedily into chunks of at most `max_tokens`, cutting preferably before a
+namespace-scope declaration so classes stay whole where they fit. A single
+declaration larger than the budget is cut with context_packer.cut_at_boundary.
+
+Comments and string literals are stripped before braces are counted, and
+`namespace x {` braces do not count as nesting. JUCE's licence banner at the
+top of each header is dropped.
+"""
+from __future__ import annotations
+
+import hashlib
+import re
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+from context_packer import cut_at_boundary, estimate_tokens
+
+CHUNK_TOKENS = 400
+MIN_CHUNK_TOKENS = 40
+
+_STRING = re.compile(r'"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'')
+_NAMESPACE = re.compile(r"\bnamespace\b[\w:\s]*$")
+# A class/struct definition; forward declarations (`class Foo;`) don't name a chunk
+_TYPE_DECL = re.compile(r"^\s*(?:template\s*<.*>\s*)?(?:class|struct)\s+(?:JUCE_API\s+)?([A-Za-z_]\w*)\b(?!\s*;)")
+_ACCESS = re.compile(r"^\s*(?:public|protected|private)\s*:\s*$")
+_LICENCE = re.compile(r"licen[cs]e|This file is part of", re.IGNORECASE)
+
+
+@dataclass(frozen=True)
+class Chunk:
+    source: str
+    text: str
+    start_line: int  # 1-based, inclusive
+    end_line: int
+    symbol: str = ""
+
+    @property
+    def content_hash(self) -> str:
+        return hashlib.sha256(self.text.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class _Segment:
+    start: int  # 0-based line index
+    lines: List[str]
+    depth: int  # declaration depth at the first line (0 = namespace scope)
+    symbol: str
+
+
+def _code(line: str, in_comment: bool) -> Tuple[str, bool]:
+    """The line without comments and string literals, and whether a /* comment is still open."""
+    out = []
+    i = 0
+    while i < len(line):
+        if in_comment:
+            end = line.find("*/", i)
+            if end == -1:
+                return "".join(out), True
+            i, in_comment = end + 2, False
+            continue
+        j = line.find("/*", i)
+        k = line.find("//", i)
+        stop = min(p for p in (j, k, len(line)) if p != -1)
+        out.append(line[i:stop])
+        if stop == len(line) or stop == k:
+            break
+        i, in_comment = stop + 2, True
+    return _STRING.sub('""', "".join(out)), in_comment
+
+
+def _licence_end(lines: List[str]) -> int:
+    """Index of the first line after a leading licence comment (0 if there is none)."""
+    i = 0
+    while i < len(lines) and not lines[i].strip():
+        i += 1
+    if i == len(lines) or not lines[i].lstrip().startswith("/*"):
+        return 0
+    for j in range(i, len(lines)):
+        if "*/" in lines[j]:
+            banner = "".join(lines[i:j + 1])
+            return j + 1 if _LICENCE.search(banner) else 0
+    return 0
+
+
+def _segments(lines: List[str], first: int) -> List[_Segment]:
+    segments: List[_Segment] = []
+    # Each open brace: True for a namespace, False for anything else
+    braces: List[bool] = []
+    in_comment = False
+    boundary = True  # a declaration may start on the next non-blank line
+    symbol = ""
+    pending_namespace = False
+
+    for i in range(first, len(lines)):
+        line = lines[i]
+        code, in_comment_after = _code(line, in_comment)
+        depth = sum(1 for ns in braces if not ns)
+        stripped = code.strip()
+
+        if boundary and line.strip() and depth <= 1:
+            segments.append(_Segment(i, [], depth, symbol if depth else ""))
+            boundary = False
+        if not segments:
+            segments.append(_Segment(i, [], depth, ""))
+        segments[-1].lines.append(line)
+
+        if depth == 0:
+            m = _TYPE_DECL.match(code)
+            if m:
+                symbol = m.group(1)
+                if not segments[-1].symbol:
+                    segments[-1].symbol = symbol
+
+        for pos, ch in enumerate(code):
+            if ch == "{":
+                braces.append(pending_namespace or bool(_NAMESPACE.search(code[:pos])))
+                pending_namespace = False
+            elif ch == "}" and braces:
+                braces.pop()
+        if stripped and _NAMESPACE.search(stripped) and "{" not in stripped:
+            pending_namespace = True  # brace on the next line
+
+        depth_after = sum(1 for ns in braces if not ns)
+        if depth_after == 0 and depth > 0:
+            symbol = ""
+        if stripped and depth_after <= 1 and (
+            stripped.endswith((";", "}", "{")) or stripped.startswith("#") or _ACCESS.match(code)
+        ):
+            boundary = True
+        in_comment = in_comment_after
+
+    return [s for s in segments if "".join(s.lines).strip()]
+
+
+def chunk_header(text: str, source: str, max_tokens: int = CHUNK_TOKENS,
+                 min_tokens: int = MIN_CHUNK_TOKENS) -> List[Chunk]:
+    lines = text.splitlines(keepends=True)
+    segments = _segments(lines, _licence_end(lines))
+    chunks: List[Chunk] = []
+
+    def emit(segs: List[_Segment]) -> None:
+        body = "".join(line for s in segs for line in s.lines)
+        if not body.strip():
+            return
+        symbol = next((s.symbol for s in segs if s.symbol), "")
+        text = body.strip("\n")
+        # Line numbers of the stripped text, not of the blank lines around it
+        start = segs[0].start + 1 + len(body) - len(body.lstrip("\n"))
+        chunks.append(Chunk(source, text, start, start + text.count("\n"), symbol))
+
+    current: List[_Segment] = []
+    current_tokens: List[int] = []
+    for seg in segments:
+        tokens = estimate_tokens("".join(seg.lines))
+        while current and sum(current_tokens) + tokens > max_tokens:
+            cut = _preferred_cut(current, current_tokens, min_tokens)
+            emit(current[:cut])
+            current, current_tokens = current[cut:], current_tokens[cut:]
+        if tokens > max_tokens:
+            chunks.extend(_split_long(seg, source, max_tokens, min_tokens))
+            continue
+        current.append(seg)
+        current_tokens.append(tokens)
+    if current:
+        emit(current)
+    return chunks
+
+
+def _preferred_cut(segs: List[_Segment], tokens: List[int], min_tokens: int) -> int:
+    """Last namespace-scope segment start that leaves at least min_tokens before it; else everything."""
+    total = sum(tokens)
+    for j in range(len(segs) - 1, 0, -1):
+        total -= tokens[j]
+        if segs[j].depth == 0 and total >= min_tokens:
+            return j
+    return len(segs)
+
+
+def _split_long(seg: _Segment, source: str, max_tokens: int, min_tokens: int) -> List[Chunk]:
+    chunks: List[Chunk] = []
+    rest = "".join(seg.lines)
+    line = seg.start + 1
+    while rest.strip():
+        lead = len(rest) - len(rest.lstrip("\n"))
+        line += lead
+        rest = rest[lead:]
+        piece = cut_at_boundary(rest, max_tokens, min_tokens) if estimate_tokens(rest) > max_tokens else rest
+        if not piece:
+            # No boundary fits (e.g. one enormous line): hard cut by characters
+            piece = rest[: max(1, max_tokens * 4)]
+        text = piece.rstrip("\n")
+        chunks.append(Chunk(source, text, line, line + text.count("\n"), seg.symbol))
+        line += piece.count("\n")
+        rest = rest[len(piece):]
+    return chunks
+
+
+def chunk_file(path: str, source: Optional[str] = None, max_tokens: int = CHUNK_TOKENS,
+               min_tokens: int = MIN_CHUNK_TOKENS) -> List[Chunk]:
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        text = f.read()
+    return chunk_header(text, source or path, max_tokens, min_tokens)
@@ -0,0 +1,163 @@
+"""
+On-disk cache for LLM chat completions (agent.generate_code, stress_test).
+
+Entries are content-addressed: the key is a SHA-256 over
+(model, SHA-256 of the system prompt, user prompt, temperature), so the
+same question with the same retrieved context hits, and any change to the
+context misses. Stored in SQLite (WAL mode, safe across threads and
+processes) and bounded by total completion bytes with least-recently-used
+eviction.
+
+Opt out with JUCE_RAG_LLM_CACHE=0, or use_cache=False per call.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+
+LLM_CACHE_ENABLED = os.getenv("JUCE_RAG_LLM_CACHE", "1").strip().lower() not in ("0", "false", "no", "off")
+LLM_CACHE_PATH = os.getenv("JUCE_RAG_LLM_CACHE_PATH", os.path.join(_HERE, ".cache", "llm_completions.sqlite"))
+LLM_CACHE_MAX_MB = float(os.getenv("JUCE_RAG_LLM_CACHE_MAX_MB", "64"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS completions (
+    key        TEXT PRIMARY KEY,
+    model      TEXT NOT NULL,
+    completion TEXT NOT NULL,
+    size       INTEGER NOT NULL,
+    created    REAL NOT NULL,
+    last_used  REAL NOT NULL,
+    hits       INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS completions_last_used ON completions(last_used);
+"""
+
+
+def completion_key(model: str, system_prompt: str, user_prompt: str, temperature: float) -> str:
+    system_hash = hashlib.sha256(system_prompt.encode("utf-8")).hexdigest()
+    material = json.dumps([model, system_hash, user_prompt, round(float(temperature), 4)], ensure_ascii=False)
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class CompletionCache:
+    def __init__(self, path: str = LLM_CACHE_PATH, max_bytes: int = int(LLM_CACHE_MAX_MB * 1024 * 1024)):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+        self._db.commit()
+
+    def get(self, model: str, system_prompt: str, user_prompt: str, temperature: float) -> Optional[str]:
+        key = completion_key(model, system_prompt, user_prompt, temperature)
+        with self._lock:
+            row = self._db.execute("SELECT completion FROM completions WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._db.execute(
+                "UPDATE completions SET last_used = ?, hits = hits + 1 WHERE key = ?", (time.time(), key)
+            )
+            self._db.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, model: str, system_prompt: str, user_prompt: str, temperature: float, completion: str) -> None:
+        key = completion_key(model, system_prompt, user_prompt, temperature)
+        size = len(completion.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO completions (key, model, completion, size, created, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, completion, size, now, now),
+            )
+            self._evict()
+            self._db.commit()
+
+    def _evict(self) -> None:
+        (total,) = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM completions").fetchone()
+        if total <= self.max_bytes:
+            return
+        for key, size in self._db.execute("SELECT key, size FROM completions ORDER BY last_used").fetchall():
+            self._db.execute("DELETE FROM completions WHERE key = ?", (key,))
+            self.evictions += 1
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def clear(self) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM completions")
+            self._db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries, total = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM completions").fetchone()
+        return {
+            "path": self.path,
+            "entries": entries,
+            "bytes": total,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+_cache: Optional[CompletionCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> CompletionCache:
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = CompletionCache()
+    return _cache
+
+
+def chat_completion(get_client: Callable[[], Any], model: str, system_prompt: str, user_prompt: str,
+                    temperature: float, use_cache: bool = True) -> str:
+    """
+    client.chat.completions.create(...) for a system + user message pair,
+    answered from the cache when the same request has been seen before.
+    `get_client` is only called on a miss, so hits skip client setup too.
+    """
+    cache = get_cache() if (use_cache and LLM_CACHE_ENABLED) else None
+    if cache is not None:
+        cached = cache.get(model, system_prompt, user_prompt, temperature)
+        if cached is not None:
+            return cached
+
+    response = get_client().chat.completions.create(
+        model=model,
+        messages=[
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt},
+        ],
+        temperature=temperature,
+    )
+    content = response.choices[0].message.content or ""
+
+    if cache is not None and content:
+        cache.put(model, system_prompt, user_prompt, temperature, content)
+    return content
@@ -0,0 +1,212 @@
+"""
+Token-budgeted context assembly for LLM prompts (agent.query_juce_rag,
+agent.generate_code, rag_client.get_juce_context).
+
+Hits are taken in rank order. Near-duplicates of an already packed chunk
+(MinHash estimate of word 5-shingle Jaccard similarity >= DEDUP_THRESHOLD) are
+dropped, and whole chunks are packed while they fit the budget. The first
+chunk that does not fit is cut at the last declaration boundary that does
+(a blank line or a line ending in `;`, `}` or `*/` outside braces, falling
+back to a line or sentence end), so prompts never end mid-signature.
+
+Token counts use tiktoken when installed, otherwise ~4 characters per token.
+"""
+import math
+import os
+import random
+import re
+import zlib
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+
+try:
+    import tiktoken
+
+    _ENCODING = tiktoken.get_encoding("cl100k_base")
+except Exception:
+    _ENCODING = None
+
+CONTEXT_TOKENS = int(os.getenv("JUCE_RAG_CONTEXT_TOKENS", "2000"))
+DEDUP_THRESHOLD = float(os.getenv("JUCE_RAG_DEDUP_THRESHOLD", "0.8"))
+MIN_CHUNK_TOKENS = 40
+
+SHINGLE_SIZE = 5
+NUM_PERM = 64
+_PRIME = 4294967311  # smallest prime > 2**32, keeps a*h+b inside uint64
+
+_rng = random.Random(0x4A554345)
+_PERM_A = np.array([_rng.randrange(1, 2 ** 32) for _ in range(NUM_PERM)], dtype=np.uint64)
+_PERM_B = np.array([_rng.randrange(0, 2 ** 32) for _ in range(NUM_PERM)], dtype=np.uint64)
+
+_WORD = re.compile(r"\w+|[^\w\s]")
+_SENTENCE_END = re.compile(r"[.!?](?=\s)")
+
+
+def estimate_tokens(text: str) -> int:
+    if not text:
+        return 0
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text, disallowed_special=()))
+    return math.ceil(len(text) / 4)
+
+
+# =====================
+# NEAR-DUPLICATES
+# =====================
+
+def minhash_signature(text: str, shingle_size: int = SHINGLE_SIZE) -> np.ndarray:
+    words = _WORD.findall(text.lower())
+    if len(words) <= shingle_size:
+        shingles = {" ".join(words)}
+    else:
+        shingles = {" ".join(words[i:i + shingle_size]) for i in range(len(words) - shingle_size + 1)}
+    hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.uint64, count=len(shingles))
+    return ((np.outer(_PERM_A, hashes) + _PERM_B[:, None]) % _PRIME).min(axis=1)
+
+
+def similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """Estimated Jaccard similarity of two MinHash signatures."""
+    return float(np.count_nonzero(a == b)) / len(a)
+
+
+# =====================
+# CUTTING
+# =====================
+
+def cut_at_boundary(text: str, max_tokens: int, min_tokens: int = MIN_CHUNK_TOKENS) -> str:
+    """
+    Longest prefix of `text` within `max_tokens` that ends on a declaration
+    boundary (or at least a line or sentence end). "" if no such prefix has
+    `min_tokens`.
+    """
+    strong = weak = sentence = 0
+    used = 0
+    depth = 0
+    pos = 0
+    for line in text.splitlines(keepends=True):
+        tokens = estimate_tokens(line)
+        if used + tokens > max_tokens:
+            # Prose paragraphs are often one long line: allow a sentence end in it
+            for m in reversed(list(_SENTENCE_END.finditer(line))):
+                if used + estimate_tokens(line[:m.end()]) <= max_tokens:
+                    sentence = pos + m.end()
+                    break
+            break
+        used += tokens
+        pos += len(line)
+        depth = max(0, depth + line.count("{") - line.count("}"))
+        stripped = line.strip()
+        weak = pos
+        if depth == 0 and (not stripped or stripped.endswith((";", "}", "*/"))):
+            strong = pos
+
+    for end in (strong, max(weak, sentence)):
+        prefix = text[:end].rstrip()
+        if prefix and estimate_tokens(prefix) >= min_tokens:
+            return prefix
+    return ""
+
+
+# =====================
+# PACKING
+# =====================
+
+@dataclass
+class PackedContext:
+    text: str
+    hits: List[Dict[str, Any]] = field(default_factory=list)
+    tokens: int = 0
+    duplicates: int = 0
+    truncated: int = 0
+    dropped: int = 0
+
+
+class ContextPacker:
+    """
+    Incremental pack_context: `add` hits in rank order as they arrive, then
+    `result()`. `full` turns true once less than MIN_CHUNK_TOKENS of the
+    budget is left, so a streaming caller can stop reading hits there.
+    """
+
+    def __init__(
+        self,
+        max_tokens: Optional[int] = None,
+        fmt: Callable[[Dict[str, Any]], str] = lambda h: h.get("content", ""),
+        separator: str = "\n\n",
+        dedup_threshold: float = DEDUP_THRESHOLD,
+    ):
+        self.budget = CONTEXT_TOKENS if max_tokens is None else max_tokens
+        self.fmt = fmt
+        self.separator = separator
+        self.dedup_threshold = dedup_threshold
+        self._out = PackedContext(text="")
+        self._blocks: List[str] = []
+        self._signatures: List[np.ndarray] = []
+        self._sep_tokens = estimate_tokens(separator)
+
+    @property
+    def full(self) -> bool:
+        return self.budget - self._out.tokens - (self._sep_tokens if self._blocks else 0) < MIN_CHUNK_TOKENS
+
+    def add(self, hit: Dict[str, Any]) -> bool:
+        """Packs one hit if it fits (cut at a boundary if need be). Returns whether anything was packed."""
+        out = self._out
+        content = (hit.get("content") or "").strip()
+        if not content:
+            return False
+        signature = minhash_signature(content)
+        if any(similarity(signature, s) >= self.dedup_threshold for s in self._signatures):
+            out.duplicates += 1
+            return False
+
+        remaining = self.budget - out.tokens - (self._sep_tokens if self._blocks else 0)
+        packed = dict(hit, content=content)
+        block = self.fmt(packed)
+        tokens = estimate_tokens(block)
+        if tokens > remaining:
+            overhead = tokens - estimate_tokens(content)
+            cut = cut_at_boundary(content, remaining - overhead)
+            if not cut:
+                out.dropped += 1
+                return False
+            packed["content"] = cut
+            block = self.fmt(packed)
+            tokens = estimate_tokens(block)
+            if tokens > remaining:
+                out.dropped += 1
+                return False
+            out.truncated += 1
+
+        out.tokens += tokens + (self._sep_tokens if self._blocks else 0)
+        self._blocks.append(block)
+        self._signatures.append(signature)
+        out.hits.append(packed)
+        return True
+
+    def result(self) -> PackedContext:
+        self._out.text = self.separator.join(self._blocks)
+        return self._out
+
+
+def pack_context(
+    hits: Iterable[Dict[str, Any]],
+    max_tokens: Optional[int] = None,
+    fmt: Callable[[Dict[str, Any]], str] = lambda h: h.get("content", ""),
+    separator: str = "\n\n",
+    dedup_threshold: float = DEDUP_THRESHOLD,
+) -> PackedContext:
+    """
+    Packs ranked `hits` (dicts with "content") into at most `max_tokens`
+    (default JUCE_RAG_CONTEXT_TOKENS). `fmt` renders one hit, including any
+    header; `separator` joins them. Returned hits are copies whose "content"
+    is what was actually packed. `hits` may be a stream: it is read only
+    until the budget is full.
+    """
+    packer = ContextPacker(max_tokens, fmt, separator, dedup_threshold)
+    for hit in hits:
+        packer.add(hit)
+        if packer.full:
+            break
+    return packer.result()
@@ -0,0 +1,109 @@
+"""
+On-disk embedding cache for ingest_docs.py.
+
+Vectors are keyed by (embedding model, SHA-256 of the chunk text), so an
+unchanged chunk is never embedded twice, whichever file or position it comes
+from, while switching models starts from a clean slate. Stored in SQLite (WAL
+mode) as float32 blobs. Entries are not evicted: `prune` drops the ones a
+full ingest no longer references.
+"""
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+
+EMBED_CACHE_PATH = (
+    os.getenv("JUCE_RAG_EMBED_CACHE_PATH", "").strip() or os.path.join(_HERE, ".cache", "embeddings.sqlite")
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS embeddings (
+    model   TEXT NOT NULL,
+    hash    TEXT NOT NULL,
+    dim     INTEGER NOT NULL,
+    vector  BLOB NOT NULL,
+    created REAL NOT NULL,
+    PRIMARY KEY (model, hash)
+);
+"""
+
+# SQLite's default limit on host parameters per statement is 999
+_IN_BATCH = 500
+
+
+class EmbeddingCache:
+    def __init__(self, model: str, path: str = EMBED_CACHE_PATH):
+        self.model = model
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+        self._db.commit()
+
+    def get_many(self, hashes: Sequence[str]) -> Dict[str, np.ndarray]:
+        """{hash: vector} for the hashes that are cached."""
+        found: Dict[str, np.ndarray] = {}
+        unique = list(dict.fromkeys(hashes))
+        with self._lock:
+            for start in range(0, len(unique), _IN_BATCH):
+                batch = unique[start:start + _IN_BATCH]
+                rows = self._db.execute(
+                    f"SELECT hash, vector FROM embeddings WHERE model = ? AND hash IN ({','.join('?' * len(batch))})",
+                    (self.model, *batch),
+                ).fetchall()
+                for h, blob in rows:
+                    found[h] = np.frombuffer(blob, dtype=np.float32)
+        self.hits += len(found)
+        self.misses += len(unique) - len(found)
+        return found
+
+    def put_many(self, items: Iterable[Tuple[str, np.ndarray]]) -> None:
+        now = time.time()
+        rows = []
+        for h, vec in items:
+            vec = np.asarray(vec, dtype=np.float32).ravel()
+            rows.append((self.model, h, int(vec.shape[0]), vec.tobytes(), now))
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, hash, dim, vector, created) VALUES (?, ?, ?, ?, ?)", rows
+            )
+            self._db.commit()
+
+    def prune(self, keep: Iterable[str]) -> int:
+        """Deletes this model's entries whose hash is not in `keep`. Returns how many were removed."""
+        keep = set(keep)
+        with self._lock:
+            stale: List[str] = [
+                h for (h,) in self._db.execute("SELECT hash FROM embeddings WHERE model = ?", (self.model,))
+                if h not in keep
+            ]
+            for start in range(0, len(stale), _IN_BATCH):
+                batch = stale[start:start + _IN_BATCH]
+                self._db.execute(
+                    f"DELETE FROM embeddings WHERE model = ? AND hash IN ({','.join('?' * len(batch))})",
+                    (self.model, *batch),
+                )
+            self._db.commit()
+        return len(stale)
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            entries, total = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings WHERE model = ?", (self.model,)
+            ).fetchone()
+        return {"path": self.path, "model": self.model, "entries": entries, "bytes": total,
+                "hits": self.hits, "misses": self.misses}
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
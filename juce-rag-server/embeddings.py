@@ -0,0 +1,106 @@
+"""
+Query/document embedding for the JUCE RAG server and ingest_docs.py.
+
+Local mode (JUCE_RAG_LOCAL_DIR) and Chroma collections written by
+ingest_docs.py are queried with vectors from this embedder. The store
+records the embedder it was built with (`embedder_name()`, under MODEL_KEY
+and DIM_KEY), and `check_embedder` refuses to query it with another one.
+Collections without that record are left to Chroma's own embedding function.
+"""
+from __future__ import annotations
+
+import importlib
+import os
+import threading
+from typing import Any, Callable, List, Mapping, Optional, Sequence
+
+import numpy as np
+
+JUCE_RAG_EMBED_MODEL = os.getenv("JUCE_RAG_EMBED_MODEL", "Qwen/Qwen3-Embedding-0.6B").strip()
+# module:function to embed with instead of the HuggingFace model (same one ingest_docs.py --embedder used)
+JUCE_RAG_EMBEDDER = os.getenv("JUCE_RAG_EMBEDDER", "").strip()
+
+# Store / collection metadata keys written by ingest_docs.py
+MODEL_KEY = "embed_model"
+DIM_KEY = "embed_dim"
+
+EmbedFn = Callable[[Sequence[str]], np.ndarray]
+
+_embedder: Optional[EmbedFn] = None
+_embedder_lock = threading.Lock()
+
+
+def normalize_rows(mat: np.ndarray) -> np.ndarray:
+    """L2-normalize rows so a dot product is a cosine similarity."""
+    mat = np.asarray(mat, dtype=np.float32)
+    if mat.ndim == 1:
+        mat = mat[None, :]
+    norms = np.linalg.norm(mat, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return mat / norms
+
+
+def _huggingface_embedder() -> EmbedFn:
+    try:
+        from langchain_huggingface import HuggingFaceEmbeddings  # type: ignore
+    except ImportError as e:
+        raise ImportError(
+            f"{e}. The default embedder needs `pip install langchain-huggingface` "
+            "(or set JUCE_RAG_EMBEDDER=module:function)"
+        ) from e
+
+    model = HuggingFaceEmbeddings(
+        model_name=JUCE_RAG_EMBED_MODEL,
+        encode_kwargs={"normalize_embeddings": True},
+    )
+
+    def embed(texts: Sequence[str]) -> np.ndarray:
+        return normalize_rows(np.asarray(model.embed_documents(list(texts)), dtype=np.float32))
+
+    return embed
+
+
+class EmbedderMismatch(RuntimeError):
+    pass
+
+
+def load_embedder(spec: str) -> EmbedFn:
+    """`package.module:function` -> that function, with its output row-normalized."""
+    module_name, _, attr = spec.partition(":")
+    if not module_name or not attr:
+        raise ValueError(f"embedder must look like module:function, got {spec!r}")
+    fn = getattr(importlib.import_module(module_name), attr)
+    return lambda texts: normalize_rows(fn(texts))
+
+
+def embedder_name() -> str:
+    """What stores record as their embedder: the JUCE_RAG_EMBEDDER spec, else the model name."""
+    return JUCE_RAG_EMBEDDER or JUCE_RAG_EMBED_MODEL
+
+
+def check_embedder(meta: Mapping[str, Any], where: str, name: Optional[str] = None) -> None:
+    """Raises EmbedderMismatch if `meta` records vectors from an embedder other than `name`."""
+    name = name or embedder_name()
+    recorded = meta.get(MODEL_KEY)
+    if recorded and recorded != name:
+        raise EmbedderMismatch(
+            f"{where} was embedded with {recorded!r} ({meta.get(DIM_KEY, '?')} dims) but this process embeds "
+            f"with {name!r}; set JUCE_RAG_EMBED_MODEL/JUCE_RAG_EMBEDDER to match or re-ingest"
+        )
+
+
+def get_embedder() -> EmbedFn:
+    """
+    Returns the process-wide embedding function (loaded once, on first use).
+    Output is a float32 (n, dim) matrix with L2-normalized rows.
+    """
+    global _embedder
+    if _embedder is None:
+        with _embedder_lock:
+            if _embedder is None:
+                _embedder = load_embedder(JUCE_RAG_EMBEDDER) if JUCE_RAG_EMBEDDER else _huggingface_embedder()
+    return _embedder
+
+
+def embed_texts(texts: List[str]) -> np.ndarray:
+    return get_embedder()(texts)
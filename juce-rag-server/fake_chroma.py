@@ -0,0 +1,160 @@
+"""
+In-process stand-in for chromadb.HttpClient, for offline benchmarks.
+
+Latencies are simulated with time.sleep so the numbers reflect the number of
+round-trips a code path makes, not the speed of a real Chroma deployment.
+"""
+from __future__ import annotations
+
+import re
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+_WORD = re.compile(r"[A-Za-z0-9_]+")
+
+SAMPLE_DOCS: List[Dict[str, str]] = [
+    {"source": "juce_audio_processors/processors/juce_AudioProcessor.h",
+     "content": "class AudioProcessor : private AudioPlayHead processBlock prepareToPlay releaseResources "
+                "getLatencySamples"},
+    {"source": "juce_audio_processors/utilities/juce_AudioProcessorValueTreeState.h",
+     "content": "class AudioProcessorValueTreeState SliderAttachment ButtonAttachment ComboBoxAttachment "
+                "parameter layout attachments"},
+    {"source": "juce_audio_basics/buffers/juce_AudioSampleBuffer.h",
+     "content": "class AudioBuffer setSize getWritePointer copyFrom addFrom circular buffer delay line clear"},
+    {"source": "juce_dsp/processors/juce_ProcessContext.h",
+     "content": "struct ProcessSpec sampleRate maximumBlockSize numChannels ProcessContextReplacing"},
+    {"source": "juce_dsp/processors/juce_DelayLine.h",
+     "content": "class DelayLine pushSample popSample setDelay prepare reset interpolation circular buffer delay"},
+    {"source": "juce_gui_basics/components/juce_Component.h",
+     "content": "class Component paint resized addAndMakeVisible setBounds mouseDown repaint"},
+    {"source": "juce_core/containers/juce_AbstractFifo.h",
+     "content": "class AbstractFifo prepareToWrite finishedWrite prepareToRead lock free fifo circular buffer"},
+    {"source": "juce_dsp/frequency/juce_FFT.h",
+     "content": "class FFT performRealOnlyForwardTransform performFrequencyOnlyForwardTransform spectral analysis"},
+]
+
+
+def _tokens(text: str) -> set:
+    return {w.lower() for w in _WORD.findall(text)}
+
+
+class FakeCollection:
+    def __init__(self, name: str, docs: Sequence[Dict[str, str]], query_latency: float):
+        self.name = name
+        self._docs = list(docs)
+        self._doc_tokens = [_tokens(d["content"]) for d in self._docs]
+        self._ids = [f"sample-{i}" for i in range(len(self._docs))]
+        self._vectors: List[Optional[List[float]]] = [None] * len(self._docs)
+        self.metadata: Dict[str, Any] = {}
+        self.query_latency = query_latency
+        self.query_calls = 0
+
+    def count(self) -> int:
+        return len(self._docs)
+
+    def modify(self, metadata: Optional[Dict[str, Any]] = None, **_: Any) -> None:
+        if metadata is not None:
+            self.metadata = dict(metadata)
+
+    def add(self, ids: Sequence[str], documents: Sequence[str],
+            metadatas: Optional[Sequence[Dict[str, Any]]] = None, **kwargs: Any) -> None:
+        self.upsert(ids, documents, metadatas, **kwargs)
+
+    def upsert(self, ids: Sequence[str], documents: Sequence[str], metadatas: Optional[Sequence[Dict[str, Any]]] = None,
+               embeddings: Optional[Sequence[Sequence[float]]] = None, **_: Any) -> None:
+        metas = list(metadatas or [{} for _ in documents])
+        vectors = list(embeddings) if embeddings is not None else [None] * len(documents)
+        rows = {cid: i for i, cid in enumerate(self._ids)}
+        for cid, doc, meta, vec in zip(ids, documents, metas, vectors):
+            record = {"source": str(meta.get("source", "Unknown")), "content": doc}
+            vec = list(vec) if vec is not None else None
+            if cid in rows:
+                self._docs[rows[cid]] = record
+                self._doc_tokens[rows[cid]] = _tokens(doc)
+                self._vectors[rows[cid]] = vec
+            else:
+                rows[cid] = len(self._ids)
+                self._ids.append(cid)
+                self._docs.append(record)
+                self._doc_tokens.append(_tokens(doc))
+                self._vectors.append(vec)
+
+    def get(self, ids: Optional[Sequence[str]] = None, limit: Optional[int] = None, offset: int = 0,
+            **_: Any) -> Dict[str, Any]:
+        wanted = set(ids) if ids is not None else None
+        found = [cid for cid in self._ids if wanted is None or cid in wanted]
+        found = found[offset:offset + limit] if limit is not None else found[offset:]
+        return {"ids": found}
+
+    def delete(self, ids: Sequence[str], **_: Any) -> None:
+        drop = set(ids)
+        keep = [i for i, cid in enumerate(self._ids) if cid not in drop]
+        self._ids = [self._ids[i] for i in keep]
+        self._docs = [self._docs[i] for i in keep]
+        self._doc_tokens = [self._doc_tokens[i] for i in keep]
+        self._vectors = [self._vectors[i] for i in keep]
+
+    def query(self, query_texts: Optional[Sequence[str]] = None, n_results: int = 5,
+              query_embeddings: Optional[Sequence[Sequence[float]]] = None, **_: Any) -> Dict[str, Any]:
+        self.query_calls += 1
+        if self.query_latency:
+            time.sleep(self.query_latency)
+
+        documents, metadatas, distances = [], [], []
+        for q in query_embeddings or ():
+            dim = len(q)
+            for vec in self._vectors:
+                if vec is not None and len(vec) != dim:
+                    raise ValueError(f"Embedding dimension {dim} does not match collection dimensionality {len(vec)}")
+            scores = [sum(a * b for a, b in zip(q, vec)) if vec is not None else -1.0 for vec in self._vectors]
+            ranked = sorted(range(len(self._docs)), key=lambda i: -scores[i])[:n_results]
+            documents.append([self._docs[i]["content"] for i in ranked])
+            metadatas.append([{"source": self._docs[i]["source"]} for i in ranked])
+            distances.append([1.0 - scores[i] for i in ranked])
+        for text in query_texts or ():
+            qt = _tokens(text)
+            ranked = sorted(
+                range(len(self._docs)),
+                key=lambda i: -len(qt & self._doc_tokens[i]),
+            )[:n_results]
+            documents.append([self._docs[i]["content"] for i in ranked])
+            metadatas.append([{"source": self._docs[i]["source"]} for i in ranked])
+            distances.append([1.0 / (1 + len(qt & self._doc_tokens[i])) for i in ranked])
+        return {"documents": documents, "metadatas": metadatas, "distances": distances}
+
+
+class FakeChromaClient:
+    """Mimics the parts of chromadb.HttpClient the RAG server uses."""
+
+    def __init__(
+        self,
+        connect_latency: float = 0.0,
+        rtt: float = 0.0,
+        docs: Optional[Sequence[Dict[str, str]]] = None,
+    ):
+        if connect_latency:
+            time.sleep(connect_latency)
+        self.rtt = rtt
+        self._collections: Dict[str, FakeCollection] = {}
+        self._docs = list(docs if docs is not None else SAMPLE_DOCS)
+
+    def heartbeat(self) -> int:
+        if self.rtt:
+            time.sleep(self.rtt)
+        return time.time_ns()
+
+    def get_or_create_collection(self, name: str, **_: Any) -> FakeCollection:
+        if self.rtt:
+            time.sleep(self.rtt)
+        col = self._collections.get(name)
+        if col is None:
+            col = FakeCollection(name, self._docs, query_latency=self.rtt)
+            self._collections[name] = col
+        return col
+
+    def get_collection(self, name: str, **_: Any) -> FakeCollection:
+        if self.rtt:
+            time.sleep(self.rtt)
+        if name not in self._collections:
+            raise ValueError(f"Collection {name} does not exist.")
+        return self._collections[name]
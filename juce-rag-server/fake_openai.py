@@ -0,0 +1,91 @@
+"""
+Local stand-in for the OpenAI chat completions endpoint, for offline tests
+of agent.generate_code / stress_test and the completion cache.
+
+    python fake_openai.py --port 8001 --latency 1.5
+    OPENAI_BASE_URL=http://127.0.0.1:8001/v1 OPENAI_API_KEY=fake python agent.py
+
+Replies are deterministic (derived from the request) and delayed by
+`latency` seconds to mimic a real model, so cache hits are easy to see.
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Tuple
+
+
+class FakeOpenAIServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], latency: float = 0.0):
+        super().__init__(address, _Handler)
+        self.latency = latency
+        self.completion_calls = 0
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: FakeOpenAIServer
+
+    def log_message(self, *args) -> None:
+        return
+
+    def _reply(self, status: int, payload: dict) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self) -> None:
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._reply(404, {"error": {"message": f"unknown path {self.path}"}})
+            return
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        self.server.completion_calls += 1
+        time.sleep(self.server.latency)
+
+        messages = request.get("messages", [])
+        digest = hashlib.sha1(json.dumps(messages, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+        user = next((m.get("content", "") for m in reversed(messages) if m.get("role") == "user"), "")
+        content = f"// fake completion {digest}\n// request: {user.strip()[:80]}\nclass Generated {{}};\n"
+        self._reply(200, {
+            "id": f"chatcmpl-{digest}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "fake"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+        })
+
+
+def start_fake_openai(host: str = "127.0.0.1", port: int = 0, latency: float = 0.0) -> FakeOpenAIServer:
+    """Starts the fake on a background thread (port 0 = any free port)."""
+    server = FakeOpenAIServer((host, port), latency)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake OpenAI chat completions endpoint")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency", type=float, default=1.0, help="seconds per completion")
+    args = parser.parse_args()
+    server = FakeOpenAIServer((args.host, args.port), args.latency)
+    print(f"Fake OpenAI listening on {server.base_url}", flush=True)
+    server.serve_forever()
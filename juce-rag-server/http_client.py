@@ -0,0 +1,345 @@
+"""
+Shared HTTP client for everything that talks to the JUCE RAG server
+(rag_client, agent, mcp_juce_bridge, stress_test).
+
+- one keep-alive connection pool per process (requests.Session; httpx for asyncio)
+- retries on connection errors, timeouts and 502/503/504 with full-jitter
+  exponential backoff
+- a per-call deadline bounding all attempts together
+- a per-host circuit breaker: after N consecutive failed calls the server is
+  considered down and calls fail fast until a cool-down has passed
+"""
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+import weakref
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, Optional
+from urllib.parse import urljoin, urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import httpx
+except Exception:
+    httpx = None
+
+RAG_BASE_URL = os.getenv("JUCE_RAG_BASE_URL", "http://localhost:8000")
+
+DEFAULT_DEADLINE_S = float(os.getenv("JUCE_RAG_HTTP_DEADLINE_S", "15"))
+DEFAULT_RETRIES = int(os.getenv("JUCE_RAG_HTTP_RETRIES", "2"))
+BREAKER_FAILURES = int(os.getenv("JUCE_RAG_BREAKER_FAILURES", "5"))
+BREAKER_RESET_S = float(os.getenv("JUCE_RAG_BREAKER_RESET_S", "30"))
+
+RETRY_STATUS = {502, 503, 504}
+
+
+class RagClientError(RuntimeError):
+    pass
+
+
+class RagUnavailable(RagClientError):
+    """Server unreachable, circuit open, or the deadline ran out."""
+
+
+class RagHTTPError(RagClientError):
+    def __init__(self, status: int, body: str):
+        super().__init__(f"RAG server error {status}: {body[:500]}")
+        self.status = status
+        self.body = body
+
+
+class CircuitBreaker:
+    """closed -> open after `failures` consecutive failures -> half-open after `reset_s` (one trial call)."""
+
+    def __init__(self, failures: int = BREAKER_FAILURES, reset_s: float = BREAKER_RESET_S,
+                 clock: Callable[[], float] = time.monotonic):
+        self.failures = failures
+        self.reset_s = reset_s
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._consecutive = 0
+        self._opened_at: Optional[float] = None
+        self._trial = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            return "half-open" if self.clock() - self._opened_at >= self.reset_s else "open"
+
+    def before_call(self) -> bool:
+        """Raises while open; True if this call is the half-open trial."""
+        with self._lock:
+            if self._opened_at is None:
+                return False
+            wait = self.reset_s - (self.clock() - self._opened_at)
+            if wait > 0 or self._trial:
+                raise RagUnavailable(f"RAG server marked down (circuit open, retry in {max(wait, 0):.1f}s)")
+            self._trial = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._consecutive = 0
+            self._opened_at = None
+            self._trial = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._consecutive += 1
+            self._trial = False
+            if self._opened_at is not None or self._consecutive >= self.failures:
+                self._opened_at = self.clock()
+
+    def release_trial(self) -> None:
+        """Frees the half-open trial slot of a call that ended without a verdict (e.g. cancelled)."""
+        with self._lock:
+            self._trial = False
+
+
+class RagHttpClient:
+    def __init__(
+        self,
+        base_url: str = RAG_BASE_URL,
+        deadline_s: float = DEFAULT_DEADLINE_S,
+        retries: int = DEFAULT_RETRIES,
+        backoff_base_s: float = 0.2,
+        backoff_max_s: float = 2.0,
+        pool_size: int = 16,
+    ):
+        self.base_url = base_url.rstrip("/") + "/"
+        self.deadline_s = deadline_s
+        self.retries = retries
+        self.backoff_base_s = backoff_base_s
+        self.backoff_max_s = backoff_max_s
+        self.pool_size = pool_size
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+        # One httpx client per event loop; a client dies with its loop
+        self._async: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any]" = weakref.WeakKeyDictionary()
+
+    # =====================
+    # HELPERS
+    # =====================
+
+    def url(self, path_or_url: str) -> str:
+        return urljoin(self.base_url, path_or_url.lstrip("/")) if "://" not in path_or_url else path_or_url
+
+    def breaker(self, url: str) -> CircuitBreaker:
+        host = urlsplit(url).netloc
+        with self._lock:
+            if host not in self._breakers:
+                self._breakers[host] = CircuitBreaker()
+            return self._breakers[host]
+
+    def _backoff(self, attempt: int, remaining: float) -> float:
+        return min(random.uniform(0, min(self.backoff_max_s, self.backoff_base_s * (2 ** attempt))), max(remaining, 0))
+
+    # =====================
+    # SYNC
+    # =====================
+
+    def _send(self, url: str, payload: Any, deadline: Optional[float], stream: bool) -> requests.Response:
+        """POST with retries; returns a 2xx response (streaming responses still open)."""
+        breaker = self.breaker(url)
+        breaker.before_call()
+        # Every exit records a verdict, so a half-open trial can never stay claimed
+        try:
+            return self._attempts(url, payload, deadline, stream, breaker)
+        except RagClientError:
+            raise
+        except requests.RequestException as e:
+            breaker.record_failure()
+            raise RagUnavailable(f"RAG server unavailable at {url} ({type(e).__name__}: {e})") from e
+        except BaseException:
+            breaker.record_failure()
+            raise
+
+    def _attempts(self, url: str, payload: Any, deadline: Optional[float], stream: bool,
+                  breaker: CircuitBreaker) -> requests.Response:
+        end = time.monotonic() + (self.deadline_s if deadline is None else deadline)
+        last_error = ""
+        for attempt in range(self.retries + 1):
+            remaining = end - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                resp = self.session.post(url, json=payload, timeout=remaining, stream=stream)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                last_error = f"{type(e).__name__}: {e}"
+            else:
+                if resp.status_code < 400:
+                    breaker.record_success()
+                    return resp
+                if resp.status_code not in RETRY_STATUS:
+                    # The server answered: it is up, the request was bad
+                    breaker.record_success()
+                    error = RagHTTPError(resp.status_code, resp.text)
+                    resp.close()
+                    raise error
+                last_error = f"HTTP {resp.status_code}"
+                resp.close()
+            if attempt < self.retries:
+                time.sleep(self._backoff(attempt, end - time.monotonic()))
+
+        breaker.record_failure()
+        raise RagUnavailable(f"RAG server unavailable at {url} ({last_error or 'deadline exceeded'})")
+
+    def post_json(self, path_or_url: str, payload: Any, deadline: Optional[float] = None) -> Any:
+        url = self.url(path_or_url)
+        resp = self._send(url, payload, deadline, stream=False)
+        try:
+            return resp.json()
+        except ValueError as e:
+            raise RagUnavailable(f"RAG server at {url} returned invalid JSON ({e})") from e
+
+    def stream_lines(self, path_or_url: str, payload: Any, deadline: Optional[float] = None) -> Iterator[bytes]:
+        """
+        Non-empty response lines as they arrive. Retries only happen before
+        the response starts; the deadline also bounds the streaming itself.
+        """
+        url = self.url(path_or_url)
+        end = time.monotonic() + (self.deadline_s if deadline is None else deadline)
+        with self._send(url, payload, deadline, stream=True) as resp:
+            try:
+                for line in resp.iter_lines():
+                    if time.monotonic() > end:
+                        raise RagUnavailable("RAG stream exceeded its deadline")
+                    if line:
+                        yield line
+            except requests.RequestException as e:
+                raise RagUnavailable(f"RAG stream from {url} failed ({type(e).__name__}: {e})") from e
+
+    def close(self) -> None:
+        self.session.close()
+
+    # =====================
+    # ASYNC
+    # =====================
+
+    def _async_client(self):
+        loop = asyncio.get_running_loop()
+        client = self._async.get(loop)
+        if client is None:
+            limits = httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size)
+            client = self._async[loop] = httpx.AsyncClient(limits=limits)
+        return client
+
+    async def apost_json(self, path_or_url: str, payload: Any, deadline: Optional[float] = None) -> Any:
+        if httpx is None:
+            # No httpx: run the pooled sync client in a worker thread
+            return await asyncio.to_thread(self.post_json, path_or_url, payload, deadline)
+
+        url = self.url(path_or_url)
+        breaker = self.breaker(url)
+        breaker.before_call()
+        try:
+            return await self._aattempts(url, payload, deadline, breaker)
+        except RagClientError:
+            raise
+        except (httpx.HTTPError, ValueError) as e:
+            breaker.record_failure()
+            raise RagUnavailable(f"RAG server unavailable at {url} ({type(e).__name__}: {e})") from e
+        except asyncio.CancelledError:
+            breaker.release_trial()
+            raise
+        except BaseException:
+            breaker.record_failure()
+            raise
+
+    async def _aattempts(self, url: str, payload: Any, deadline: Optional[float], breaker: CircuitBreaker) -> Any:
+        client = self._async_client()
+        end = time.monotonic() + (self.deadline_s if deadline is None else deadline)
+        last_error = ""
+        for attempt in range(self.retries + 1):
+            remaining = end - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                resp = await client.post(url, json=payload, timeout=remaining)
+            except httpx.TransportError as e:
+                last_error = f"{type(e).__name__}: {e}"
+            else:
+                if resp.status_code < 400:
+                    data = resp.json()
+                    breaker.record_success()
+                    return data
+                if resp.status_code not in RETRY_STATUS:
+                    breaker.record_success()
+                    raise RagHTTPError(resp.status_code, resp.text)
+                last_error = f"HTTP {resp.status_code}"
+            if attempt < self.retries:
+                await asyncio.sleep(self._backoff(attempt, end - time.monotonic()))
+
+        breaker.record_failure()
+        raise RagUnavailable(f"RAG server unavailable at {url} ({last_error or 'deadline exceeded'})")
+
+    async def aiter_json_lines(self, path_or_url: str, payload: Any,
+                               deadline: Optional[float] = None) -> AsyncIterator[Any]:
+        """Async NDJSON stream (no retries once the response has started)."""
+        if httpx is None:
+            for line in await asyncio.to_thread(lambda: list(self.stream_lines(path_or_url, payload, deadline))):
+                yield json.loads(line)
+            return
+
+        url = self.url(path_or_url)
+        breaker = self.breaker(url)
+        trial = breaker.before_call()
+        end = time.monotonic() + (self.deadline_s if deadline is None else deadline)
+        try:
+            async with self._async_client().stream(
+                "POST", url, json=payload, timeout=self.deadline_s if deadline is None else deadline
+            ) as resp:
+                if resp.status_code >= 400:
+                    body = (await resp.aread()).decode("utf-8", errors="replace")
+                    if resp.status_code in RETRY_STATUS:
+                        breaker.record_failure()
+                        raise RagUnavailable(f"RAG server unavailable at {url} (HTTP {resp.status_code})")
+                    breaker.record_success()
+                    raise RagHTTPError(resp.status_code, body)
+                breaker.record_success()
+                async for line in resp.aiter_lines():
+                    if time.monotonic() > end:
+                        raise RagUnavailable("RAG stream exceeded its deadline")
+                    if line.strip():
+                        yield json.loads(line)
+        except RagClientError:
+            raise
+        except (httpx.HTTPError, ValueError) as e:
+            breaker.record_failure()
+            raise RagUnavailable(f"RAG server unavailable at {url} ({type(e).__name__}: {e})") from e
+        finally:
+            # No-op once a verdict was recorded; frees the trial if the caller stopped early or was cancelled
+            if trial:
+                breaker.release_trial()
+
+    async def aclose(self) -> None:
+        """Closes the client of the running loop."""
+        client = self._async.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+
+_default: Optional[RagHttpClient] = None
+_default_lock = threading.Lock()
+
+
+def default_client() -> RagHttpClient:
+    """The process-wide client (one pool, one set of breakers) shared by all call sites."""
+    global _default
+    if _default is None:
+        with _default_lock:
+            if _default is None:
+                _default = RagHttpClient()
+    return _default
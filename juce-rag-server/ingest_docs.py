@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+"""
+Populates the JUCE RAG collection from the JUCE module headers.
+
+    python ingest_docs.py --modules ~/JUCE/modules                 # Chroma (CHROMA_HOST)
+    python ingest_docs.py --modules ~/JUCE/modules --local-dir store  # local store (JUCE_RAG_LOCAL_DIR)
+
+Headers are chunked at declaration boundaries (chunker.py). Every chunk gets
+a stable id derived from its file and text, so a rerun can diff against the
+ids already in the target: only new chunks are embedded and upserted, and
+chunks that disappeared are deleted. Embeddings are looked up in an on-disk
+cache keyed by model and chunk content hash (embedding_cache.py) first. The
+misses are embedded in large batches, sorted by length so each batch pads
+little. After a JUCE point release, a rerun costs roughly the changed chunks.
+
+The embedding function is pluggable: `ingest(embed=...)`, or
+`--embedder module:function` naming a function that maps a list of texts to
+an (n, dim) float array. The default is embeddings.get_embedder()
+(JUCE_RAG_EMBED_MODEL, or JUCE_RAG_EMBEDDER). The embedder name and vector
+size are recorded in the collection metadata (or the local store's
+store.json). server.py then embeds queries with the same embedder and
+refuses to query a store built with another one. Ingest likewise refuses to
+add vectors to a store built with a different embedder.
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import os
+import sys
+import time
+from typing import Any, Callable, Dict, Iterable, Optional, Sequence, Set
+
+import numpy as np
+from dotenv import load_dotenv
+
+from chunker import CHUNK_TOKENS, MIN_CHUNK_TOKENS, Chunk, chunk_file
+from embedding_cache import EMBED_CACHE_PATH, EmbeddingCache
+from embeddings import (
+    DIM_KEY, MODEL_KEY, EmbedderMismatch, EmbedFn, check_embedder, embedder_name, get_embedder, load_embedder,
+    normalize_rows,
+)
+from local_store import INFO_FILE, VERSION_KEY, LocalVectorStore, publish_store, store_exists
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(_HERE, "..", "tools", "mcp", "common"))
+# Appended, not prepended: juce_api_server/server.py must not shadow server.py here
+sys.path.append(os.path.join(_HERE, "..", "juce_api_server"))
+from fs_scan import scan  # noqa: E402
+from ingest_juce import IGNORE_DIRS, JUCE_MODULES_PATH, get_module_name  # noqa: E402
+
+load_dotenv()
+
+EMBED_BATCH = int(os.getenv("JUCE_RAG_EMBED_BATCH", "64"))
+UPSERT_BATCH = 512
+GET_PAGE = 10000
+
+Record = Dict[str, Any]
+
+
+# =====================
+# CHUNKS
+# =====================
+
+def chunk_id(chunk: Chunk) -> str:
+    return hashlib.sha256(f"{chunk.source}\0{chunk.text}".encode("utf-8")).hexdigest()[:32]
+
+
+def content_version(ids: Iterable[str]) -> str:
+    """Stored as VERSION_KEY; chunk ids hash file and text, so this changes with any chunk."""
+    return hashlib.sha256("\n".join(sorted(ids)).encode("utf-8")).hexdigest()[:16]
+
+
+def collect_records(modules_path: str, max_tokens: int = CHUNK_TOKENS,
+                    min_tokens: int = MIN_CHUNK_TOKENS) -> Dict[str, Record]:
+    """{chunk id: record} for every header under modules_path, in file order."""
+    records: Dict[str, Record] = {}
+    for entry in sorted(scan(modules_path, suffixes=(".h",), ignore_dirs=IGNORE_DIRS), key=lambda e: e.rel_path):
+        for chunk in chunk_file(entry.path, entry.rel_path, max_tokens, min_tokens):
+            cid = base = chunk_id(chunk)
+            n = 1
+            while cid in records:  # identical text twice in one header
+                cid, n = f"{base}-{n}", n + 1
+            records[cid] = {
+                "id": cid,
+                "source": chunk.source,
+                "content": chunk.text,
+                "module": get_module_name(chunk.source),
+                "symbol": chunk.symbol,
+                "start_line": chunk.start_line,
+                "end_line": chunk.end_line,
+                "content_hash": chunk.content_hash,
+            }
+    return records
+
+
+# =====================
+# EMBEDDING
+# =====================
+
+def embed_missing(texts: Dict[str, str], cache: Optional[EmbeddingCache], get_embed: Callable[[], EmbedFn],
+                  batch_size: int = EMBED_BATCH, log: Callable[[str], None] = print) -> Dict[str, np.ndarray]:
+    """
+    {content hash: vector} for `texts` ({content hash: text}): cache hits
+    first, then the rest in batches (stored as each batch finishes, so an
+    interrupted run keeps its progress). `get_embed` is only called if
+    something has to be embedded.
+    """
+    vectors = cache.get_many(list(texts)) if cache is not None else {}
+    missing = sorted((h for h in texts if h not in vectors), key=lambda h: len(texts[h]))
+    if not missing:
+        return vectors
+
+    embed = get_embed()
+    t0 = time.perf_counter()
+    batch_size = max(1, int(batch_size))
+    for start in range(0, len(missing), batch_size):
+        batch = missing[start:start + batch_size]
+        mat = normalize_rows(embed([texts[h] for h in batch]))
+        if mat.shape[0] != len(batch):
+            raise ValueError(f"embedder returned {mat.shape[0]} vectors for {len(batch)} texts")
+        fresh = list(zip(batch, mat))
+        vectors.update(fresh)
+        if cache is not None:
+            cache.put_many(fresh)
+        done = start + len(batch)
+        if done == len(missing) or (start // batch_size) % 20 == 19:
+            rate = done / max(time.perf_counter() - t0, 1e-9)
+            log(f"  embedded {done}/{len(missing)} chunks ({rate:.0f}/s)")
+    return vectors
+
+
+def _dim(vectors: Dict[str, np.ndarray]) -> Optional[int]:
+    return int(next(iter(vectors.values())).shape[-1]) if vectors else None
+
+
+def _check_dim(meta: Dict[str, Any], dim: Optional[int], where: str) -> None:
+    recorded = meta.get(DIM_KEY)
+    if dim is not None and recorded and int(recorded) != dim:
+        raise EmbedderMismatch(f"{where} holds {recorded}-dim vectors; this embedder produces {dim}")
+
+
+# =====================
+# TARGETS
+# =====================
+
+class ChromaTarget:
+    """Upserts new chunks and deletes stale ones in place; unchanged chunks are not touched."""
+
+    needs_all_vectors = False
+
+    def __init__(self, collection: Any, model: str):
+        self.collection = collection
+        self.model = model
+
+    def _meta(self) -> Dict[str, Any]:
+        return dict(getattr(self.collection, "metadata", None) or {})
+
+    def check(self, existing: Set[str]) -> None:
+        where = f"collection {self.collection.name!r}"
+        meta = self._meta()
+        check_embedder(meta, where, self.model)
+        if existing and not meta.get(MODEL_KEY):
+            raise EmbedderMismatch(
+                f"{where} already holds {len(existing)} chunks that were not written by ingest_docs.py "
+                "(embedded by Chroma's own embedding function); ingest into a new --collection"
+            )
+
+    def existing_ids(self) -> Set[str]:
+        ids: Set[str] = set()
+        offset = 0
+        while True:
+            page = self.collection.get(include=[], limit=GET_PAGE, offset=offset)
+            got = page.get("ids") or []
+            ids.update(got)
+            if len(got) < GET_PAGE:
+                return ids
+            offset += len(got)
+
+    def stored_vectors(self, ids: Iterable[str]) -> Dict[str, np.ndarray]:
+        return {}
+
+    def write(self, records: Dict[str, Record], vectors: Dict[str, np.ndarray],
+              new_ids: Sequence[str], stale_ids: Sequence[str]) -> None:
+        meta = self._meta()
+        dim = _dim({i: vectors[records[i]["content_hash"]] for i in new_ids[:1]})
+        _check_dim(meta, dim, f"collection {self.collection.name!r}")
+        for start in range(0, len(new_ids), UPSERT_BATCH):
+            batch = new_ids[start:start + UPSERT_BATCH]
+            self.collection.upsert(
+                ids=list(batch),
+                embeddings=[vectors[records[i]["content_hash"]].tolist() for i in batch],
+                documents=[records[i]["content"] for i in batch],
+                metadatas=[{k: v for k, v in records[i].items() if k not in ("id", "content")} for i in batch],
+            )
+        stale_ids = list(stale_ids)
+        for start in range(0, len(stale_ids), UPSERT_BATCH):
+            self.collection.delete(ids=stale_ids[start:start + UPSERT_BATCH])
+        # Chroma rejects changes to the hnsw:* settings, so those are not sent back
+        meta = {k: v for k, v in meta.items() if not k.startswith("hnsw:")}
+        meta[MODEL_KEY] = self.model
+        meta[VERSION_KEY] = content_version(records)
+        if dim is not None:
+            meta[DIM_KEY] = dim
+        self.collection.modify(metadata=meta)
+
+
+class LocalTarget:
+    """
+    A local_store directory. The matrix is rewritten as a whole, but vectors of
+    unchanged chunks come from the existing store (or the cache), never the
+    embedder. Each write is a new version published with publish_store(), so
+    a running server keeps its mmap of the old files until it sees the new
+    content version and reopens the store, and never opens a half-written one.
+    """
+
+    needs_all_vectors = True
+
+    def __init__(self, directory: str, model: str):
+        self.directory = directory
+        self.model = model
+        self._rows: Dict[str, int] = {}
+        self._store: Optional[LocalVectorStore] = None
+        if store_exists(directory):
+            self._store = LocalVectorStore(directory)
+            for row in range(len(self._store)):
+                cid = self._store.record(row).get("id")
+                if cid:
+                    self._rows[cid] = row
+
+    def existing_ids(self) -> Set[str]:
+        return set(self._rows)
+
+    def check(self, existing: Set[str]) -> None:
+        where = f"local store {self.directory}"
+        info = self._store.info if self._store is not None else {}
+        check_embedder(info, where, self.model)
+        if existing and not info.get(MODEL_KEY):
+            raise EmbedderMismatch(f"{where} has no {INFO_FILE} recording its embedder; write a new --local-dir")
+
+    def stored_vectors(self, ids: Iterable[str]) -> Dict[str, np.ndarray]:
+        if self._store is None:
+            return {}
+        return {i: np.array(self._store.embeddings[self._rows[i]]) for i in ids if i in self._rows}
+
+    def write(self, records: Dict[str, Record], vectors: Dict[str, np.ndarray],
+              new_ids: Sequence[str], stale_ids: Sequence[str]) -> None:
+        ids = list(records)
+        mat = np.stack([vectors[records[i]["content_hash"]] for i in ids]) if ids else np.zeros((0, 0), np.float32)
+        info = {MODEL_KEY: self.model, VERSION_KEY: content_version(ids)}
+        if ids:
+            info[DIM_KEY] = int(mat.shape[1])
+        publish_store(self.directory, mat, (records[i] for i in ids), info)
+        self.close()
+
+    def close(self) -> None:
+        if self._store is not None:
+            self._store.close()
+            self._store = None
+
+
+def chroma_target(collection_name: str, model: str) -> ChromaTarget:
+    host = os.getenv("CHROMA_HOST", "").strip()
+    if not host:
+        raise SystemExit("CHROMA_HOST is not set; use --local-dir for a local store.")
+    import chromadb  # type: ignore
+
+    client = chromadb.HttpClient(host=host)  # same connection as server._chroma_client
+    return ChromaTarget(client.get_or_create_collection(collection_name), model)
+
+
+# =====================
+# PIPELINE
+# =====================
+
+def ingest(
+    modules_path: str,
+    target: Any,
+    embed: Optional[EmbedFn] = None,
+    cache: Optional[EmbeddingCache] = None,
+    batch_size: int = EMBED_BATCH,
+    max_tokens: int = CHUNK_TOKENS,
+    dry_run: bool = False,
+    prune_cache: bool = False,
+    log: Callable[[str], None] = print,
+) -> Dict[str, Any]:
+    t0 = time.perf_counter()
+    log(f"Chunking headers in {modules_path}...")
+    records = collect_records(modules_path, max_tokens)
+    existing = target.existing_ids()
+    target.check(existing)
+    new_ids = [i for i in records if i not in existing]
+    stale_ids = sorted(existing - records.keys())
+    log(f"  {len(records)} chunks: {len(new_ids)} new, {len(records) - len(new_ids)} unchanged, "
+        f"{len(stale_ids)} to delete ({time.perf_counter() - t0:.2f}s)")
+
+    need = list(records) if target.needs_all_vectors else new_ids
+    stored = target.stored_vectors(i for i in need if i in existing)
+    vectors: Dict[str, np.ndarray] = {records[i]["content_hash"]: v for i, v in stored.items()}
+    texts = {records[i]["content_hash"]: records[i]["content"] for i in need}
+    texts = {h: t for h, t in texts.items() if h not in vectors}
+
+    stats = {"chunks": len(records), "new": len(new_ids), "deleted": len(stale_ids), "embedded": 0}
+    if dry_run:
+        cached = cache.get_many(list(texts)) if cache is not None else {}
+        stats["embedded"] = len(texts) - len(cached)
+        log(f"Dry run: would embed {stats['embedded']} chunks and upsert {len(new_ids)}.")
+        return stats
+
+    before = cache.misses if cache is not None else 0
+    vectors.update(embed_missing(texts, cache, lambda: embed or get_embedder(), batch_size, log))
+    stats["embedded"] = (cache.misses - before) if cache is not None else len(texts)
+
+    target.write(records, vectors, new_ids, stale_ids)
+    if prune_cache and cache is not None:
+        stats["pruned"] = cache.prune(r["content_hash"] for r in records.values())
+
+    log(f"Success. {len(records)} chunks ({len(new_ids)} upserted, {len(stale_ids)} deleted, "
+        f"{stats['embedded']} embedded, {len(texts) - stats['embedded']} from cache) "
+        f"in {time.perf_counter() - t0:.2f}s")
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Chunk, embed and upsert JUCE headers into the RAG collection")
+    parser.add_argument("--modules", default=JUCE_MODULES_PATH, help="JUCE modules directory")
+    parser.add_argument("--local-dir", default=None, help="write a local store here instead of Chroma")
+    parser.add_argument("--collection", default=os.getenv("JUCE_RAG_COLLECTION", "juce_docs").strip())
+    parser.add_argument("--embedder", default=None, help="module:function to embed with (default: embeddings.py)")
+    parser.add_argument("--model", default=None,
+                        help="name recorded for the embedder and used as its cache key (default: --embedder, "
+                             "else JUCE_RAG_EMBEDDER / JUCE_RAG_EMBED_MODEL)")
+    parser.add_argument("--batch-size", type=int, default=EMBED_BATCH, help="texts per embedding call")
+    parser.add_argument("--max-tokens", type=int, default=CHUNK_TOKENS, help="chunk size budget")
+    parser.add_argument("--cache", default=EMBED_CACHE_PATH, help="embedding cache file")
+    parser.add_argument("--no-cache", action="store_true", help="embed everything that is not in the target")
+    parser.add_argument("--prune-cache", action="store_true", help="drop cached vectors no chunk uses any more")
+    parser.add_argument("--dry-run", action="store_true", help="report what would change, write nothing")
+    args = parser.parse_args()
+
+    embed_fn = load_embedder(args.embedder) if args.embedder else None
+    model = args.model or args.embedder or embedder_name()
+    target = LocalTarget(args.local_dir, model) if args.local_dir else chroma_target(args.collection, model)
+    cache = None if args.no_cache else EmbeddingCache(model, args.cache)
+    try:
+        ingest(os.path.expanduser(args.modules), target, embed_fn, cache, args.batch_size,
+               args.max_tokens, args.dry_run, args.prune_cache)
+    except EmbedderMismatch as e:
+        raise SystemExit(f"Error: {e}")
+    finally:
+        if cache is not None:
+            cache.close()
+        if isinstance(target, LocalTarget):
+            target.close()
@@ -0,0 +1,218 @@
+"""
+In-process vector store for JUCE_RAG_LOCAL_DIR mode.
+
+Layout of the store directory:
+    embeddings.npy          float32 (n, dim), rows L2-normalized, opened with mmap
+    metadata.jsonl          one JSON record per row: {"source": ..., "content": ...}
+    metadata.offsets.npy    uint64 (n + 1,) byte offsets of each line in metadata.jsonl
+    store.json              optional: embedder name and dimension (see embeddings.MODEL_KEY),
+                            and the content version ingest_docs.py wrote (VERSION_KEY)
+
+publish_store() (used by ingest_docs.py) puts the three data files in a fresh
+v-* subdirectory and then replaces store.json, whose DATA_DIR_KEY names it, in
+one os.replace. A reader opening the store mid-update sees either the old
+version or the new one, never a mix of files from both.
+
+Search is exact: one matrix product over the mmapped matrix (for any number
+of queries), then argpartition for each top-k. Metadata is only decoded for the rows returned.
+"""
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from embeddings import normalize_rows
+
+EMBEDDINGS_FILE = "embeddings.npy"
+METADATA_FILE = "metadata.jsonl"
+OFFSETS_FILE = "metadata.offsets.npy"
+INFO_FILE = "store.json"
+# Hash of the chunk ids a store (or Chroma collection, in its metadata) holds;
+# changes whenever ingest_docs.py adds, edits or removes a chunk
+VERSION_KEY = "content_version"
+# store.json key naming the subdirectory that holds the data files; without
+# it they sit next to store.json
+DATA_DIR_KEY = "data_dir"
+DATA_DIR_PREFIX = "v-"
+
+Hit = Tuple[int, float]
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k largest scores, best first."""
+    n = scores.shape[0]
+    if k >= n:
+        return np.argsort(-scores)
+    part = np.argpartition(-scores, k - 1)[:k]
+    return part[np.argsort(-scores[part])]
+
+
+class LocalVectorStore:
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+        # Read the pointer once: every file below comes from the same version
+        self.info = read_info(self.directory)
+        self.data_dir = data_dir(self.directory, self.info)
+        emb_path = self.data_dir / EMBEDDINGS_FILE
+        meta_path = self.data_dir / METADATA_FILE
+        if not emb_path.exists() or not meta_path.exists():
+            raise FileNotFoundError(
+                f"Local RAG store incomplete in {self.data_dir} "
+                f"(need {EMBEDDINGS_FILE} and {METADATA_FILE})"
+            )
+
+        self.embeddings = np.load(emb_path, mmap_mode="r")
+        if self.embeddings.ndim != 2:
+            raise ValueError(f"{emb_path} must be a 2-D matrix")
+
+        self._meta_file = open(meta_path, "rb")
+        size = os.fstat(self._meta_file.fileno()).st_size
+        self._meta = (
+            mmap.mmap(self._meta_file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        )
+
+        offsets_path = self.data_dir / OFFSETS_FILE
+        if offsets_path.exists():
+            self.offsets = np.load(offsets_path, mmap_mode="r")
+        else:
+            self.offsets = _line_offsets(self._meta)
+
+        if self.offsets.shape[0] - 1 != self.embeddings.shape[0]:
+            raise ValueError(
+                f"Local RAG store mismatch: {self.embeddings.shape[0]} embeddings, "
+                f"{self.offsets.shape[0] - 1} metadata records"
+            )
+
+    def __len__(self) -> int:
+        return int(self.embeddings.shape[0])
+
+    @property
+    def version(self) -> Optional[str]:
+        return self.info.get(VERSION_KEY)
+
+    @property
+    def dim(self) -> int:
+        return int(self.embeddings.shape[1])
+
+    def close(self) -> None:
+        if isinstance(self._meta, mmap.mmap):
+            self._meta.close()
+        self._meta_file.close()
+
+    def record(self, row: int) -> Dict[str, Any]:
+        start, end = int(self.offsets[row]), int(self.offsets[row + 1])
+        return json.loads(self._meta[start:end])
+
+    def search(self, query_vec: np.ndarray, k: int) -> List[Hit]:
+        """Exact cosine top-k for one query vector. Returns [(row, score), ...]."""
+        return self.search_batch(query_vec, k)[0]
+
+    def search_batch(self, query_mat: np.ndarray, k: int) -> List[List[Hit]]:
+        """Exact top-k for several queries with a single matrix multiply."""
+        qs = normalize_rows(query_mat)
+        if len(self) == 0:
+            return [[] for _ in range(qs.shape[0])]
+        scores = qs @ self.embeddings.T
+        out: List[List[Hit]] = []
+        for row_scores in scores:
+            idx = top_k_indices(row_scores, k)
+            out.append([(int(i), float(row_scores[i])) for i in idx])
+        return out
+
+
+def _line_offsets(buf) -> np.ndarray:
+    offsets = [0]
+    pos = 0
+    n = len(buf)
+    while pos < n:
+        nl = buf.find(b"\n", pos)
+        pos = n if nl == -1 else nl + 1
+        offsets.append(pos)
+    return np.asarray(offsets, dtype=np.uint64)
+
+
+def read_info(directory: str) -> Dict[str, Any]:
+    try:
+        with open(Path(directory) / INFO_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def data_dir(directory: str, info: Optional[Dict[str, Any]] = None) -> Path:
+    """The directory holding the data files of the store's current version."""
+    info = read_info(directory) if info is None else info
+    sub = info.get(DATA_DIR_KEY)
+    return Path(directory) / sub if sub else Path(directory)
+
+
+def store_exists(directory: str) -> bool:
+    return (data_dir(directory) / EMBEDDINGS_FILE).exists()
+
+
+def write_store(directory: str, embeddings: np.ndarray, records: Iterable[Dict[str, Any]],
+                info: Optional[Dict[str, Any]] = None) -> int:
+    """
+    Writes a store readable by LocalVectorStore. Embeddings are normalized here.
+    `info` (e.g. the embedder name) goes to store.json. Returns the number of rows written.
+    """
+    out = Path(directory)
+    out.mkdir(parents=True, exist_ok=True)
+
+    mat = normalize_rows(embeddings) if len(embeddings) else np.zeros((0, 0), dtype=np.float32)
+
+    offsets = [0]
+    with open(out / METADATA_FILE, "wb") as f:
+        for rec in records:
+            line = json.dumps(rec, ensure_ascii=False).encode("utf-8") + b"\n"
+            f.write(line)
+            offsets.append(offsets[-1] + len(line))
+
+    if len(offsets) - 1 != mat.shape[0]:
+        raise ValueError(f"{mat.shape[0]} embeddings but {len(offsets) - 1} records")
+
+    np.save(out / EMBEDDINGS_FILE, mat)
+    np.save(out / OFFSETS_FILE, np.asarray(offsets, dtype=np.uint64))
+    if info is not None:
+        with open(out / INFO_FILE, "w", encoding="utf-8") as f:
+            json.dump(info, f, indent=2)
+    return mat.shape[0]
+
+
+def publish_store(directory: str, embeddings: np.ndarray, records: Iterable[Dict[str, Any]],
+                  info: Dict[str, Any]) -> int:
+    """
+    Writes a new version of the store at `directory` next to the current one
+    and switches store.json to it atomically. The version store.json pointed
+    at until now is kept, for readers that read the old pointer just before
+    the switch; older versions (and the files of a flat, unversioned store)
+    are removed. Returns the number of rows written.
+    """
+    root = Path(directory)
+    root.mkdir(parents=True, exist_ok=True)
+    previous = read_info(root).get(DATA_DIR_KEY)
+    sub = Path(tempfile.mkdtemp(prefix=DATA_DIR_PREFIX, dir=root))
+    try:
+        n = write_store(str(sub), embeddings, records)
+        tmp = root / f"{INFO_FILE}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({**info, DATA_DIR_KEY: sub.name}, f, indent=2)
+        os.replace(tmp, root / INFO_FILE)
+    except BaseException:
+        shutil.rmtree(sub, ignore_errors=True)
+        raise
+
+    for old in root.glob(f"{DATA_DIR_PREFIX}*"):
+        if old.is_dir() and old.name not in (sub.name, previous):
+            shutil.rmtree(old, ignore_errors=True)
+    if previous:
+        for name in (EMBEDDINGS_FILE, METADATA_FILE, OFFSETS_FILE):
+            (root / name).unlink(missing_ok=True)
+    return n
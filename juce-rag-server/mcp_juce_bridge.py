@@ -1,13 +1,17 @@
 from mcp.server.fastmcp import FastMCP
-import requests
 import os
+import sys
+
+from http_client import RAG_BASE_URL, RagHTTPError, RagUnavailable, default_client
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tools", "mcp", "common"))
+from metrics import instrument_server  # noqa: E402
+from profiling import profile_server  # noqa: E402
 
 mcp = FastMCP("JUCE RAG")
 
-RAG_SERVER_URL = os.getenv(
-    "JUCE_RAG_URL",
-    "http://127.0.0.1:8000/search"
-)
+# Same default host as every other client, so they share one pool and one breaker
+RAG_SERVER_URL = os.getenv("JUCE_RAG_URL", RAG_BASE_URL.rstrip("/") + "/search")
 
 
 @mcp.tool()
@@ -16,11 +20,7 @@ def search_juce_docs(query: str, k: int = 5) -> str:
     Semantic search over JUCE docs via the local HTTP RAG server.
     """
     try:
-        resp = requests.post(RAG_SERVER_URL, json={"query": query, "k": k}, timeout=15)
-        if resp.status_code != 200:
-            return f"RAG server error {resp.status_code}: {resp.text}"
-
-        data = resp.json()
+        data = default_client().post_json(RAG_SERVER_URL, {"query": query, "k": k})
         results = data.get("results", [])
         if not results:
             return "No relevant documentation found."
@@ -33,11 +33,15 @@ def search_juce_docs(query: str, k: int = 5) -> str:
                 out.append(f"--- SOURCE: {source} ---\n{content}")
 
         return "\n\n".join(out) if out else "No relevant documentation found."
-    except requests.exceptions.ConnectionError:
-        return "Error: cannot connect to RAG HTTP server. Start: juce-rag-server/server.py"
+    except RagHTTPError as e:
+        return str(e)
+    except RagUnavailable as e:
+        return f"Error: cannot connect to RAG HTTP server ({e}). Start: juce-rag-server/server.py"
     except Exception as e:
         return f"Error searching docs: {e}"
 
 
 if __name__ == "__main__":
+    profile_server(mcp)
+    instrument_server(mcp, "JUCE RAG")
     mcp.run()
\ No newline at end of file
@@ -0,0 +1,144 @@
+"""
+Bounded /search result cache for the RAG server.
+
+Entries are keyed on (normalized query, k, collection), evicted LRU once the
+cache is full and expired after a TTL. The whole cache is dropped when the
+collection version (whatever the caller reports, e.g. its document count)
+changes; the version is polled at most once per `version_check_interval`,
+by one thread at a time. Every clear bumps `generation`: a miss fetched
+before a clear passes the generation it looked up under to `put`, which
+drops it instead of caching stale results under the new version.
+"""
+from __future__ import annotations
+
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+_WS = re.compile(r"\s+")
+
+CacheKey = Tuple[str, int, str]
+
+
+def normalize_query(query: str) -> str:
+    return _WS.sub(" ", (query or "").strip()).casefold()
+
+
+class QueryCache:
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl_seconds: float = 600.0,
+        version_check_interval: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_entries = max(0, int(max_entries))
+        self.ttl_seconds = float(ttl_seconds)
+        self.version_check_interval = float(version_check_interval)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._version_lock = threading.Lock()
+        self._entries: "OrderedDict[CacheKey, Tuple[float, Any]]" = OrderedDict()
+        self._version: Optional[Hashable] = None
+        self._last_version_check = float("-inf")
+        self.generation = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    @staticmethod
+    def key(query: str, k: int, collection: str) -> CacheKey:
+        return (normalize_query(query), int(k), collection)
+
+    def get(self, key: CacheKey) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        now = self._clock()
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            stored_at, value = item
+            if now - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: CacheKey, value: Any, generation: Optional[int] = None) -> None:
+        """Stores value; skipped if `generation` (read before the lookup) is no longer current."""
+        if not self.enabled:
+            return
+        now = self._clock()
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._entries[key] = (now, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self.generation += 1
+
+    def check_version(self, version_fn: Callable[[], Optional[Hashable]]) -> None:
+        """
+        Polls version_fn (rate-limited) and clears the cache if it changed.
+        A version_fn returning None means "unknown" and leaves the cache alone.
+        While one thread polls, the others go on with the cache as it is.
+        """
+        if not self.enabled:
+            return
+        if not self._version_lock.acquire(blocking=False):
+            return
+        try:
+            now = self._clock()
+            if now - self._last_version_check < self.version_check_interval:
+                return
+            self._last_version_check = now
+
+            version = version_fn()
+            if version is None:
+                return
+            with self._lock:
+                changed = self._version is not None and version != self._version
+                self._version = version
+            if changed:
+                self.clear()
+        finally:
+            self._version_lock.release()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            size = len(self._entries)
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "size": size,
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / lookups) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
@@ -2,37 +2,121 @@
 Lightweight client for the local JUCE RAG server.
 Use from scripts, agents, or Cursor workflows to inject docs into LLM prompts.
 """
-import requests
+import json
+from contextlib import closing
+from typing import AsyncIterator, Iterator, List, Optional
 
+from context_packer import ContextPacker, pack_context
+from http_client import RAG_BASE_URL, default_client
 
-def get_juce_context(query: str, max_results: int = 5) -> str:
+RAG_URL = RAG_BASE_URL
+
+
+def _format_item(item) -> str:
+    source = item.get("source", "Unknown Source")
+    content = item.get("content", "").strip()
+    return f"--- SOURCE: {source} ---\n{content}\n"
+
+
+def _format_results(results) -> str:
+    # Format the results into a clear block for the Agent
+    return "\n".join(_format_item(item) for item in results)
+
+
+def _iter_hits(query: str, max_results: int) -> Iterator[dict]:
+    for line in default_client().stream_lines(f"{RAG_URL}/search/stream", {"query": query, "k": max_results}):
+        item = json.loads(line)
+        if "error" in item:
+            raise RuntimeError(item["error"])
+        yield item
+
+
+async def _aiter_hits(query: str, max_results: int) -> AsyncIterator[dict]:
+    async for item in default_client().aiter_json_lines(f"{RAG_URL}/search/stream", {"query": query, "k": max_results}):
+        if "error" in item:
+            raise RuntimeError(item["error"])
+        yield item
+
+
+def _pack(hits: Iterator[dict], max_tokens: Optional[int]) -> str:
+    # Packs hits as they arrive; the stream is closed as soon as the budget is full
+    with closing(hits):
+        return pack_context(hits, max_tokens, fmt=_format_item, separator="\n").text
+
+
+async def _apack(hits: AsyncIterator[dict], max_tokens: Optional[int]) -> str:
+    packer = ContextPacker(max_tokens, fmt=_format_item, separator="\n")
+    try:
+        async for item in hits:
+            packer.add(item)
+            if packer.full:
+                break
+    finally:
+        await hits.aclose()
+    return packer.result().text
+
+
+def iter_juce_context(query: str, max_results: int = 5) -> Iterator[str]:
+    """
+    Streams formatted context blocks from POST /search/stream (NDJSON),
+    one per hit, as the server produces them. Prompt assembly can start on
+    the first block. Raises RagClientError on connection/HTTP errors and
+    RuntimeError on an error line.
+    """
+    for item in _iter_hits(query, max_results):
+        yield _format_item(item)
+
+
+async def aiter_juce_context(query: str, max_results: int = 5) -> AsyncIterator[str]:
+    """asyncio version of iter_juce_context (same pool, retries and breaker)."""
+    async for item in _aiter_hits(query, max_results):
+        yield _format_item(item)
+
+
+def get_juce_context(query: str, max_results: int = 5, max_tokens: Optional[int] = None) -> str:
     """
     Queries your local RAG server for JUCE documentation.
-    Returns a formatted string ready for an LLM system prompt.
+    Returns a formatted string ready for an LLM system prompt: distinct
+    hits in rank order, within `max_tokens` (default JUCE_RAG_CONTEXT_TOKENS).
+    Hits are packed as they stream in, and reading stops once the budget is full.
     """
     try:
-        response = requests.post(
-            "http://localhost:8000/search",
-            json={"query": query, "k": max_results},
-            timeout=10,
-        )
-        response.raise_for_status()
-        data = response.json()
+        return _pack(_iter_hits(query, max_results), max_tokens)
 
-        # Format the results into a clear block for the Agent
-        context_parts = []
-        for item in data.get("results", []):
-            source = item.get("source", "Unknown Source")
-            content = item.get("content", "").strip()
-            context_parts.append(f"--- SOURCE: {source} ---\n{content}\n")
+    except Exception as e:
+        print(f"RAG Error: {e}")
+        return ""
 
-        return "\n".join(context_parts)
+
+async def aget_juce_context(query: str, max_results: int = 5, max_tokens: Optional[int] = None) -> str:
+    """asyncio version of get_juce_context."""
+    try:
+        return await _apack(_aiter_hits(query, max_results), max_tokens)
 
     except Exception as e:
         print(f"RAG Error: {e}")
         return ""
 
 
+def get_juce_context_batch(queries: List[str], max_results: int = 5) -> List[str]:
+    """
+    Several lookups in one request (POST /search/batch).
+    Returns one formatted context block per query, in order.
+    """
+    if not queries:
+        return []
+    try:
+        data = default_client().post_json(
+            f"{RAG_URL}/search/batch",
+            {"queries": [{"query": q, "k": max_results} for q in queries]},
+        )
+        return [_format_results(hits) for hits in data.get("results", [])]
+
+    except Exception as e:
+        print(f"RAG Error: {e}")
+        return ["" for _ in queries]
+
+
 
 # --- Example Usage ---
 # user_prompt = "Write a C++ class that inherits from AudioProcessor"
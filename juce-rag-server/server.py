@@ -1,14 +1,30 @@
 #!/usr/bin/env python3
 from __future__ import annotations
 
+import itertools
+import json
 import os
-from typing import Any, Dict, List, Optional
+import sys
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
 
 from dotenv import load_dotenv
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
 import uvicorn
 
+from chroma_pool import BackendBusy, ChromaPool
+from query_cache import QueryCache
+from symbol_table import SymbolTable, fuse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tools", "mcp", "common"))
+from metrics import REGISTRY as METRICS  # noqa: E402
+from profiling import PROFILER  # noqa: E402
+
 # Optional: only needed if you actually configure Chroma.
 # pip install chromadb
 try:
@@ -27,11 +43,121 @@ CHROMA_API_KEY = os.getenv("CHROMA_API_KEY", "").strip()
 CHROMA_TENANT = os.getenv("CHROMA_TENANT", "").strip()
 CHROMA_DATABASE = os.getenv("CHROMA_DATABASE", "").strip()
 JUCE_RAG_COLLECTION = os.getenv("JUCE_RAG_COLLECTION", "juce_docs").strip()
+JUCE_RAG_CHROMA_MAX_CONCURRENCY = int(os.getenv("JUCE_RAG_CHROMA_MAX_CONCURRENCY", "8"))
 
-# If you want a local fallback later, define JUCE_RAG_LOCAL_DIR and implement ingestion.
+# Result cache (JUCE_RAG_CACHE_SIZE=0 disables it)
+JUCE_RAG_CACHE_SIZE = int(os.getenv("JUCE_RAG_CACHE_SIZE", "1024"))
+JUCE_RAG_CACHE_TTL_S = float(os.getenv("JUCE_RAG_CACHE_TTL_S", "600"))
+JUCE_RAG_CACHE_VERSION_CHECK_S = float(os.getenv("JUCE_RAG_CACHE_VERSION_CHECK_S", "30"))
+
+# Local in-process backend: a directory written by local_store.write_store().
 JUCE_RAG_LOCAL_DIR = os.getenv("JUCE_RAG_LOCAL_DIR", "").strip()
 
-app = FastAPI(title="JUCE RAG Server", version="1.0")
+# Exact-symbol fast path: the JUCE class table from juce_api_server/ingest_juce.py
+# (JUCE_RAG_SYMBOLS=0 disables it).
+JUCE_RAG_SYMBOLS = os.getenv("JUCE_RAG_SYMBOLS", "1").strip().lower() not in ("0", "false", "no", "off")
+JUCE_RAG_SYMBOLS_PATH = os.getenv("JUCE_RAG_SYMBOLS_PATH", "").strip()
+
+# Loaded at startup when JUCE_RAG_LOCAL_DIR is set; reopened when ingest writes a new version.
+_local_store = None
+_local_checked_at = 0.0
+_local_reload_lock = threading.Lock()
+
+# Loaded once at startup; None when disabled or the table is missing.
+_symbols: Optional[SymbolTable] = None
+
+
+def _load_symbols() -> Optional[SymbolTable]:
+    from symbol_table import default_path
+
+    path = JUCE_RAG_SYMBOLS_PATH or default_path()
+    if not os.path.exists(path):
+        print(f"JUCE symbol table not found at {path}; identifier queries use vector search. "
+              "Run juce_api_server/ingest_juce.py.", flush=True)
+        return None
+    try:
+        table = SymbolTable.load(path)
+    except Exception as e:
+        print(f"Failed to load JUCE symbol table {path}: {e}", flush=True)
+        return None
+    print(f"JUCE symbol table loaded: {len(table)} classes from {path}", flush=True)
+    return table
+
+
+def _warm_embedder() -> None:
+    """Loads the embedder and runs one text through it, so the first /search doesn't pay for the model load."""
+    from embeddings import embed_texts, embedder_name
+
+    t0 = time.perf_counter()
+    embed_texts(["juce::AudioProcessor"])
+    print(f"Embedder ready: {embedder_name()} ({(time.perf_counter() - t0) * 1000:.0f} ms)", flush=True)
+
+
+def _warm_embedder_for_chroma() -> None:
+    """Warms the embedder if the collection was written by ingest_docs.py (queried with our vectors)."""
+    from embeddings import MODEL_KEY, check_embedder
+
+    try:
+        meta = getattr(_chroma_pool.collection(), "metadata", None) or {}
+        if meta.get(MODEL_KEY):
+            check_embedder(meta, f"Chroma collection {JUCE_RAG_COLLECTION!r}")
+            _warm_embedder()
+    except Exception as e:
+        # Chroma may not be up yet; the first query connects (and loads the model) instead
+        print(f"Warning: embedder not warmed: {type(e).__name__}: {e}", flush=True)
+
+
+@asynccontextmanager
+async def _lifespan(_app: FastAPI):
+    global _local_store, _symbols
+    PROFILER.start()
+    if JUCE_RAG_SYMBOLS:
+        _symbols = _load_symbols()
+    if JUCE_RAG_LOCAL_DIR and not CHROMA_HOST:
+        from embeddings import check_embedder
+        from local_store import LocalVectorStore
+
+        _local_store = LocalVectorStore(JUCE_RAG_LOCAL_DIR)
+        check_embedder(_local_store.info, f"Local RAG store {JUCE_RAG_LOCAL_DIR}")
+        print(f"Local RAG store loaded: {len(_local_store)} chunks from {JUCE_RAG_LOCAL_DIR}", flush=True)
+        _warm_embedder()
+    elif CHROMA_HOST:
+        _warm_embedder_for_chroma()
+    yield
+    if _local_store is not None:
+        _local_store.close()
+        _local_store = None
+    _symbols = None
+
+
+app = FastAPI(title="JUCE RAG Server", version="1.0", lifespan=_lifespan)
+
+
+def _profiled(label: str):
+    """Profiles slow calls of an endpoint when MCP_PROFILE=1 / --profile; identity otherwise."""
+    return lambda fn: PROFILER.wrap(fn, label)
+
+
+def _stage(stage: str):
+    """Times one step of a search (connect, query, embed, normalize, cache)."""
+    return METRICS.timer("rag_stage_seconds", "Time per /search stage", stage=stage)
+
+
+@app.middleware("http")
+async def _record_request(request: Request, call_next):
+    # For /search/stream this is the time to the response head; the body is timed by its stages
+    t0 = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        path = request.scope.get("route").path if request.scope.get("route") else "other"
+        METRICS.histogram("rag_request_seconds", "HTTP request latency", endpoint=path).observe(
+            time.perf_counter() - t0
+        )
+        METRICS.counter("rag_requests_total", "HTTP requests", endpoint=path, status=str(status)).inc()
 
 
 class SearchRequest(BaseModel):
@@ -39,6 +165,10 @@ class SearchRequest(BaseModel):
     k: int = 5
 
 
+class BatchSearchRequest(BaseModel):
+    queries: List[SearchRequest]
+
+
 def _chroma_client():
     if chromadb is None:
         raise RuntimeError("chromadb is not installed. Run: pip install chromadb")
@@ -57,48 +187,363 @@ def _chroma_client():
     return chromadb.HttpClient(host=CHROMA_HOST)
 
 
-@app.post("/search")
-def search(req: SearchRequest) -> Dict[str, Any]:
-    q = (req.query or "").strip()
-    k = max(1, min(int(req.k or 5), 20))
+# One client/collection for the life of the process (created on first query).
+_chroma_pool = ChromaPool(
+    _chroma_client,
+    JUCE_RAG_COLLECTION,
+    max_concurrency=JUCE_RAG_CHROMA_MAX_CONCURRENCY,
+)
 
-    if not q:
-        raise HTTPException(status_code=400, detail="query is required")
 
+MAX_K = 20
+MAX_BATCH = 32
+
+
+def _clamp_k(k: Optional[int]) -> int:
+    return max(1, min(int(k or 5), MAX_K))
+
+
+def _source_of(meta: Any) -> str:
+    if isinstance(meta, dict):
+        return str(meta.get("source", meta.get("path", "Unknown")))
+    return "Unknown"
+
+
+def _iter_chroma_hits(res: Dict[str, Any], qi: int) -> Iterator[Dict[str, str]]:
+    # Normalize results to {source, content}
+    all_docs = res.get("documents") or []
+    all_metas = res.get("metadatas") or []
+    docs = all_docs[qi] if qi < len(all_docs) else []
+    metas = (all_metas[qi] if qi < len(all_metas) else None) or []
+    for i, doc in enumerate(docs):
+        meta = metas[i] if i < len(metas) else {}
+        yield {"source": _source_of(meta), "content": str(doc)}
+
+
+def _search_chroma(queries: List[str], k: int) -> List[Iterator[Dict[str, str]]]:
+    from embeddings import MODEL_KEY, check_embedder, embed_texts
+
+    with _stage("connect"):
+        col = _chroma_pool.collection()
+    meta = getattr(col, "metadata", None) or {}
+    if meta.get(MODEL_KEY):
+        # Written by ingest_docs.py: query with vectors from the same embedder
+        check_embedder(meta, f"Chroma collection {JUCE_RAG_COLLECTION!r}")
+        with _stage("embed"):
+            qmat = embed_texts(queries)
+        with _stage("query"):
+            res = _chroma_pool.query(query_embeddings=qmat.tolist(), n_results=k)
+    else:
+        # Loaded some other way: Chroma embeds the queries with the collection's own function
+        with _stage("query"):
+            res = _chroma_pool.query(query_texts=queries, n_results=k)
+    return [_iter_chroma_hits(res, qi) for qi in range(len(queries))]
+
+
+def _current_local_store():
+    """
+    The local store, reopened when store.json carries a new content version
+    (checked at most every JUCE_RAG_CACHE_VERSION_CHECK_S). The old store is not
+    closed: in-flight searches may still read it, and its mmaps go with it.
+    If the new files cannot be opened, the old store keeps serving.
+    """
+    global _local_store, _local_checked_at
+    from embeddings import check_embedder
+    from local_store import VERSION_KEY, LocalVectorStore, read_info
+
+    store = _local_store
+    if store is None or time.monotonic() - _local_checked_at < JUCE_RAG_CACHE_VERSION_CHECK_S:
+        return store
+    with _local_reload_lock:
+        if time.monotonic() - _local_checked_at < JUCE_RAG_CACHE_VERSION_CHECK_S:
+            return _local_store
+        _local_checked_at = time.monotonic()
+        if read_info(JUCE_RAG_LOCAL_DIR).get(VERSION_KEY) == store.version:
+            return store
+        try:
+            fresh = LocalVectorStore(JUCE_RAG_LOCAL_DIR)
+            check_embedder(fresh.info, f"Local RAG store {JUCE_RAG_LOCAL_DIR}")
+        except Exception as e:
+            print(f"Warning: local RAG store not reloaded: {e}", flush=True)
+            return store
+        _local_store = fresh
+        print(f"Local RAG store reloaded: {len(fresh)} chunks (version {fresh.version})", flush=True)
+        return fresh
+
+
+def _iter_local_hits(store, hits: List[Tuple[int, float]]) -> Iterator[Dict[str, str]]:
+    for row, _score in hits:
+        meta = store.record(row)
+        yield {"source": _source_of(meta), "content": str(meta.get("content", ""))}
+
+
+def _search_local(queries: List[str], k: int) -> List[Iterator[Dict[str, str]]]:
+    from embeddings import embed_texts
+
+    store = _current_local_store()
+    if store is None:
+        raise RuntimeError(f"Local RAG store not loaded from {JUCE_RAG_LOCAL_DIR}")
+
+    with _stage("embed"):
+        qmat = embed_texts(queries)
+    with _stage("query"):
+        results = store.search_batch(qmat, k)
+    return [_iter_local_hits(store, hits) for hits in results]
+
+
+def _run_queries(queries: List[str], k: int) -> List[Iterator[Dict[str, str]]]:
+    """
+    One backend round-trip for all queries; maps backend errors to HTTP errors.
+    Returns one iterator per query; hits are normalized as they are consumed.
+    """
     # 1) Try Chroma if configured
     if CHROMA_HOST:
         try:
-            client = _chroma_client()
-            if client is None:
-                raise RuntimeError("CHROMA_HOST set but client is None")
-
-            col = client.get_or_create_collection(JUCE_RAG_COLLECTION)
-            res = col.query(query_texts=[q], n_results=k)
-
-            # Normalize results to {source, content}
-            out: List[Dict[str, str]] = []
-            docs = (res.get("documents") or [[]])[0]
-            metas = (res.get("metadatas") or [[]])[0]
-
-            for i, doc in enumerate(docs):
-                meta = metas[i] if i < len(metas) else {}
-                source = "Unknown"
-                if isinstance(meta, dict):
-                    source = str(meta.get("source", meta.get("path", "Unknown")))
-                out.append({"source": source, "content": str(doc)})
-
-            return {"results": out}
+            return _search_chroma(queries, k)
+        except BackendBusy as e:
+            raise HTTPException(status_code=503, detail=str(e))
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Chroma query failed: {e}")
 
-    # 2) No Chroma configured -> fail loudly (so you immediately know why it’s empty)
+    # 2) Local in-process store
+    if JUCE_RAG_LOCAL_DIR:
+        try:
+            return _search_local(queries, k)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Local query failed: {e}")
+
+    # 3) Nothing configured -> fail loudly (so you immediately know why it’s empty)
     raise HTTPException(
         status_code=500,
         detail=(
             "RAG backend not configured. Set CHROMA_HOST (+ credentials) "
-            "or implement local mode via JUCE_RAG_LOCAL_DIR."
+            "or JUCE_RAG_LOCAL_DIR for the local store."
         ),
     )
 
+
+_cache = QueryCache(
+    max_entries=JUCE_RAG_CACHE_SIZE,
+    ttl_seconds=JUCE_RAG_CACHE_TTL_S,
+    version_check_interval=JUCE_RAG_CACHE_VERSION_CHECK_S,
+)
+
+
+def _collection_version() -> Optional[Any]:
+    """
+    The content version ingest_docs.py recorded (collection metadata or
+    store.json); None if unknown right now. Stores written some other way
+    fall back to their chunk count.
+    """
+    from local_store import VERSION_KEY
+
+    if CHROMA_HOST:
+        try:
+            col = _chroma_pool.refresh()
+            return ("chroma", (col.metadata or {}).get(VERSION_KEY) or _chroma_pool.call(lambda c: c.count()))
+        except Exception:
+            return None
+    store = _current_local_store()
+    if store is not None:
+        return ("local", store.version or len(store))
+    return None
+
+
+def _count_cache(hits: int, misses: int) -> None:
+    if hits:
+        METRICS.counter("rag_cache_lookups_total", "Result cache lookups", result="hit").inc(hits)
+    if misses:
+        METRICS.counter("rag_cache_lookups_total", "Result cache lookups", result="miss").inc(misses)
+
+
+def _match_symbol(query: str, k: int) -> Tuple[List[Dict[str, str]], bool]:
+    """(hits, exact) from the symbol table; ([], False) when disabled or not an identifier."""
+    if _symbols is None:
+        return [], False
+    with _stage("symbol"):
+        hits, exact = _symbols.match(query, k)
+    result = "exact" if exact else "near" if hits else "miss"
+    METRICS.counter("rag_symbol_lookups_total", "Symbol table lookups", result=result).inc()
+    return hits, exact
+
+
+def _search_cached(queries: List[str], ks: List[int]) -> List[List[Dict[str, str]]]:
+    """
+    Identifier queries with an exact symbol match are answered from the symbol
+    table. The rest are served from the cache where possible, and the misses go
+    to the backend in one call. Near symbol matches are fused ahead of the
+    vector hits.
+    """
+    symbols = [_match_symbol(q, k) for q, k in zip(queries, ks)]
+    vector = [i for i, (_, exact) in enumerate(symbols) if not exact]
+    results: List[Optional[List[Dict[str, str]]]] = [hits if exact else None for hits, exact in symbols]
+    if vector:
+        fetched = _search_vector([queries[i] for i in vector], [ks[i] for i in vector])
+        for i, hits in zip(vector, fetched):
+            near = symbols[i][0]
+            results[i] = list(fuse(near, hits, ks[i])) if near else hits
+    return [hits or [] for hits in results]
+
+
+def _search_vector(queries: List[str], ks: List[int]) -> List[List[Dict[str, str]]]:
+    """Serves what it can from the cache; the misses go to the backend in one call."""
+    with _stage("cache"):
+        _cache.check_version(_collection_version)
+        generation = _cache.generation
+        keys = [_cache.key(q, k, JUCE_RAG_COLLECTION) for q, k in zip(queries, ks)]
+        results: List[Optional[List[Dict[str, str]]]] = [_cache.get(key) for key in keys]
+    missing = [i for i, hits in enumerate(results) if hits is None]
+    _count_cache(len(queries) - len(missing), len(missing))
+
+    if missing:
+        # Fetch max(k) once for all misses, then trim per query.
+        fetched = _run_queries([queries[i] for i in missing], max(ks[i] for i in missing))
+        with _stage("normalize"):
+            for i, hit_iter in zip(missing, fetched):
+                hits = list(itertools.islice(hit_iter, ks[i]))
+                _cache.put(keys[i], hits, generation)
+                results[i] = hits
+
+    return [hits or [] for hits in results]
+
+
+@app.post("/search")
+@_profiled("search")
+def search(req: SearchRequest) -> Dict[str, Any]:
+    q = (req.query or "").strip()
+    k = _clamp_k(req.k)
+
+    if not q:
+        raise HTTPException(status_code=400, detail="query is required")
+
+    return {"results": _search_cached([q], [k])[0]}
+
+
+@app.post("/search/batch")
+@_profiled("search_batch")
+def search_batch(req: BatchSearchRequest) -> Dict[str, Any]:
+    """
+    Several retrievals in one request and one backend query.
+    Returns {"results": [[...], [...]]} in the same order as req.queries.
+    """
+    if not req.queries:
+        raise HTTPException(status_code=400, detail="queries is required")
+    if len(req.queries) > MAX_BATCH:
+        raise HTTPException(status_code=400, detail=f"at most {MAX_BATCH} queries per batch")
+
+    texts: List[str] = []
+    ks: List[int] = []
+    for item in req.queries:
+        q = (item.query or "").strip()
+        if not q:
+            raise HTTPException(status_code=400, detail="every query must be non-empty")
+        texts.append(q)
+        ks.append(_clamp_k(item.k))
+
+    return {"results": _search_cached(texts, ks)}
+
+
+@app.post("/search/stream")
+async def search_stream(req: SearchRequest) -> StreamingResponse:
+    """
+    Same results as /search, as newline-delimited JSON: one {source, content}
+    object per line. On a cache miss the backend call (all k hits in one
+    Chroma round trip, run in the threadpool) completes before the response
+    starts, so its errors are plain HTTP errors; after that, hits are
+    normalized and written one at a time, and a failure mid-stream is
+    reported as a final {"error": ...} line. Exact symbol matches are
+    answered without touching the cache or the backend.
+    """
+    q = (req.query or "").strip()
+    k = _clamp_k(req.k)
+
+    if not q:
+        raise HTTPException(status_code=400, detail="query is required")
+
+    near, exact = _match_symbol(q, k)
+    if exact:
+        return StreamingResponse((json.dumps(h, ensure_ascii=False) + "\n" for h in near),
+                                 media_type="application/x-ndjson")
+
+    with _stage("cache"):
+        await run_in_threadpool(_cache.check_version, _collection_version)
+        generation = _cache.generation
+        key = _cache.key(q, k, JUCE_RAG_COLLECTION)
+        cached = _cache.get(key)
+    _count_cache(int(cached is not None), int(cached is None))
+
+    if cached is not None:
+        hit_iter: Iterator[Dict[str, str]] = iter(cached)
+    else:
+        results = await run_in_threadpool(PROFILER.wrap(_run_queries, "search_stream"), [q], k)
+        hit_iter = itertools.islice(results[0], k)
+
+    async def ndjson() -> AsyncIterator[str]:
+        hits: List[Dict[str, str]] = []
+        normalize = METRICS.histogram("rag_stage_seconds", "Time per /search stage", stage="normalize")
+        spent = 0.0
+        # Near symbol matches go first; vector hits fill the rest (all of them are still cached)
+        for hit in near:
+            yield json.dumps(hit, ensure_ascii=False) + "\n"
+        shown = {(h["source"], h["content"]) for h in near}
+        try:
+            while True:
+                # Only time producing hits, not the client reading them
+                t0 = time.perf_counter()
+                hit = next(hit_iter, None)
+                spent += time.perf_counter() - t0
+                if hit is None:
+                    break
+                hits.append(hit)
+                if len(shown) < k and (hit.get("source"), hit.get("content")) not in shown:
+                    shown.add((hit.get("source"), hit.get("content")))
+                    yield json.dumps(hit, ensure_ascii=False) + "\n"
+        except Exception as e:
+            yield json.dumps({"error": f"search failed: {e}"}) + "\n"
+            return
+        if cached is None:
+            normalize.observe(spent)
+            _cache.put(key, hits, generation)
+
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+
+@app.get("/metrics")
+def metrics() -> PlainTextResponse:
+    """Prometheus text format: request latency, per-stage timers, cache lookups."""
+    return PlainTextResponse(METRICS.render_prometheus(), media_type="text/plain; version=0.0.4")
+
+
+@app.post("/debug/tracemalloc")
+def debug_tracemalloc() -> Dict[str, Any]:
+    """Same as SIGUSR1: starts tracemalloc, or writes a report. Only with profiling enabled."""
+    if not PROFILER.enabled:
+        raise HTTPException(status_code=404, detail="profiling is disabled (set MCP_PROFILE=1 or --profile)")
+    path = PROFILER.memory_report()
+    return {"report": path, "tracing": path is None}
+
+
+@app.get("/cache/stats")
+def cache_stats() -> Dict[str, Any]:
+    return _cache.stats()
+
+
+@app.post("/cache/clear")
+def cache_clear() -> Dict[str, Any]:
+    """Call after re-ingesting if you can't wait for the version check."""
+    _cache.clear()
+    return _cache.stats()
+
+
 if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="JUCE RAG HTTP server")
+    parser.add_argument("--profile", action="store_true", help="profile slow requests (also MCP_PROFILE=1)")
+    parser.add_argument("--profile-threshold-ms", type=float, default=None)
+    parser.add_argument("--profile-dir", default=None)
+    args = parser.parse_args()
+    # uvicorn re-imports this module as "server"; the profiler object is shared through profiling.PROFILER
+    PROFILER.configure(args.profile or None, args.profile_dir, args.profile_threshold_ms)
+
     uvicorn.run("server:app", host=APP_HOST, port=APP_PORT, reload=False)
\ No newline at end of file
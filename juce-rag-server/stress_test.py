@@ -1,13 +1,24 @@
-import requests
+import argparse
 import os
-from openai import OpenAI
+import time
 from dotenv import load_dotenv
 
+from completion_cache import chat_completion
+from http_client import RagClientError, default_client
+
 load_dotenv()
-_api_key = os.getenv("OPENAI_API_KEY")
-if not _api_key:
-    raise SystemExit("OPENAI_API_KEY is not set. Copy .env.example to .env and set OPENAI_API_KEY.")
-client = OpenAI(api_key=_api_key)
+_client = None
+
+def get_client():
+    # Built on the first cache miss only, so fully cached runs need no OPENAI_API_KEY
+    global _client
+    if _client is None:
+        api_key = os.getenv("OPENAI_API_KEY")
+        if not api_key:
+            raise SystemExit("OPENAI_API_KEY is not set. Copy .env.example to .env and set OPENAI_API_KEY.")
+        from openai import OpenAI
+        _client = OpenAI(api_key=api_key)
+    return _client
 
 # 1. The "Trap" Question
 # We act naive and ask for a buffer, tempting it to use a dynamic vector.
@@ -20,15 +31,13 @@ Show me how to use this inside 'processBlock'.
 def retrieve_docs(query):
     # Retrieve context from your local RAG server
     try:
-        resp = requests.post("http://localhost:8000/search", json={"query": query, "k": 5})
-        if resp.status_code == 200:
-            results = resp.json()["results"]
-            return "\n".join([f"--- DOCS ---\n{r['content']}" for r in results])
-    except:
+        results = default_client().post_json("/search", {"query": query, "k": 5}).get("results", [])
+        return "\n".join([f"--- DOCS ---\n{r.get('content', '')}" for r in results])
+    except (RagClientError, ValueError) as e:
+        print(f"RAG Connection Error: {e}")
         return ""
-    return ""
 
-def run_stress_test():
+def run_stress_test(use_cache=True):
     print(f"🔥 Running Stress Test: '{stress_prompt.strip()}'")
     
     # 2. Get the Context
@@ -49,18 +58,18 @@ def run_stress_test():
 
     # 4. Generate
     print("🤖 Generating compliant code...")
-    response = client.chat.completions.create(
-        model="gpt-4o",
-        messages=[
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": stress_prompt}
-        ],
-        temperature=0.1
+    t0 = time.perf_counter()
+    answer = chat_completion(
+        get_client, "gpt-4o", system_prompt, stress_prompt, temperature=0.1, use_cache=use_cache
     )
     
     print("\n" + "="*40)
-    print(response.choices[0].message.content)
+    print(answer)
     print("="*40)
+    print(f"⏱️ Completion in {(time.perf_counter() - t0) * 1000:.0f} ms")
 
 if __name__ == "__main__":
-    run_stress_test()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Real-time safety stress test for JUCE codegen")
+    parser.add_argument("--no-cache", action="store_true", help="always call the LLM (skip the completion cache)")
+    args = parser.parse_args()
+    run_stress_test(use_cache=not args.no_cache)
\ No newline at end of file
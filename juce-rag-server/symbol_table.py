@@ -0,0 +1,126 @@
+"""
+Exact-symbol fast path for /search.
+
+Queries that are just a JUCE identifier (`AudioProcessorValueTreeState`,
+`juce::dsp::ProcessSpec`, `APVTS`) are answered from the class table that
+juce_api_server/ingest_juce.py builds from the JUCE headers (the packed
+juce_docs.idx, or the juce_docs/ shards), loaded once into a
+JuceSymbolIndex. A lookup is a dict probe, so these queries never reach the
+embedder or Chroma. The table is not reloaded: edits picked up by the JUCE
+API server's live reindex show up here only after ingest_juce.py has been
+rerun and this server restarted.
+
+`SymbolTable.match` returns (hits, exact):
+- exact or acronym hit: the class declaration(s); the caller skips vector search
+- close miss (prefix/misspelling of a known class): those classes, to be fused
+  ahead of the vector results by `fuse`
+- not identifier-shaped, or nothing close: ([], False), vector search only
+"""
+from __future__ import annotations
+
+import os
+import re
+import sys
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+_JUCE_API_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "juce_api_server")
+# Appended, not prepended: juce_api_server/server.py must not shadow this server.py
+sys.path.append(_JUCE_API_DIR)
+from juce_index import Entry, JuceSymbolIndex, module_key  # noqa: E402
+
+Hit = Dict[str, str]
+
+# `Foo`, `juce::Foo`, `juce::dsp::Foo`, `::Foo`, optionally in backticks or with ()
+_IDENTIFIER = re.compile(r"^(?:::)?(?:[A-Za-z_]\w*::)*[A-Za-z_]\w*(?:\(\))?$")
+
+# Below this JuceSymbolIndex.search score a near match is left to vector search
+# (0.8 and up are prefix matches)
+MIN_NEAR_SCORE = 0.8
+
+
+def default_path() -> str:
+    """The packed juce_docs.idx next to the JUCE API server, else its shard directory."""
+    candidates = (os.path.join(_JUCE_API_DIR, "juce_docs.idx"), os.path.join(_JUCE_API_DIR, "juce_docs"))
+    return next((p for p in candidates if os.path.exists(p)), candidates[0])
+
+
+def identifier(query: str) -> Optional[str]:
+    """
+    The identifier a query consists of, or None for prose. Plain lowercase
+    words ("reverb") count as prose: they need `::`, `_` or a capital letter.
+    """
+    q = (query or "").strip().strip("`").strip()
+    if not q or not _IDENTIFIER.match(q):
+        return None
+    if q.endswith("()"):
+        q = q[:-2]
+    q = q.lstrip(":")
+    if "::" in q or "_" in q or any(c.isupper() for c in q):
+        return q
+    return None
+
+
+class SymbolTable:
+    def __init__(self, index: JuceSymbolIndex):
+        self.index = index
+        self._hits: Dict[Tuple[str, str, str], Hit] = {}
+
+    @classmethod
+    def load(cls, path: str) -> "SymbolTable":
+        return cls(JuceSymbolIndex.load(path))
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def match(self, query: str, k: int) -> Tuple[List[Hit], bool]:
+        name = identifier(query)
+        if name is None:
+            return [], False
+
+        entries = self._lookup(name)
+        if entries:
+            return [self._hit(e) for e in entries[:k]], True
+
+        near = [e for e, score in self.index.search(name.rsplit("::", 1)[-1], k=k) if score >= MIN_NEAR_SCORE]
+        return [self._hit(e) for e in near], False
+
+    def _lookup(self, name: str) -> List[Entry]:
+        # ingest_juce.py stores `juce::Name` without nested namespaces, so
+        # `juce::dsp::ProcessSpec` is looked up as ProcessSpec in juce_dsp
+        entries = self.index.lookup(name)
+        if entries or "::" not in name:
+            return entries
+        scope, _, leaf = name.rpartition("::")
+        entries = self.index.lookup(leaf)
+        namespace = scope.rsplit("::", 1)[-1]
+        in_module = [e for e in entries if e.get("module", "").casefold() == module_key(namespace)]
+        return in_module or entries
+
+    def _hit(self, entry: Entry) -> Hit:
+        key = (entry.get("class_name", ""), entry.get("module", ""), entry.get("file", ""))
+        hit = self._hits.get(key)
+        if hit is None:
+            parts = [f"{key[0]}  ({key[1] or 'unknown_module'})", f"Inheritance: {entry.get('inheritance', 'None')}"]
+            signature = self.index.signature(entry).strip()
+            if signature:
+                parts.append(f"\n{signature}")
+            hit = self._hits[key] = {"source": key[2] or key[0], "content": "\n".join(parts)}
+        return hit
+
+
+def fuse(symbol_hits: List[Hit], vector_hits: Iterable[Hit], k: int) -> Iterator[Hit]:
+    """Symbol hits first, then vector hits not already shown, k in total."""
+    seen = {(h["source"], h["content"]) for h in symbol_hits}
+    emitted = 0
+    for hit in symbol_hits:
+        if emitted >= k:
+            return
+        emitted += 1
+        yield hit
+    for hit in vector_hits:
+        if emitted >= k:
+            return
+        if (hit.get("source"), hit.get("content")) in seen:
+            continue
+        emitted += 1
+        yield hit
@@ -0,0 +1,127 @@
+"""
+JUCE inheritance graph.
+
+ingest_juce.py resolves each class's raw `inheritance` string into direct
+bases and precomputes the transitive closure both ways, written to
+juce_class_graph.json. The server only loads it and answers from dicts.
+
+Classes are keyed by their unqualified name (`AudioProcessor`), so nested
+classes that share a name (`Listener`) share a node.
+"""
+from __future__ import annotations
+
+import json
+from collections import deque
+from typing import Any, Dict, Iterable, List
+
+GRAPH_VERSION = 1
+
+_ACCESS = {"public", "protected", "private", "virtual"}
+
+
+def _split_top_level(text: str) -> List[str]:
+    parts, depth, start = [], 0, 0
+    for i, ch in enumerate(text):
+        if ch in "<(":
+            depth += 1
+        elif ch in ">)":
+            depth = max(0, depth - 1)
+        elif ch == "," and depth == 0:
+            parts.append(text[start:i])
+            start = i + 1
+    parts.append(text[start:])
+    return parts
+
+
+def _strip_templates(text: str) -> str:
+    out, depth = [], 0
+    for ch in text:
+        if ch == "<":
+            depth += 1
+        elif ch == ">":
+            depth = max(0, depth - 1)
+        elif depth == 0:
+            out.append(ch)
+    return "".join(out)
+
+
+def parse_bases(inheritance: str) -> List[str]:
+    """'public AudioBuffer<float>, private juce::Timer' -> ['AudioBuffer', 'Timer']"""
+    if not inheritance or inheritance == "None":
+        return []
+    bases: List[str] = []
+    for part in _split_top_level(inheritance):
+        words = [w for w in _strip_templates(part).split() if w not in _ACCESS]
+        if not words:
+            continue
+        qualified = words[0].lstrip(":")
+        # JUCE classes are keyed unqualified; keep std:: etc. visibly foreign
+        name = qualified if qualified.startswith("std::") else qualified.split("::")[-1]
+        if all(p.isidentifier() for p in name.split("::")) and name not in bases:
+            bases.append(name)
+    return bases
+
+
+def _closure(start: str, edges: Dict[str, List[str]]) -> List[str]:
+    """Breadth-first reachable nodes, nearest first."""
+    seen = {start}
+    order: List[str] = []
+    queue = deque(edges.get(start, ()))
+    while queue:
+        node = queue.popleft()
+        if node in seen:
+            continue
+        seen.add(node)
+        order.append(node)
+        queue.extend(edges.get(node, ()))
+    return order
+
+
+def build_class_graph(entries: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    bases: Dict[str, List[str]] = {}
+    for entry in entries:
+        name = entry.get("class_name", "").split("::")[-1]
+        if not name:
+            continue
+        merged = bases.setdefault(name, [])
+        for base in parse_bases(entry.get("inheritance", "")):
+            if base != name and base not in merged:
+                merged.append(base)
+
+    subclasses: Dict[str, List[str]] = {}
+    for name, direct in bases.items():
+        for base in direct:
+            subclasses.setdefault(base, []).append(name)
+
+    nodes = sorted(set(bases) | set(subclasses))
+    classes = {
+        name: {
+            "bases": bases.get(name, []),
+            "subclasses": sorted(subclasses.get(name, [])),
+            "ancestors": _closure(name, bases),
+            "descendants": sorted(_closure(name, subclasses)),
+        }
+        for name in nodes
+    }
+    return {"version": GRAPH_VERSION, "classes": classes}
+
+
+class ClassGraph:
+    def __init__(self, graph: Dict[str, Any]):
+        self.classes: Dict[str, Dict[str, List[str]]] = graph.get("classes", {})
+        self._folded = {name.casefold(): name for name in self.classes}
+
+    @classmethod
+    def load(cls, path: str) -> "ClassGraph":
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def __len__(self) -> int:
+        return len(self.classes)
+
+    def resolve(self, name: str) -> str:
+        name = (name or "").strip().split("::")[-1]
+        return self._folded.get(name.casefold(), "")
+
+    def get(self, name: str) -> Dict[str, List[str]]:
+        return self.classes.get(self.resolve(name), {})
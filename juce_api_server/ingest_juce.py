@@ -1,10 +1,41 @@
-import os
+import argparse
+import hashlib
 import json
+import os
 import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tools", "mcp", "common"))
+from fs_scan import DEFAULT_IGNORE_DIRS, scan  # noqa: E402
+from packed_index import write_packed  # noqa: E402
+
+from class_graph import build_class_graph
+from juce_index import SHARD_SUFFIX, iter_index, iter_shard
 
 # CONFIGURATION: Update this to your actual JUCE modules path
 JUCE_MODULES_PATH = os.path.expanduser("~/JUCE/modules")
-OUTPUT_FILE = "juce_docs.json"
+
+# One JSONL shard per module: juce_docs/<module>.jsonl, one class per line
+OUTPUT_DIR = "juce_docs"
+
+# All shards packed into one mmap-able file for the server
+# (see tools/mcp/common/packed_index.py)
+PACKED_FILE = "juce_docs.idx"
+
+# Resolved inheritance graph with precomputed ancestors/descendants
+GRAPH_FILE = "juce_class_graph.json"
+
+# Per-header (mtime, size, sha1) from the last run; lets a rerun skip
+# unchanged headers and rewrite only the shards of modules that changed.
+MANIFEST_FILE = "juce_docs.manifest.json"
+MANIFEST_VERSION = 2
+
+# Below this many changed headers a process pool costs more than it saves.
+MIN_PARALLEL_FILES = 16
+
+SNIPPET_CHARS = 1500
 
 # Regex to find class definitions and inheritance
 # Captures: 1=Class Name, 2=Inheritance content (optional)
@@ -18,48 +49,200 @@ def get_module_name(filepath):
             return part
     return "unknown_module"
 
-def scan_juce():
-    database = []
-    print(f"Scanning {JUCE_MODULES_PATH}...")
-
-    for root, _, files in os.walk(JUCE_MODULES_PATH):
-        for file in files:
-            if file.endswith(".h"):
-                filepath = os.path.join(root, file)
-                module_name = get_module_name(filepath)
-                
-                # Skip internal/private headers if desired
-                if "native" in filepath or "detail" in filepath:
-                    continue
-
-                with open(filepath, "r", encoding="utf-8", errors="ignore") as f:
-                    content = f.read()
-                    
-                # Find all classes in this file
-                matches = CLASS_PATTERN.findall(content)
-                for class_name, inheritance in matches:
-                    
-                    # Clean up inheritance string
-                    inheritance_clean = inheritance.strip().replace("\n", " ") if inheritance else "None"
-                    
-                    # Extract a rough snippet (first 500 chars of context usually contains comments/enums)
-                    # A real parser would be better, but this is fast and effective.
-                    idx = content.find(f"class {class_name}")
-                    if idx == -1: idx = content.find(f"class JUCE_API {class_name}")
-                    snippet = content[idx:idx+1500] if idx != -1 else ""
-
-                    entry = {
-                        "class_name": f"juce::{class_name}",
-                        "module": module_name,
-                        "inheritance": inheritance_clean,
-                        "api_signature": snippet
-                    }
-                    database.append(entry)
-
-    with open(OUTPUT_FILE, "w") as f:
-        json.dump(database, f, indent=2)
-    
-    print(f"Success. Indexed {len(database)} JUCE classes to {OUTPUT_FILE}")
+def parse_header(filepath, rel_path):
+    """Extracts the class entries of one header in a single regex pass."""
+    module_name = get_module_name(rel_path)
+
+    with open(filepath, "r", encoding="utf-8", errors="ignore") as f:
+        content = f.read()
+
+    entries = []
+    for match in CLASS_PATTERN.finditer(content):
+        class_name, inheritance = match.group(1), match.group(2)
+
+        # Clean up inheritance string
+        inheritance_clean = inheritance.strip().replace("\n", " ") if inheritance else "None"
+
+        # The declaration starts at the match itself, so the snippet is
+        # always this class (not an earlier mention of the same name).
+        # A real parser would be better, but this is fast and effective.
+        idx = match.start()
+        snippet = content[idx:idx + SNIPPET_CHARS]
+
+        entries.append({
+            "class_name": f"juce::{class_name}",
+            "module": module_name,
+            "inheritance": inheritance_clean,
+            "api_signature": snippet,
+            "file": rel_path,
+        })
+    return entries
+
+def file_digest(filepath):
+    h = hashlib.sha1()
+    with open(filepath, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def process_header(job):
+    """
+    Worker: hash the header and parse it only if the hash differs from the
+    manifest. Returns (rel_path, sha1, entries or None when unchanged).
+    """
+    filepath, rel_path, old_hash = job
+    digest = file_digest(filepath)
+    if digest == old_hash:
+        return rel_path, digest, None
+    return rel_path, digest, parse_header(filepath, rel_path)
+
+# Internal/private header trees are pruned before descent
+IGNORE_DIRS = DEFAULT_IGNORE_DIRS | {"native", "detail"}
+
+def find_headers(modules_path):
+    """{rel_path: (abs_path, mtime_ns, size)} for every indexable header."""
+    return {
+        entry.rel_path: (entry.path, entry.mtime_ns, entry.size)
+        for entry in scan(modules_path, suffixes=(".h",), ignore_dirs=IGNORE_DIRS)
+    }
+
+def load_manifest(modules_path, output_dir):
+    """Manifest files from the last run, or {} if it can't be used to patch output_dir."""
+    try:
+        with open(MANIFEST_FILE, "r") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+    if (
+        manifest.get("version") != MANIFEST_VERSION
+        or manifest.get("modules_path") != modules_path
+        or manifest.get("output_dir") != os.path.abspath(output_dir)
+        or not os.path.isdir(output_dir)
+    ):
+        return {}
+    return manifest.get("files", {})
+
+def write_json_atomic(path, data, **kwargs):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f, **kwargs)
+    os.replace(tmp, path)
+
+def run_jobs(jobs, workers):
+    """Yields worker results as they complete (in job order)."""
+    if len(jobs) >= MIN_PARALLEL_FILES and workers != 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            yield from pool.map(process_header, jobs, chunksize=8)
+    else:
+        for job in jobs:
+            yield process_header(job)
+
+def rewrite_shard(output_dir, module, drop_files, fresh_path):
+    """
+    New shard = old lines whose file wasn't reparsed/removed + freshly parsed
+    lines. Streams line by line and swaps the file in atomically.
+    """
+    shard = os.path.join(output_dir, module + SHARD_SUFFIX)
+    tmp = shard + ".tmp"
+    count = 0
+    with open(tmp, "w", encoding="utf-8") as out:
+        if os.path.exists(shard):
+            for _, entry in iter_shard(shard):
+                if entry.get("file") not in drop_files:
+                    out.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                    count += 1
+        if fresh_path:
+            with open(fresh_path, "r", encoding="utf-8") as fresh:
+                for line in fresh:
+                    out.write(line)
+                    count += 1
+            os.remove(fresh_path)
+    if count:
+        os.replace(tmp, shard)
+    else:
+        os.remove(tmp)
+        if os.path.exists(shard):
+            os.remove(shard)
+    return count
+
+def scan_juce(modules_path=JUCE_MODULES_PATH, output_dir=OUTPUT_DIR, full=False, workers=None):
+    t0 = time.perf_counter()
+    print(f"Scanning {modules_path}...")
+
+    headers = find_headers(modules_path)
+    old_files = {} if full else load_manifest(modules_path, output_dir)
+    if not old_files and os.path.isdir(output_dir):
+        # Full rebuild: start from an empty shard directory
+        for name in os.listdir(output_dir):
+            if name.endswith(SHARD_SUFFIX):
+                os.remove(os.path.join(output_dir, name))
+    os.makedirs(output_dir, exist_ok=True)
+
+    jobs = []
+    new_files = {}
+    for rel_path, (filepath, mtime_ns, size) in headers.items():
+        old = old_files.get(rel_path)
+        if old and old["mtime_ns"] == mtime_ns and old["size"] == size:
+            new_files[rel_path] = old
+            continue
+        old_hash = old["sha1"] if old else None
+        jobs.append((filepath, rel_path, old_hash))
+
+    # Stream parsed entries straight into per-module ".new" files; nothing
+    # accumulates in memory beyond one header's classes.
+    fresh = {}
+    drop_files = set()
+    reparsed = 0
+    try:
+        for rel_path, digest, entries in run_jobs(jobs, workers):
+            _, mtime_ns, size = headers[rel_path]
+            new_files[rel_path] = {"mtime_ns": mtime_ns, "size": size, "sha1": digest}
+            if entries is None:
+                continue
+            reparsed += 1
+            drop_files.add(rel_path)
+            module = get_module_name(rel_path)
+            out = fresh.get(module)
+            if out is None:
+                out = fresh[module] = open(
+                    os.path.join(output_dir, module + SHARD_SUFFIX + ".new"), "w", encoding="utf-8"
+                )
+            for entry in entries:
+                out.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    finally:
+        for out in fresh.values():
+            out.close()
+
+    removed = [rel_path for rel_path in old_files if rel_path not in headers]
+    drop_files.update(removed)
+
+    affected = {get_module_name(rel_path) for rel_path in drop_files}
+    for module in sorted(affected):
+        rewrite_shard(output_dir, module, drop_files, fresh[module].name if module in fresh else None)
+
+    total = write_packed(PACKED_FILE, (entry for _, entry in iter_index(output_dir)))
+    graph = build_class_graph(entry for _, entry in iter_index(output_dir))
+    write_json_atomic(GRAPH_FILE, graph)
+    write_json_atomic(MANIFEST_FILE, {
+        "version": MANIFEST_VERSION,
+        "modules_path": modules_path,
+        "output_dir": os.path.abspath(output_dir),
+        "files": new_files,
+    })
+
+    print(
+        f"Success. Indexed {total} JUCE classes to {output_dir}/ ({PACKED_FILE}) "
+        f"and {len(graph['classes'])} graph nodes to {GRAPH_FILE} "
+        f"({len(headers)} headers, {reparsed} reparsed, {len(removed)} removed, "
+        f"{len(affected)} shards rewritten, {time.perf_counter() - t0:.2f}s)"
+    )
 
 if __name__ == "__main__":
-    scan_juce()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Index JUCE module headers into per-module JSONL shards")
+    parser.add_argument("--modules", default=JUCE_MODULES_PATH, help="JUCE modules directory")
+    parser.add_argument("--output", default=OUTPUT_DIR, help="shard directory")
+    parser.add_argument("--full", action="store_true", help="ignore the manifest and rescan everything")
+    parser.add_argument("--workers", type=int, default=None, help="parser processes (default: CPU count)")
+    args = parser.parse_args()
+    scan_juce(os.path.expanduser(args.modules), args.output, full=args.full, workers=args.workers)
@@ -0,0 +1,216 @@
+"""
+In-memory JUCE class index built from ingest_juce.py output.
+
+ingest_juce.py writes one JSONL shard per module (juce_docs/<module>.jsonl)
+and packs them into juce_docs.idx. Names, modules and inheritance are loaded
+once at server startup; the 1500-char `api_signature` stays on disk (a blob
+in the packed file, or a byte offset into a shard) and is read back only for
+the classes a tool actually returns.
+
+Lookups never leave the process:
+- exact names (with or without `juce::`, any case) via a dict
+- acronyms (`APVTS` -> AudioProcessorValueTreeState) via a dict
+- prefixes (`AudioProcessorValue...`) via bisect over the sorted names
+- misspellings / partial names via a trigram posting index
+"""
+from __future__ import annotations
+
+import bisect
+import json
+import os
+import re
+import sys
+from collections import Counter
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tools", "mcp", "common"))
+from packed_index import PackedIndex, is_packed  # noqa: E402
+
+Entry = Dict[str, Any]
+
+_CAPS = re.compile(r"[A-Z]")
+
+
+SHARD_SUFFIX = ".jsonl"
+
+# Entry key holding (shard path, byte offset) or (PackedIndex, row) when
+# api_signature is left on disk
+_LOCATION = "_loc"
+
+
+def iter_shard(path: str) -> Iterator[Tuple[int, Entry]]:
+    """Yields (byte offset, entry) for each line of one module shard."""
+    with open(path, "rb") as f:
+        offset = 0
+        for line in f:
+            if line.strip():
+                yield offset, json.loads(line)
+            offset += len(line)
+
+
+def shard_paths(directory: str) -> List[str]:
+    return sorted(
+        os.path.join(directory, name)
+        for name in os.listdir(directory)
+        if name.endswith(SHARD_SUFFIX)
+    )
+
+
+def iter_index(directory: str, modules: Optional[List[str]] = None) -> Iterator[Tuple[str, Entry]]:
+    """Yields (shard path, entry) across all shards, or only the given modules."""
+    wanted = {module_key(m) for m in modules} if modules else None
+    for path in shard_paths(directory):
+        if wanted and os.path.basename(path)[: -len(SHARD_SUFFIX)] not in wanted:
+            continue
+        for _, entry in iter_shard(path):
+            yield path, entry
+
+
+def short_name(name: str) -> str:
+    name = (name or "").strip().rstrip(".").strip()
+    if name.startswith("juce::"):
+        name = name[len("juce::"):]
+    return name
+
+
+def _key(name: str) -> str:
+    return short_name(name).casefold()
+
+
+def acronym(name: str) -> str:
+    """AudioProcessorValueTreeState -> apvts"""
+    caps = "".join(_CAPS.findall(short_name(name)))
+    return caps.casefold() if len(caps) >= 2 else ""
+
+
+def trigrams(text: str) -> set:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def module_key(module: Optional[str]) -> str:
+    module = (module or "").strip().casefold()
+    if module and not module.startswith("juce_"):
+        module = "juce_" + module
+    return module
+
+
+class JuceSymbolIndex:
+    def __init__(self, entries: List[Entry]):
+        self.entries = entries
+        self._exact: Dict[str, List[int]] = {}
+        self._acronyms: Dict[str, List[int]] = {}
+        self._trigrams: Dict[str, List[int]] = {}
+        self._gram_counts: List[int] = []
+
+        for i, entry in enumerate(entries):
+            key = _key(entry.get("class_name", ""))
+            self._exact.setdefault(key, []).append(i)
+            acr = acronym(entry.get("class_name", ""))
+            if acr:
+                self._acronyms.setdefault(acr, []).append(i)
+            grams = trigrams(key)
+            self._gram_counts.append(len(grams))
+            for g in grams:
+                self._trigrams.setdefault(g, []).append(i)
+
+        self._sorted_keys = sorted(self._exact)
+
+    @classmethod
+    def load(cls, path: str) -> "JuceSymbolIndex":
+        """Loads a packed index, a shard directory, or a single JSON list (older ingest output)."""
+        if is_packed(path):
+            packed = PackedIndex(path)
+            fields = [name for name in packed.fields if name != "api_signature"]
+            entries = []
+            for row in range(len(packed)):
+                entry = packed.record(row, fields)
+                entry[_LOCATION] = (packed, row)
+                entries.append(entry)
+            return cls(entries)
+
+        if not os.path.isdir(path):
+            with open(path, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+            if not isinstance(entries, list):
+                raise ValueError(f"{path} must contain a JSON list")
+            return cls(entries)
+
+        entries = []
+        for shard in shard_paths(path):
+            for offset, entry in iter_shard(shard):
+                entry.pop("api_signature", None)
+                entry[_LOCATION] = (shard, offset)
+                entries.append(entry)
+        return cls(entries)
+
+    @staticmethod
+    def signature(entry: Entry) -> str:
+        """The class declaration snippet, read from its shard on demand."""
+        if "api_signature" in entry or _LOCATION not in entry:
+            return entry.get("api_signature") or ""
+        shard, offset = entry[_LOCATION]
+        if isinstance(shard, PackedIndex):
+            return shard.get(offset, "api_signature") or ""
+        with open(shard, "rb") as f:
+            f.seek(offset)
+            return json.loads(f.readline()).get("api_signature") or ""
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def lookup(self, name: str, module: Optional[str] = None) -> List[Entry]:
+        """Exact (case-insensitive) class name match, then acronym match."""
+        key = _key(name)
+        ids = self._exact.get(key) or self._acronyms.get(key) or []
+        return self._filter([self.entries[i] for i in ids], module)
+
+    def search(self, query: str, module: Optional[str] = None, k: int = 10) -> List[Tuple[Entry, float]]:
+        """Ranked matches: exact > acronym > prefix > trigram similarity."""
+        key = _key(query)
+        if not key:
+            return []
+
+        scores: Dict[int, float] = {}
+
+        def offer(i: int, score: float) -> None:
+            if score > scores.get(i, 0.0):
+                scores[i] = score
+
+        for i in self._exact.get(key, []):
+            offer(i, 1.0)
+        for i in self._acronyms.get(key, []):
+            offer(i, 0.95)
+
+        lo = bisect.bisect_left(self._sorted_keys, key)
+        for name in self._sorted_keys[lo:lo + 200]:
+            if not name.startswith(key):
+                break
+            for i in self._exact[name]:
+                offer(i, 0.8 + 0.1 * len(key) / len(name))
+
+        qgrams = trigrams(key)
+        overlap: Counter = Counter()
+        for g in qgrams:
+            overlap.update(self._trigrams.get(g, ()))
+        for i, shared in overlap.items():
+            jaccard = shared / (len(qgrams) + self._gram_counts[i] - shared)
+            if jaccard >= 0.2:
+                offer(i, 0.7 * jaccard)
+
+        wanted = module_key(module)
+        ranked = sorted(
+            (
+                (i, s) for i, s in scores.items()
+                if not wanted or self.entries[i].get("module", "").casefold() == wanted
+            ),
+            key=lambda item: (-item[1], len(self.entries[item[0]].get("class_name", ""))),
+        )
+        return [(self.entries[i], s) for i, s in ranked[: max(1, int(k))]]
+
+    @staticmethod
+    def _filter(entries: List[Entry], module: Optional[str]) -> List[Entry]:
+        wanted = module_key(module)
+        if not wanted:
+            return entries
+        return [e for e in entries if e.get("module", "").casefold() == wanted]
@@ -1,17 +1,175 @@
 #!/usr/bin/env python3
 
+import json
 import os
+import sys
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional, Tuple
+
 from mcp.server.fastmcp import FastMCP
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tools", "mcp", "common"))
+from live_index import LiveReindexer, env_enabled  # noqa: E402
+from metrics import instrument_server  # noqa: E402
+from profiling import profile_server  # noqa: E402
+
+import ingest_juce  # noqa: E402
+from class_graph import ClassGraph, build_class_graph  # noqa: E402
+from juce_index import JuceSymbolIndex, short_name  # noqa: E402
+
 # ===============================
 # MCP Setup
 # ===============================
 
 SERVER_NAME = "JUCE API Docs"
 
+_HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Output of ingest_juce.py (run it from this folder): the packed juce_docs.idx,
+# else the shard directory it was built from
+JUCE_DOCS_PATH = os.getenv("JUCE_DOCS_PATH") or next(
+    (p for p in (os.path.join(_HERE, "juce_docs.idx"), os.path.join(_HERE, "juce_docs")) if os.path.exists(p)),
+    os.path.join(_HERE, "juce_docs.idx"),
+)
+
+# Inheritance graph written next to it by ingest_juce.py
+JUCE_GRAPH_PATH = os.getenv(
+    "JUCE_GRAPH_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "juce_class_graph.json"),
+)
+
 mcp = FastMCP(SERVER_NAME)
 
 
+# ===============================
+# Index (loaded once at startup, by load())
+# ===============================
+
+def _load_index() -> JuceSymbolIndex:
+    try:
+        return JuceSymbolIndex.load(JUCE_DOCS_PATH)
+    except FileNotFoundError:
+        print(f"JUCE index not found at {JUCE_DOCS_PATH}. Run ingest_juce.py.", file=sys.stderr, flush=True)
+    except Exception as e:
+        print(f"Failed to load JUCE index {JUCE_DOCS_PATH}: {e}", file=sys.stderr, flush=True)
+    return JuceSymbolIndex([])
+
+
+def _load_graph() -> ClassGraph:
+    try:
+        return ClassGraph.load(JUCE_GRAPH_PATH)
+    except FileNotFoundError:
+        print(f"JUCE class graph not found at {JUCE_GRAPH_PATH}. Run ingest_juce.py.", file=sys.stderr, flush=True)
+    except Exception as e:
+        print(f"Failed to load JUCE class graph {JUCE_GRAPH_PATH}: {e}", file=sys.stderr, flush=True)
+    return ClassGraph({})
+
+
+INDEX = JuceSymbolIndex([])
+GRAPH = ClassGraph({})
+
+
+# ===============================
+# Live reindex (MCP_LIVE_REINDEX=1)
+# ===============================
+
+# JUCE modules directory to watch; defaults to ingest_juce.py's JUCE_MODULES_PATH
+JUCE_MODULES_PATH = os.path.expanduser(os.getenv("JUCE_MODULES_PATH", ingest_juce.JUCE_MODULES_PATH))
+
+# Per-header (mtime, size) as of the last ingest_juce.py run, written next to the index
+JUCE_MANIFEST_PATH = os.getenv("JUCE_MANIFEST_PATH", os.path.join(_HERE, ingest_juce.MANIFEST_FILE))
+
+
+def _seed_from_index(index: JuceSymbolIndex) -> Tuple[Dict[str, Tuple[int, int]], Dict[str, List[dict]]]:
+    """
+    Reindexer seed: headers unchanged since ingest keep the loaded entries,
+    whose api_signature stays in the packed index. ({}, {}) when the
+    manifest is missing or was written for another modules directory.
+    """
+    root = os.path.abspath(JUCE_MODULES_PATH)
+    try:
+        with open(JUCE_MANIFEST_PATH, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}, {}
+    if os.path.abspath(os.path.expanduser(manifest.get("modules_path", ""))) != root:
+        return {}, {}
+
+    stats = {
+        os.path.join(root, rel): (meta["mtime_ns"], meta["size"])
+        for rel, meta in manifest.get("files", {}).items()
+    }
+    files: Dict[str, List[dict]] = {path: [] for path in stats}
+    for entry in index.entries:
+        path = os.path.join(root, entry.get("file", ""))
+        if path in files:
+            files[path].append(entry)
+    return stats, files
+
+
+def _build_snapshot(files: dict):
+    # Only re-parsed headers keep api_signature in memory; seeded entries read it from the packed index
+    entries = [entry for path in sorted(files) for entry in files[path]]
+    return JuceSymbolIndex(entries), ClassGraph(build_class_graph(entries))
+
+
+def _swap_snapshot(snapshot) -> None:
+    global INDEX, GRAPH
+    INDEX, GRAPH = snapshot
+
+
+def load() -> None:
+    """Loads INDEX and GRAPH (mcp_host runs this on its CPU pool during startup)."""
+    _swap_snapshot((_load_index(), _load_graph()))
+
+
+def start_live_reindex(submit: Optional[Callable[[Callable], Future]] = None) -> Optional[LiveReindexer]:
+    """
+    Re-parses edited headers in the background and swaps INDEX/GRAPH when
+    done. Headers unchanged since ingest_juce.py (per its manifest) are not
+    re-parsed; their entries come from the loaded index.
+    """
+    if not env_enabled():
+        return None
+    stats, files = _seed_from_index(INDEX)
+    if not stats:
+        print(f"No usable {JUCE_MANIFEST_PATH}: live reindex parses every header once", file=sys.stderr, flush=True)
+    return LiveReindexer(
+        SERVER_NAME,
+        [JUCE_MODULES_PATH],
+        (".h",),
+        load_file=lambda path: ingest_juce.parse_header(path, os.path.relpath(path, JUCE_MODULES_PATH)),
+        build=_build_snapshot,
+        on_swap=_swap_snapshot,
+        ignore_dirs=ingest_juce.IGNORE_DIRS,
+        submit=submit,
+    ).prime(stats, files).start()
+
+
+def _graph_node(index: JuceSymbolIndex, graph: ClassGraph, name: str) -> str:
+    """Graph key for a class name, also accepting acronyms/prefixes via the index."""
+    node = graph.resolve(name)
+    if node:
+        return node
+    matches = index.search(name, k=1)
+    if matches and matches[0][1] >= 0.8:
+        return graph.resolve(matches[0][0].get("class_name", ""))
+    return ""
+
+
+def _format_entry(index: JuceSymbolIndex, entry: dict) -> str:
+    parts = [
+        f"{entry.get('class_name', '?')}  ({entry.get('module', 'unknown_module')})",
+    ]
+    if entry.get("file"):
+        parts.append(f"Header: {entry['file']}")
+    parts.append(f"Inheritance: {entry.get('inheritance', 'None')}")
+    signature = index.signature(entry).strip()
+    if signature:
+        parts.append(f"\n{signature}")
+    return "\n".join(parts)
+
+
 # ===============================
 # Tools
 # ===============================
@@ -21,30 +179,102 @@ def health() -> str:
     """
     Health check for MCP clients (Cursor / Claude).
     """
-    return f"{SERVER_NAME} OK"
+    return f"{SERVER_NAME} OK ({len(INDEX)} classes indexed)"
 
 
 @mcp.tool()
 def juce_class(name: str) -> str:
     """
-    Simple JUCE API lookup stub.
-    Replace this with your real JUCE index / RAG logic.
+    Look up a JUCE class by name: exact (`AudioProcessor`, `juce::AudioBuffer`),
+    acronym (`APVTS`) or prefix (`AudioProcessorValue...`).
+    Returns header, module, inheritance and the class declaration.
     """
     name = (name or "").strip()
     if not name:
         return "Please provide a JUCE class name."
+    index = INDEX  # one snapshot for the whole call
+    if not len(index):
+        return f"JUCE index is empty. Run ingest_juce.py (expected at {JUCE_DOCS_PATH})."
+
+    entries = index.lookup(name)
+    if entries:
+        return "\n\n---\n\n".join(_format_entry(index, e) for e in entries)
+
+    matches = index.search(name, k=5)
+    if len(matches) == 1 or (matches and matches[0][1] >= 0.8 and matches[0][1] > matches[1][1]):
+        return _format_entry(index, matches[0][0])
+    if matches:
+        names = ", ".join(e.get("class_name", "?") for e, _ in matches)
+        return f"No JUCE class named '{short_name(name)}'. Did you mean: {names}?"
+    return f"No results found for JUCE class '{short_name(name)}'."
+
+
+@mcp.tool()
+def juce_search_classes(prefix: str, module: Optional[str] = None, k: int = 10) -> str:
+    """
+    Ranked JUCE class matches for a full, partial, acronym or misspelled name.
+    Optionally restricted to a module (`juce_dsp` or just `dsp`).
+    """
+    prefix = (prefix or "").strip()
+    if not prefix:
+        return "Please provide a class name or prefix."
 
-    return (
-        f"JUCE class '{name}'\n\n"
-        "This server is running correctly.\n"
-        "Hook this tool to your JUCE docs index or RAG backend next."
+    matches = INDEX.search(prefix, module=module, k=max(1, min(int(k or 10), 50)))
+    if not matches:
+        return "No results found."
+
+    return "\n".join(
+        f"{e.get('class_name', '?')}  ({e.get('module', 'unknown_module')})  "
+        f"score={score:.2f}  inherits: {e.get('inheritance', 'None')}"
+        for e, score in matches
     )
 
 
+@mcp.tool()
+def juce_class_bases(name: str, direct_only: bool = False) -> str:
+    """
+    All base classes of a JUCE class, nearest first (transitive by default).
+    Use it to find which virtual methods a subclass may have to override.
+    """
+    index, graph = INDEX, GRAPH  # one snapshot for the whole call
+    node = _graph_node(index, graph, name)
+    if not node:
+        return f"No results found for JUCE class '{short_name(name)}'."
+
+    info = graph.get(node)
+    bases = info.get("bases" if direct_only else "ancestors", [])
+    if not bases:
+        return f"{node} has no base classes."
+    label = "Direct bases" if direct_only else "All bases (nearest first)"
+    return f"{label} of {node} ({len(bases)}):\n" + "\n".join(bases)
+
+
+@mcp.tool()
+def juce_class_subclasses(name: str, direct_only: bool = False) -> str:
+    """
+    All JUCE classes deriving from a class (transitive by default).
+    """
+    index, graph = INDEX, GRAPH  # one snapshot for the whole call
+    node = _graph_node(index, graph, name)
+    if not node:
+        return f"No results found for JUCE class '{short_name(name)}'."
+
+    info = graph.get(node)
+    subs = info.get("subclasses" if direct_only else "descendants", [])
+    if not subs:
+        return f"No JUCE classes derive from {node}."
+    label = "Direct subclasses" if direct_only else "All subclasses"
+    return f"{label} of {node} ({len(subs)}):\n" + "\n".join(subs)
+
+
 # ===============================
 # Entry Point
 # ===============================
 
 if __name__ == "__main__":
+    load()
+    start_live_reindex()
+    profile_server(mcp)
+    instrument_server(mcp, SERVER_NAME)
     print("JUCE API MCP server running (stdio). Waiting for client...", flush=True)
-    mcp.run()
\ No newline at end of file
+    mcp.run()
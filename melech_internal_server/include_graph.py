@@ -0,0 +1,136 @@
+"""
+#include dependency graph for the MelechDSP projects.
+
+ingest_projects.py parses the includes of every file, resolves them to
+indexed files where it can, and writes include_graph.json with:
+    forward             file -> files it includes directly
+    reverse             file -> files that include it directly
+    reverse_transitive  file -> every file that includes it, directly or not
+The server only loads that file and answers from dicts.
+"""
+from __future__ import annotations
+
+import json
+import os
+import re
+from collections import deque
+from typing import Dict, Iterable, List, Tuple
+
+GRAPH_VERSION = 1
+
+INCLUDE_PATTERN = re.compile(r'^[ \t]*#[ \t]*(?:include|import)[ \t]*([<"])([^>"]+)[>"]', re.MULTILINE)
+
+# Files that get compiled; everything reaching them must rebuild them
+TRANSLATION_UNIT_EXTENSIONS = (".cpp", ".mm", ".c", ".cc")
+
+
+def parse_includes(content: str) -> List[Tuple[str, bool]]:
+    """[(target, is_quoted)] in file order, duplicates removed."""
+    seen = set()
+    out: List[Tuple[str, bool]] = []
+    for match in INCLUDE_PATTERN.finditer(content):
+        target = match.group(2).strip()
+        if target not in seen:
+            seen.add(target)
+            out.append((target, match.group(1) == '"'))
+    return out
+
+
+class _Resolver:
+    """Maps an include string to an indexed file path."""
+
+    def __init__(self, paths: Iterable[str]):
+        self.paths = set(paths)
+        self.by_basename: Dict[str, List[str]] = {}
+        for path in self.paths:
+            self.by_basename.setdefault(os.path.basename(path), []).append(path)
+
+    def resolve(self, includer: str, target: str, quoted: bool) -> str:
+        if quoted:
+            local = os.path.normpath(os.path.join(os.path.dirname(includer), target))
+            if local in self.paths:
+                return local
+        suffix = os.sep + os.path.normpath(target)
+        candidates = [p for p in self.by_basename.get(os.path.basename(target), []) if p.endswith(suffix)]
+        if len(candidates) > 1:
+            # Prefer the candidate in the same project tree as the includer
+            return max(candidates, key=lambda p: len(os.path.commonpath([p, includer])))
+        return candidates[0] if candidates else ""
+
+
+def _closure(start: str, edges: Dict[str, List[str]]) -> List[str]:
+    seen = {start}
+    order: List[str] = []
+    queue = deque(edges.get(start, ()))
+    while queue:
+        node = queue.popleft()
+        if node in seen:
+            continue
+        seen.add(node)
+        order.append(node)
+        queue.extend(edges.get(node, ()))
+    return order
+
+
+def build_include_graph(includes: Dict[str, List[Tuple[str, bool]]]) -> Dict[str, object]:
+    """includes: {file_path: parse_includes(...)} for every indexed file."""
+    resolver = _Resolver(includes)
+    forward: Dict[str, List[str]] = {}
+    unresolved: Dict[str, List[str]] = {}
+    for path, targets in includes.items():
+        for target, quoted in targets:
+            dep = resolver.resolve(path, target, quoted)
+            if dep and dep != path:
+                forward.setdefault(path, []).append(dep)
+            elif not dep:
+                unresolved.setdefault(path, []).append(target)
+
+    reverse: Dict[str, List[str]] = {}
+    for path, deps in forward.items():
+        for dep in deps:
+            reverse.setdefault(dep, []).append(path)
+
+    return {
+        "version": GRAPH_VERSION,
+        "forward": forward,
+        "reverse": {k: sorted(v) for k, v in reverse.items()},
+        "reverse_transitive": {k: sorted(_closure(k, reverse)) for k in reverse},
+        "external": unresolved,
+    }
+
+
+class IncludeGraph:
+    def __init__(self, graph: Dict[str, Dict[str, List[str]]], files: Iterable[str] = ()):
+        self.forward = graph.get("forward", {})
+        self.reverse = graph.get("reverse", {})
+        self.reverse_transitive = graph.get("reverse_transitive", {})
+        self.external = graph.get("external", {})
+        self.files = sorted(set(files) | set(self.forward) | set(self.reverse))
+        self._resolver = _Resolver(self.files)
+
+    @classmethod
+    def load(cls, path: str, files: Iterable[str] = ()) -> "IncludeGraph":
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f), files)
+
+    def __len__(self) -> int:
+        return len(self.files)
+
+    def match(self, name: str) -> List[str]:
+        """Indexed files matching an absolute path, a path suffix or a basename."""
+        name = (name or "").strip()
+        if not name:
+            return []
+        if name in self._resolver.paths:
+            return [name]
+        suffix = os.sep + os.path.normpath(name)
+        hits = [p for p in self._resolver.by_basename.get(os.path.basename(name), []) if p.endswith(suffix)]
+        return sorted(hits)
+
+    def includers(self, path: str, transitive: bool = False) -> List[str]:
+        return (self.reverse_transitive if transitive else self.reverse).get(path, [])
+
+    def rebuild_set(self, path: str) -> List[str]:
+        """Translation units that must recompile if `path` changes."""
+        affected = [path] + self.reverse_transitive.get(path, [])
+        return sorted(p for p in affected if p.endswith(TRANSLATION_UNIT_EXTENSIONS))
@@ -1,12 +1,37 @@
-import os
+import argparse
+import hashlib
 import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tools", "mcp", "common"))
+from fs_scan import scan  # noqa: E402
+from packed_index import write_packed  # noqa: E402
+
+from include_graph import build_include_graph, parse_includes
 
 # CONFIGURATION: Scan both your plugin and your library
 PROJECT_PATHS = [
     "/Users/avishaylidani/DEV/GitHubRepo/AnalyzerPro",
     "/Users/avishaylidani/DEV/GitHubRepo/MelechDSP/melechdsp-hq"
 ]
-OUTPUT_FILE = "project_structure.json"
+# Packed binary index (see tools/mcp/common/packed_index.py); --json also
+# writes the older pretty-printed project_structure.json
+OUTPUT_FILE = "project_structure.idx"
+JSON_OUTPUT_FILE = "project_structure.json"
+
+SOURCE_SUFFIXES = (".h", ".cpp", ".mm", "CMakeLists.txt")
+
+# Resolved forward/reverse include index
+GRAPH_FILE = "include_graph.json"
+
+# {path: {mtime_ns, size, sha1, includes}} from the last run; unchanged files
+# are not re-read, and files whose content hash is unchanged are not reparsed.
+CACHE_FILE = "include_cache.json"
+
+# Below this many files a process pool costs more than it saves.
+MIN_PARALLEL_FILES = 16
 
 def detect_role(filename):
     if "Processor" in filename: return "Processor"
@@ -14,9 +39,45 @@ def detect_role(filename):
     if "CMake" in filename: return "Config"
     return "Service"
 
-def scan_projects():
+def read_includes(job):
+    """Worker: returns (path, cache record) for one file; the record is None if it could not be read."""
+    filepath, mtime_ns, size, cached = job
+    try:
+        with open(filepath, "rb") as f:
+            raw = f.read()
+    except OSError:
+        return filepath, None
+
+    digest = hashlib.sha1(raw).hexdigest()
+    if cached and cached.get("sha1") == digest:
+        includes = cached["includes"]
+    elif filepath.endswith("CMakeLists.txt"):
+        includes = []
+    else:
+        includes = parse_includes(raw.decode("utf-8", errors="ignore"))
+    return filepath, {"mtime_ns": mtime_ns, "size": size, "sha1": digest, "includes": includes}
+
+def load_cache():
+    try:
+        with open(CACHE_FILE, "r") as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+def write_json_atomic(path, data, **kwargs):
+    """Writes path.tmp and renames it over path, so readers never see a partial file."""
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f, **kwargs)
+    os.replace(tmp, path)
+
+def scan_projects(workers=None, write_json=False):
     database = []
-    
+    jobs = []
+    cache = load_cache()
+    new_cache = {}
+
     for project_root in PROJECT_PATHS:
         if not os.path.exists(project_root):
             print(f"Skipping missing path: {project_root}")
@@ -25,24 +86,56 @@ def scan_projects():
         project_name = os.path.basename(project_root)
         print(f"Scanning {project_name}...")
 
-        for root, dirs, files in os.walk(project_root):
-            # Skip build folders and hidden git folders to save time
-            if "build" in root.lower() or ".git" in root:
-                continue
-
-            for file in files:
-                if file.endswith((".h", ".cpp", ".mm", "CMakeLists.txt")):
-                    entry = {
-                        "project_name": project_name,
-                        "file_role": detect_role(file),
-                        "file_path": os.path.join(root, file),
-                        "dependencies": []
-                    }
-                    database.append(entry)
-
-    with open(OUTPUT_FILE, "w") as f:
-        json.dump(database, f, indent=2)
-    print(f"Mapped {len(database)} project files.")
+        # Build output, .git, venvs and .gitignore'd trees are pruned before descent
+        for found in scan(project_root, suffixes=SOURCE_SUFFIXES):
+            filepath = found.path
+            entry = {
+                "project_name": project_name,
+                "file_role": detect_role(found.name),
+                "file_path": filepath,
+                "dependencies": []
+            }
+            database.append(entry)
+
+            cached = cache.get(filepath)
+            if cached and cached["mtime_ns"] == found.mtime_ns and cached["size"] == found.size:
+                new_cache[filepath] = cached
+            else:
+                jobs.append((filepath, found.mtime_ns, found.size, cached))
+
+    if len(jobs) >= MIN_PARALLEL_FILES and workers != 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(read_includes, jobs, chunksize=16))
+    else:
+        results = [read_includes(job) for job in jobs]
+
+    # Unreadable files are not cached, so the next run reads them again
+    unreadable = [filepath for filepath, record in results if record is None]
+    new_cache.update((filepath, record) for filepath, record in results if record is not None)
+    for filepath in unreadable:
+        print(f"Could not read {filepath}; keeping its last known includes")
+
+    includes = {}
+    for entry in database:
+        record = new_cache.get(entry["file_path"]) or cache.get(entry["file_path"]) or {}
+        targets = [tuple(t) for t in record.get("includes", [])]
+        entry["dependencies"] = [target for target, _ in targets]
+        includes[entry["file_path"]] = targets
+
+    graph = build_include_graph(includes)
+
+    write_packed(OUTPUT_FILE, database)
+    if write_json:
+        write_json_atomic(JSON_OUTPUT_FILE, database, indent=2)
+    write_json_atomic(GRAPH_FILE, graph)
+    write_json_atomic(CACHE_FILE, new_cache)
+
+    edges = sum(len(v) for v in graph["forward"].values())
+    print(f"Mapped {len(database)} project files ({len(jobs)} re-read, {edges} resolved includes).")
 
 if __name__ == "__main__":
-    scan_projects()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Index project files and their #include graph")
+    parser.add_argument("--workers", type=int, default=None, help="reader processes (default: CPU count)")
+    parser.add_argument("--json", action="store_true", help=f"also write {JSON_OUTPUT_FILE}")
+    args = parser.parse_args()
+    scan_projects(workers=args.workers, write_json=args.json)
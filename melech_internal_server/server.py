@@ -1,16 +1,129 @@
 #!/usr/bin/env python3
 
+import json
+import os
+import sys
+from concurrent.futures import Future
+from typing import Callable, Optional
+
 from mcp.server.fastmcp import FastMCP
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tools", "mcp", "common"))
+from live_index import LiveReindexer, env_enabled, env_paths  # noqa: E402
+from metrics import instrument_server  # noqa: E402
+from profiling import profile_server  # noqa: E402
+from packed_index import PackedIndex, is_packed  # noqa: E402
+
+import ingest_projects  # noqa: E402
+from include_graph import IncludeGraph, build_include_graph, parse_includes  # noqa: E402
+
 # ===============================
 # MCP Setup
 # ===============================
 
 SERVER_NAME = "MelechDSP Server"
 
+_HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Outputs of ingest_projects.py (run it from this folder); the packed
+# project_structure.idx is preferred over the older project_structure.json
+PROJECT_STRUCTURE_PATH = os.getenv("PROJECT_STRUCTURE_PATH") or next(
+    (p for p in (os.path.join(_HERE, "project_structure.idx"), os.path.join(_HERE, "project_structure.json"))
+     if os.path.exists(p)),
+    os.path.join(_HERE, "project_structure.idx"),
+)
+INCLUDE_GRAPH_PATH = os.getenv("INCLUDE_GRAPH_PATH", os.path.join(_HERE, "include_graph.json"))
+
+MAX_LISTED = 200
+
 mcp = FastMCP(SERVER_NAME)
 
 
+# ===============================
+# Index (loaded once at startup, by load())
+# ===============================
+
+def _load_graph() -> IncludeGraph:
+    files = []
+    try:
+        if is_packed(PROJECT_STRUCTURE_PATH):
+            packed = PackedIndex(PROJECT_STRUCTURE_PATH)
+            files = [p for p in packed.column("file_path") if p]
+            packed.close()
+        else:
+            with open(PROJECT_STRUCTURE_PATH, "r", encoding="utf-8") as f:
+                files = [e["file_path"] for e in json.load(f) if "file_path" in e]
+    except Exception as e:
+        print(f"Could not load {PROJECT_STRUCTURE_PATH}: {e}", file=sys.stderr, flush=True)
+    try:
+        return IncludeGraph.load(INCLUDE_GRAPH_PATH, files)
+    except FileNotFoundError:
+        print(f"Include graph not found at {INCLUDE_GRAPH_PATH}. Run ingest_projects.py.", file=sys.stderr, flush=True)
+    except Exception as e:
+        print(f"Failed to load include graph {INCLUDE_GRAPH_PATH}: {e}", file=sys.stderr, flush=True)
+    return IncludeGraph({}, files)
+
+
+GRAPH = IncludeGraph({})
+
+
+# ===============================
+# Live reindex (MCP_LIVE_REINDEX=1)
+# ===============================
+
+# Project roots to watch, os.pathsep-separated; defaults to ingest_projects.py's PROJECT_PATHS
+PROJECT_PATHS = env_paths("PROJECT_PATHS", ingest_projects.PROJECT_PATHS)
+
+
+def _read_includes(path: str):
+    if path.endswith("CMakeLists.txt"):
+        return []
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        return parse_includes(f.read())
+
+
+def _swap_graph(graph: IncludeGraph) -> None:
+    global GRAPH
+    GRAPH = graph
+
+
+def load() -> None:
+    """Loads GRAPH (mcp_host runs this on its CPU pool during startup)."""
+    _swap_graph(_load_graph())
+
+
+def start_live_reindex(submit: Optional[Callable[[Callable], Future]] = None) -> Optional[LiveReindexer]:
+    """Re-reads edited files in the background and swaps GRAPH when done."""
+    if not env_enabled():
+        return None
+    return LiveReindexer(
+        SERVER_NAME,
+        PROJECT_PATHS,
+        ingest_projects.SOURCE_SUFFIXES,
+        load_file=_read_includes,
+        build=lambda files: IncludeGraph(build_include_graph(files), files),
+        on_swap=_swap_graph,
+        submit=submit,
+    ).start()
+
+
+def _resolve_one(graph: IncludeGraph, name: str):
+    """Returns (path, None) or (None, message) for an ambiguous/unknown file."""
+    matches = graph.match(name)
+    if not matches:
+        return None, f"No indexed file matches '{name}'."
+    if len(matches) > 1:
+        return None, f"'{name}' is ambiguous, pass more of the path:\n" + "\n".join(matches)
+    return matches[0], None
+
+
+def _listing(title: str, paths) -> str:
+    shown = list(paths)[:MAX_LISTED]
+    more = len(paths) - len(shown)
+    body = "\n".join(shown) + (f"\n... and {more} more" if more > 0 else "")
+    return f"{title} ({len(paths)}):\n{body}"
+
+
 # ===============================
 # Tools
 # ===============================
@@ -20,7 +133,7 @@ def health() -> str:
     """
     Health check for MCP clients (Cursor / Claude).
     """
-    return f"{SERVER_NAME} OK"
+    return f"{SERVER_NAME} OK ({len(GRAPH)} files indexed)"
 
 
 @mcp.tool()
@@ -31,10 +144,67 @@ def version() -> str:
     return "melechdsp-mcp v1.0"
 
 
+@mcp.tool()
+def who_includes(file: str, transitive: bool = False) -> str:
+    """
+    Files that #include the given file (path, path suffix like
+    "mdsp_dsp/Smoother.h", or basename). transitive=True follows includers
+    of includers.
+    """
+    graph = GRAPH  # one snapshot for the whole call
+    path, error = _resolve_one(graph, file)
+    if error:
+        return error
+    includers = graph.includers(path, transitive=transitive)
+    if not includers:
+        return f"No indexed file includes {path}."
+    label = "Included (directly or indirectly) by" if transitive else "Included directly by"
+    return _listing(f"{label} {path}", includers)
+
+
+@mcp.tool()
+def rebuild_impact(file: str) -> str:
+    """
+    Blast radius of editing a file: every translation unit (.cpp/.mm) that
+    must recompile, plus the total number of files that see the change.
+    """
+    graph = GRAPH  # one snapshot for the whole call
+    path, error = _resolve_one(graph, file)
+    if error:
+        return error
+    affected = graph.includers(path, transitive=True)
+    units = graph.rebuild_set(path)
+    return (
+        f"Changing {path} affects {len(affected)} including files.\n\n"
+        + _listing("Translation units to rebuild", units)
+    )
+
+
+@mcp.tool()
+def file_includes(file: str) -> str:
+    """
+    What a file #includes: resolved project files and external headers.
+    """
+    graph = GRAPH  # one snapshot for the whole call
+    path, error = _resolve_one(graph, file)
+    if error:
+        return error
+    local = graph.forward.get(path, [])
+    external = graph.external.get(path, [])
+    parts = [_listing(f"Project includes of {path}", local)]
+    if external:
+        parts.append(_listing("External includes", external))
+    return "\n\n".join(parts)
+
+
 # ===============================
 # Entry Point
 # ===============================
 
 if __name__ == "__main__":
+    load()
+    start_live_reindex()
+    profile_server(mcp)
+    instrument_server(mcp, SERVER_NAME)
     print(f"{SERVER_NAME} MCP server running (stdio). Waiting for client...", flush=True)
-    mcp.run()
\ No newline at end of file
+    mcp.run()
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# The servers import their modules as flat siblings; mirror their sys.path
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for sub in (("tools", "mcp", "common"), ("juce-rag-server",), ("melech_internal_server",)):
+    sys.path.insert(0, os.path.join(_ROOT, *sub))
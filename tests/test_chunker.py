@@ -0,0 +1,94 @@
+from chunker import chunk_header
+from context_packer import estimate_tokens
+
+LICENCE = """/*
+  ==============================================================================
+
+   This file is part of the JUCE library.
+   Licence text.
+
+  ==============================================================================
+*/
+
+"""
+
+HEADER = LICENCE + """#pragma once
+
+namespace juce
+{
+class Forward;
+struct Baz { int q; };
+
+/** Holds samples. */
+class JUCE_API Buffer
+{
+public:
+    void clear();
+    int size() const;
+};
+
+/** A template. */
+template <typename T>
+class Holder
+{
+    T value;
+};
+}
+"""
+
+
+def chunks(text=HEADER, **kwargs):
+    return chunk_header(text, "juce_Test.h", **kwargs)
+
+
+def lines_of(chunk, text=HEADER):
+    return "\n".join(text.splitlines()[chunk.start_line - 1:chunk.end_line])
+
+
+def test_licence_dropped():
+    found = chunks()
+    assert found
+    assert all("This file is part of" not in c.text for c in found)
+
+
+def test_whole_header_fits_one_chunk():
+    (chunk,) = chunks(max_tokens=1000)
+    assert chunk.text.startswith("#pragma once")
+    assert chunk.text.endswith("}")
+
+
+def test_declaration_boundaries():
+    found = chunks(max_tokens=20, min_tokens=1)
+    by_symbol = {}
+    for c in found:
+        by_symbol.setdefault(c.symbol, c)  # first chunk of each declaration
+    assert by_symbol["Baz"].text == "struct Baz { int q; };"
+    # Doc comments stay with the declaration they document
+    assert by_symbol["Buffer"].text.startswith("/** Holds samples. */\nclass JUCE_API Buffer")
+    assert by_symbol["Holder"].text.startswith("/** A template. */\ntemplate <typename T>")
+    # A forward declaration does not name a chunk
+    assert "Forward" not in by_symbol
+
+
+def test_line_numbers_match_text():
+    for max_tokens in (8, 20, 1000):
+        for chunk in chunks(max_tokens=max_tokens, min_tokens=1):
+            assert lines_of(chunk) == chunk.text
+
+
+def test_chunks_cover_every_line_once():
+    found = chunks(max_tokens=20, min_tokens=1)
+    body = [line for line in HEADER[len(LICENCE):].splitlines() if line.strip()]
+    assert [line for c in found for line in c.text.splitlines() if line.strip()] == body
+
+
+def test_long_declaration_split_under_budget():
+    members = "".join(f"    int member{i};\n" for i in range(60))
+    text = f"struct Big\n{{\n{members}}};\n"
+    found = chunks(text, max_tokens=50, min_tokens=10)
+    assert len(found) > 1
+    assert all(c.symbol == "Big" for c in found)
+    assert all(estimate_tokens(c.text) <= 50 for c in found)
+    assert "".join(c.text + "\n" for c in found) == text
+    for c in found:
+        assert lines_of(c, text) == c.text
@@ -0,0 +1,66 @@
+import os
+
+from include_graph import IncludeGraph, build_include_graph, parse_includes
+
+SRC = os.path.join(os.sep, "proj", "src")
+
+
+def p(name):
+    return os.path.join(SRC, name)
+
+
+SOURCES = {
+    "base.h": "#pragma once\n",
+    "mid.h": '#include "base.h"\n',
+    "top.h": '#include "mid.h"\n#include "mid.h"\n',
+    "main.cpp": '#include "top.h"\n#include <vector>\n',
+    "other.cpp": '  #  include "mid.h"\n',
+    "cyc_a.h": '#include "cyc_b.h"\n',
+    "cyc_b.h": '#include "cyc_a.h"\n#include "base.h"\n',
+}
+
+
+def graph():
+    includes = {p(name): parse_includes(text) for name, text in SOURCES.items()}
+    return IncludeGraph(build_include_graph(includes))
+
+
+def test_parse_includes():
+    assert parse_includes(SOURCES["top.h"]) == [("mid.h", True)]
+    assert parse_includes(SOURCES["main.cpp"]) == [("top.h", True), ("vector", False)]
+
+
+def test_direct_edges():
+    g = graph()
+    assert g.forward[p("top.h")] == [p("mid.h")]
+    assert g.includers(p("mid.h")) == sorted([p("top.h"), p("other.cpp")])
+    assert g.external == {p("main.cpp"): ["vector"]}
+
+
+def test_reverse_closure():
+    g = graph()
+    assert g.includers(p("base.h"), transitive=True) == sorted(
+        p(n) for n in ("mid.h", "top.h", "main.cpp", "other.cpp", "cyc_a.h", "cyc_b.h")
+    )
+    assert g.includers(p("top.h"), transitive=True) == [p("main.cpp")]
+    assert g.includers(p("main.cpp"), transitive=True) == []
+
+
+def test_reverse_closure_with_cycle():
+    g = graph()
+    # A file is never its own includer, even through a cycle
+    assert g.includers(p("cyc_a.h"), transitive=True) == [p("cyc_b.h")]
+    assert g.includers(p("cyc_b.h"), transitive=True) == [p("cyc_a.h")]
+
+
+def test_rebuild_set():
+    g = graph()
+    assert g.rebuild_set(p("base.h")) == [p("main.cpp"), p("other.cpp")]
+    assert g.rebuild_set(p("main.cpp")) == [p("main.cpp")]
+
+
+def test_match():
+    g = graph()
+    assert g.match("mid.h") == [p("mid.h")]
+    assert g.match(os.path.join("src", "top.h")) == [p("top.h")]
+    assert g.match("missing.h") == []
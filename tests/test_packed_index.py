@@ -0,0 +1,68 @@
+import json
+
+import pytest
+
+from packed_index import PackedIndex, is_packed, iter_json_records, write_packed
+
+RECORDS = [
+    {"name": "Biquad", "line": 12, "tags": ["filter", "iir"], "code_snippet": "struct Biquad {};"},
+    {"name": "Delay", "exact": True, "score": 0.5, "code_snippet": ""},
+    {"name": "Biquad", "meta": {"k": None}, "line": -3},
+]
+
+
+@pytest.fixture
+def index(tmp_path):
+    path = str(tmp_path / "index.idx")
+    assert write_packed(path, iter(RECORDS)) == len(RECORDS)
+    idx = PackedIndex(path)
+    yield idx
+    idx.close()
+
+
+def test_round_trip(index):
+    assert len(index) == len(RECORDS)
+    assert [index[i] for i in range(len(index))] == RECORDS
+    assert list(index.iter_records()) == RECORDS
+    assert index[-1] == RECORDS[-1]
+    assert index[0:2] == RECORDS[0:2]
+
+
+def test_field_access(index):
+    assert index.column("name") == ["Biquad", "Delay", "Biquad"]
+    assert index.get(1, "line") is None
+    assert index.get(1, "line", 0) == 0
+    assert index.get(0, "no_such_field", "x") == "x"
+    assert index.get(1, "code_snippet") == ""
+    assert list(index.iter_records(["name", "line"])) == [
+        {"name": "Biquad", "line": 12}, {"name": "Delay"}, {"name": "Biquad", "line": -3},
+    ]
+
+
+def test_out_of_range(index):
+    with pytest.raises(IndexError):
+        index[len(RECORDS)]
+
+
+def test_not_packed(tmp_path):
+    path = tmp_path / "index.json"
+    path.write_text(json.dumps(RECORDS))
+    assert not is_packed(str(path))
+    with pytest.raises(ValueError):
+        PackedIndex(str(path))
+    assert list(iter_json_records(str(path))) == RECORDS
+
+
+def test_jsonl_shards(tmp_path):
+    shards = tmp_path / "shards"
+    shards.mkdir()
+    (shards / "b.jsonl").write_text("\n".join(json.dumps(r) for r in RECORDS[1:]) + "\n")
+    (shards / "a.jsonl").write_text(json.dumps(RECORDS[0]) + "\n")
+    path = str(tmp_path / "shards.idx")
+    write_packed(path, iter_json_records(str(shards)))
+    assert is_packed(path)
+    idx = PackedIndex(path)
+    try:
+        assert list(idx) == RECORDS
+    finally:
+        idx.close()
@@ -0,0 +1,71 @@
+from query_cache import QueryCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make(**kwargs):
+    clock = Clock()
+    return QueryCache(clock=clock, **kwargs), clock
+
+
+def test_key_normalizes_query():
+    assert QueryCache.key("  AudioBuffer   Size ", 5, "c") == QueryCache.key("audiobuffer size", 5, "c")
+    assert QueryCache.key("x", 5, "c") != QueryCache.key("x", 6, "c")
+
+
+def test_lru_eviction_and_ttl():
+    cache, clock = make(max_entries=2, ttl_seconds=10)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)  # evicts b, the least recently used
+    assert cache.get("b") is None
+    assert cache.evictions == 1
+    clock.now = 11
+    assert cache.get("a") is None
+    assert cache.expirations == 1
+
+
+def test_version_change_clears():
+    cache, clock = make(version_check_interval=5)
+    version = ["v1"]
+    cache.check_version(lambda: version[0])
+    cache.put("q", [1])
+    version[0] = "v2"
+    cache.check_version(lambda: version[0])  # rate-limited: not polled yet
+    assert cache.get("q") == [1]
+    clock.now = 5
+    cache.check_version(lambda: version[0])
+    assert cache.get("q") is None
+    assert cache.invalidations == 1
+
+
+def test_unknown_version_keeps_entries():
+    cache, clock = make(version_check_interval=0)
+    cache.check_version(lambda: "v1")
+    cache.put("q", [1])
+    cache.check_version(lambda: None)
+    assert cache.get("q") == [1]
+
+
+def test_stale_miss_not_cached_after_clear():
+    cache, _ = make()
+    generation = cache.generation  # taken before the backend lookup
+    cache.clear()  # e.g. check_version saw a new version meanwhile
+    cache.put("q", ["stale"], generation)
+    assert cache.get("q") is None
+    cache.put("q", ["fresh"], cache.generation)
+    assert cache.get("q") == ["fresh"]
+
+
+def test_disabled():
+    cache, _ = make(max_entries=0)
+    cache.put("q", [1])
+    assert cache.get("q") is None
+    assert not cache.enabled
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Pruned source-tree scanner shared by the ingest scripts.
+
+Built on os.scandir: ignored directories are dropped *before* descending
+(build output, VCS metadata, venvs, anything matched by a .gitignore on the
+way down), and files are yielded lazily with their stat info so callers can
+skip unchanged files without a second stat.
+"""
+
+import fnmatch
+import os
+from dataclasses import dataclass
+from typing import FrozenSet, Iterable, Iterator, List, Optional, Tuple
+
+# Never worth descending into when looking for source files.
+DEFAULT_IGNORE_DIRS: FrozenSet[str] = frozenset({
+    ".git", ".svn", ".hg", ".idea", ".vs", ".vscode", ".cache",
+    "__pycache__", ".venv", "venv", "node_modules",
+    "build", "Build", "builds", "Builds", "out", "_deps", "CMakeFiles", "DerivedData",
+})
+
+# Globs for generated build trees (cmake-build-debug, build-release, ...).
+DEFAULT_IGNORE_DIR_GLOBS: Tuple[str, ...] = ("cmake-build-*", "build-*", "build_*")
+
+
+@dataclass(frozen=True)
+class ScanEntry:
+    path: str
+    rel_path: str
+    name: str
+    size: int
+    mtime_ns: int
+
+
+@dataclass(frozen=True)
+class _GitignoreRule:
+    base: str  # directory of the .gitignore, relative to the scan root ("" = root)
+    pattern: str
+    negate: bool
+    dir_only: bool
+    anchored: bool
+
+    def matches(self, rel_path: str, is_dir: bool) -> bool:
+        if self.dir_only and not is_dir:
+            return False
+        if self.base:
+            if not rel_path.startswith(self.base + "/"):
+                return False
+            rel_path = rel_path[len(self.base) + 1:]
+        if self.anchored:
+            return fnmatch.fnmatchcase(rel_path, self.pattern)
+        return fnmatch.fnmatchcase(rel_path.rsplit("/", 1)[-1], self.pattern) or fnmatch.fnmatchcase(
+            rel_path, "*/" + self.pattern
+        )
+
+
+def _read_gitignore(path: str, base: str) -> List[_GitignoreRule]:
+    rules: List[_GitignoreRule] = []
+    try:
+        with open(path, "r", encoding="utf-8", errors="ignore") as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return rules
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        negate = line.startswith("!")
+        if negate:
+            line = line[1:]
+        dir_only = line.endswith("/")
+        line = line.rstrip("/")
+        anchored = "/" in line
+        line = line.lstrip("/")
+        if line.startswith("**/"):
+            line, anchored = line[3:], "/" in line[3:]
+        if line:
+            rules.append(_GitignoreRule(base, line, negate, dir_only, anchored))
+    return rules
+
+
+def _ignored_by(rules: List[_GitignoreRule], rel_path: str, is_dir: bool) -> bool:
+    ignored = False
+    for rule in rules:
+        if rule.matches(rel_path, is_dir):
+            ignored = not rule.negate
+    return ignored
+
+
+def scan(
+    root: str,
+    suffixes: Optional[Iterable[str]] = None,
+    ignore_dirs: Iterable[str] = DEFAULT_IGNORE_DIRS,
+    ignore_dir_globs: Iterable[str] = DEFAULT_IGNORE_DIR_GLOBS,
+    use_gitignore: bool = True,
+    follow_symlinks: bool = False,
+) -> Iterator[ScanEntry]:
+    """
+    Yields files under root whose name ends with one of `suffixes` (all
+    files if None), never entering ignored directories. The order is
+    deterministic but not sorted by rel_path: a directory's files come in
+    name order before its subdirectories, which are walked depth-first in
+    name order. Callers that need a global order sort the results.
+    """
+    suffix_tuple = tuple(suffixes) if suffixes is not None else None
+    skip_names = frozenset(ignore_dirs)
+    skip_globs = tuple(ignore_dir_globs)
+    root = os.path.abspath(root)
+
+    # Stack of (abs dir, rel dir, gitignore rules in effect)
+    stack: List[Tuple[str, str, List[_GitignoreRule]]] = [(root, "", [])]
+    while stack:
+        dir_path, rel_dir, rules = stack.pop()
+        try:
+            with os.scandir(dir_path) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError:
+            continue
+
+        if use_gitignore and any(e.name == ".gitignore" for e in entries):
+            rules = rules + _read_gitignore(os.path.join(dir_path, ".gitignore"), rel_dir)
+
+        subdirs = []
+        for entry in entries:
+            rel_path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+            try:
+                is_dir = entry.is_dir(follow_symlinks=follow_symlinks)
+            except OSError:
+                continue
+
+            if is_dir:
+                if entry.name in skip_names or any(fnmatch.fnmatchcase(entry.name, g) for g in skip_globs):
+                    continue
+                if rules and _ignored_by(rules, rel_path, True):
+                    continue
+                subdirs.append((entry.path, rel_path, rules))
+                continue
+
+            if suffix_tuple is not None and not entry.name.endswith(suffix_tuple):
+                continue
+            if rules and _ignored_by(rules, rel_path, False):
+                continue
+            try:
+                st = entry.stat(follow_symlinks=follow_symlinks)
+            except OSError:
+                continue
+            yield ScanEntry(entry.path, rel_path.replace("/", os.sep), entry.name, st.st_size, st.st_mtime_ns)
+
+        # Reverse so the stack pops subdirectories in sorted order
+        stack.extend(reversed(subdirs))
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Live reindexing for the MCP servers.
+
+A LiveReindexer keeps per-file parse results for a set of source trees and,
+whenever files change, re-parses only those files, builds a complete new
+snapshot off to the side and hands it to `on_swap` (which rebinds the
+server's index global in a single assignment). Queries never wait on a
+rebuild and never see a half-built index.
+
+Change detection uses watchdog (inotify on Linux, FSEvents on macOS) when it
+is installed, falling back to polling. Either way the actual diff is a cheap
+(mtime, size) walk with fs_scan, so bursts of events, renames and deleted
+directories are all handled the same way.
+"""
+
+import os
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from fs_scan import DEFAULT_IGNORE_DIRS, scan
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except Exception:
+    FileSystemEventHandler = object
+    Observer = None
+
+
+def env_enabled(name: str = "MCP_LIVE_REINDEX") -> bool:
+    return os.getenv(name, "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def env_paths(name: str, default: Sequence[str]) -> List[str]:
+    """os.pathsep-separated path list from the environment, else `default`."""
+    value = os.getenv(name, "").strip()
+    if not value:
+        return list(default)
+    return [os.path.expanduser(p) for p in value.split(os.pathsep) if p]
+
+
+class _WakeHandler(FileSystemEventHandler):
+    def __init__(self, reindexer: "LiveReindexer"):
+        super().__init__()
+        self.reindexer = reindexer
+
+    def on_any_event(self, event) -> None:
+        paths = [getattr(event, "src_path", ""), getattr(event, "dest_path", "")]
+        if event.is_directory or any(str(p).endswith(self.reindexer.suffixes) for p in paths if p):
+            self.reindexer.wake()
+
+
+class LiveReindexer:
+    """
+    load_file(path) -> per-file data (None drops the file)
+    build({path: data}) -> snapshot
+    on_swap(snapshot) is called from the watcher thread after every rebuild.
+    submit(fn) -> Future, if given, runs the parsing and the build (e.g. on
+    ToolRuntime's CPU pool, so they count against its bound); else they run
+    on the watcher thread.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        roots: Iterable[str],
+        suffixes: Iterable[str],
+        load_file: Callable[[str], Any],
+        build: Callable[[Dict[str, Any]], Any],
+        on_swap: Callable[[Any], None],
+        ignore_dirs: Iterable[str] = DEFAULT_IGNORE_DIRS,
+        poll_interval: float = float(os.getenv("MCP_REINDEX_POLL_S", "2")),
+        debounce: float = float(os.getenv("MCP_REINDEX_DEBOUNCE_S", "0.5")),
+        submit: Optional[Callable[[Callable[[], Any]], Future]] = None,
+    ):
+        self.name = name
+        self.roots = [os.path.abspath(r) for r in roots]
+        self.suffixes = tuple(suffixes)
+        self.load_file = load_file
+        self.build = build
+        self.on_swap = on_swap
+        self.ignore_dirs = frozenset(ignore_dirs)
+        self.poll_interval = poll_interval
+        self.debounce = debounce
+        self.submit = submit
+
+        self._files: Dict[str, Any] = {}
+        self._stats: Dict[str, Tuple[int, int]] = {}
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._observer = None
+
+        self.generation = 0
+        self.last_build_s = 0.0
+
+    # =====================
+    # LIFECYCLE
+    # =====================
+
+    def prime(self, stats: Dict[str, Tuple[int, int]], files: Dict[str, Any]) -> "LiveReindexer":
+        """
+        Seeds the state from an index already on disk: {path: (mtime_ns, size)}
+        as of that index, and {path: data} served from it. The first refresh
+        then re-parses only files whose stat differs (or that `stats` lacks).
+        Call before start().
+        """
+        self._stats = dict(stats)
+        self._files = dict(files)
+        return self
+
+    def start(self) -> "LiveReindexer":
+        roots = [r for r in self.roots if os.path.isdir(r)]
+        for missing in sorted(set(self.roots) - set(roots)):
+            self._log(f"watch root not found: {missing}")
+
+        if Observer is not None and roots:
+            try:
+                observer = Observer()
+                handler = _WakeHandler(self)
+                for root in roots:
+                    observer.schedule(handler, root, recursive=True)
+                observer.daemon = True
+                observer.start()
+                self._observer = observer
+            except Exception as e:
+                self._log(f"file events unavailable ({e}); polling every {self.poll_interval}s")
+        mode = "file events" if self._observer else f"polling every {self.poll_interval}s"
+        self._log(f"watching {len(roots)} tree(s) ({mode})")
+
+        self._thread = threading.Thread(target=self._run, name=f"reindex-{self.name}", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._observer is not None:
+            self._observer.stop()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    # =====================
+    # REINDEX
+    # =====================
+
+    def refresh(self) -> int:
+        """One diff pass; rebuilds and swaps if anything changed. Returns the number of changed files."""
+        current: Dict[str, Tuple[int, int]] = {}
+        for root in self.roots:
+            if not os.path.isdir(root):
+                continue
+            for entry in scan(root, suffixes=self.suffixes, ignore_dirs=self.ignore_dirs):
+                current[entry.path] = (entry.mtime_ns, entry.size)
+
+        changed = [p for p, st in current.items() if self._stats.get(p) != st]
+        removed = [p for p in self._stats if p not in current]
+        if not changed and not removed:
+            return 0
+
+        t0 = time.perf_counter()
+
+        def rebuild() -> Tuple[Dict[str, Any], Any]:
+            files = dict(self._files)
+            for path in removed:
+                files.pop(path, None)
+            for path in changed:
+                try:
+                    data = self.load_file(path)
+                except Exception as e:
+                    self._log(f"failed to index {path}: {e}")
+                    data = None
+                if data is None:
+                    files.pop(path, None)
+                else:
+                    files[path] = data
+            return files, self.build(files)
+
+        files, snapshot = self.submit(rebuild).result() if self.submit else rebuild()
+        self._files, self._stats = files, current
+        self.on_swap(snapshot)
+
+        self.generation += 1
+        self.last_build_s = time.perf_counter() - t0
+        self._log(
+            f"snapshot {self.generation}: {len(changed)} changed, {len(removed)} removed, "
+            f"{len(files)} files ({self.last_build_s * 1000:.0f} ms)"
+        )
+        return len(changed) + len(removed)
+
+    def _run(self) -> None:
+        # With file events the timeout is only a safety net for missed events
+        timeout = self.poll_interval if self._observer is None else max(self.poll_interval, 30.0)
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                self._log(f"reindex failed: {type(e).__name__}: {e}")
+            if self._wake.wait(timeout) and not self._stop.is_set():
+                # Let bursts (saves, git checkouts) settle into one rebuild
+                time.sleep(self.debounce)
+            self._wake.clear()
+
+    def _log(self, msg: str) -> None:
+        print(f"[{self.name}][reindex] {msg}", file=sys.stderr, flush=True)
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Asyncio runtime for MCP servers built on MCPServerBase.
+
+- a bounded thread pool (and an optional process pool) for blocking and
+  CPU-heavy work: sync tools, index loads and live-reindex builds run there
+  instead of on the event loop or at import
+- per-tool concurrency limits with a bounded wait queue; once the queue is
+  full further calls are shed immediately with an error string instead of
+  piling up
+- in-flight tracking for graceful shutdown: `drain()` stops admitting calls
+  and waits (up to a timeout) for the running ones to finish
+
+    runtime = ToolRuntime(RuntimeConfig.from_env())
+    mcp.add_tool(runtime.guard(search, "search", max_concurrency=2), name="search")
+    ...
+    await runtime.drain(10.0)
+    runtime.close()
+"""
+
+import asyncio
+import functools
+import inspect
+import os
+import threading
+import time
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+
+class Overloaded(RuntimeError):
+    pass
+
+
+@dataclass(frozen=True)
+class RuntimeConfig:
+    workers: int = min(8, (os.cpu_count() or 1) + 4)
+    process_workers: int = 0
+    tool_concurrency: int = 4
+    tool_queue: int = 16
+    drain_timeout_s: float = 10.0
+
+    @classmethod
+    def from_env(cls, base: Optional["RuntimeConfig"] = None) -> "RuntimeConfig":
+        base = base or cls()
+        return cls(
+            workers=int(os.getenv("MCP_WORKERS", base.workers)),
+            process_workers=int(os.getenv("MCP_PROCESS_WORKERS", base.process_workers)),
+            tool_concurrency=int(os.getenv("MCP_TOOL_CONCURRENCY", base.tool_concurrency)),
+            tool_queue=int(os.getenv("MCP_TOOL_QUEUE", base.tool_queue)),
+            drain_timeout_s=float(os.getenv("MCP_DRAIN_TIMEOUT_S", base.drain_timeout_s)),
+        )
+
+
+class ToolLimiter:
+    """At most `max_concurrency` running calls and `max_queue` waiting ones; beyond that, Overloaded."""
+
+    def __init__(self, name: str, max_concurrency: int, max_queue: int):
+        self.name = name
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.max_queue = max(0, int(max_queue))
+        self.running = 0
+        self.waiting = 0
+        self.shed = 0
+        self._sem: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._sem is None or self._loop is not loop:
+            self._sem = asyncio.Semaphore(self.max_concurrency)
+            self._loop = loop
+        return self._sem
+
+    async def acquire(self) -> None:
+        sem = self._semaphore()
+        if self.running >= self.max_concurrency and self.waiting >= self.max_queue:
+            self.shed += 1
+            raise Overloaded(
+                f"tool '{self.name}' is overloaded ({self.running} running, {self.waiting} queued); retry shortly"
+            )
+        self.waiting += 1
+        try:
+            await sem.acquire()
+        finally:
+            self.waiting -= 1
+        self.running += 1
+
+    def release(self) -> None:
+        self.running -= 1
+        self._semaphore().release()
+
+
+class ToolRuntime:
+    def __init__(self, config: RuntimeConfig = RuntimeConfig(), log: Optional[Callable[[str], None]] = None):
+        self.config = config
+        self.limiters: Dict[str, ToolLimiter] = {}
+        self.in_flight = 0
+        self.draining = False
+        self._log = log or (lambda msg: None)
+        self._threads: Optional[ThreadPoolExecutor] = None
+        self._processes: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._idle: Optional[asyncio.Event] = None
+
+    # =====================
+    # POOLS
+    # =====================
+
+    @property
+    def threads(self) -> ThreadPoolExecutor:
+        if self._threads is None:
+            with self._lock:
+                if self._threads is None:
+                    self._threads = ThreadPoolExecutor(max_workers=max(1, self.config.workers),
+                                                       thread_name_prefix="mcp-worker")
+        return self._threads
+
+    @property
+    def processes(self) -> Executor:
+        """Process pool for picklable CPU-bound work; the thread pool when MCP_PROCESS_WORKERS=0."""
+        if self.config.process_workers <= 0:
+            return self.threads
+        if self._processes is None:
+            with self._lock:
+                if self._processes is None:
+                    self._processes = ProcessPoolExecutor(max_workers=self.config.process_workers)
+        return self._processes
+
+    async def run_blocking(self, fn: Callable, *args: Any, **kwargs: Any) -> Any:
+        """fn(*args, **kwargs) on the bounded thread pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.threads, functools.partial(fn, *args, **kwargs))
+
+    def submit_cpu(self, fn: Callable, *args: Any, in_process: bool = False) -> Future:
+        """
+        CPU-heavy fn(*args) (index loads and builds, scoring) on the process
+        pool if configured, else the bounded thread pool. in_process=True
+        always uses the thread pool: for work whose result must stay in this
+        process (mmapped indexes, module globals) or that does not pickle.
+        """
+        return (self.threads if in_process else self.processes).submit(fn, *args)
+
+    async def run_cpu(self, fn: Callable, *args: Any, in_process: bool = False) -> Any:
+        """Awaitable submit_cpu."""
+        return await asyncio.wrap_future(self.submit_cpu(fn, *args, in_process=in_process))
+
+    # =====================
+    # TOOLS
+    # =====================
+
+    def limiter(self, name: str, max_concurrency: Optional[int] = None, max_queue: Optional[int] = None) -> ToolLimiter:
+        lim = self.limiters.get(name)
+        if lim is None:
+            lim = self.limiters[name] = ToolLimiter(
+                name,
+                self.config.tool_concurrency if max_concurrency is None else max_concurrency,
+                self.config.tool_queue if max_queue is None else max_queue,
+            )
+        return lim
+
+    def guard(self, fn: Callable, name: str, max_concurrency: Optional[int] = None,
+              max_queue: Optional[int] = None, offload: bool = True) -> Callable:
+        """
+        Async wrapper for a tool (same signature): admission control, the
+        per-tool limit, and (for sync tools, unless offload=False) execution
+        on the thread pool. Shed or refused calls return an "Error: ..." string.
+        """
+        limiter = self.limiter(name, max_concurrency, max_queue)
+        is_async = inspect.iscoroutinefunction(fn)
+
+        @functools.wraps(fn)
+        async def guarded(*args, **kwargs):
+            if self.draining:
+                return f"Error: server is shutting down; '{name}' was not run"
+            try:
+                await limiter.acquire()
+            except Overloaded as e:
+                return f"Error: {e}"
+            self._enter()
+            try:
+                if is_async:
+                    return await fn(*args, **kwargs)
+                if offload:
+                    return await self.run_blocking(fn, *args, **kwargs)
+                return fn(*args, **kwargs)
+            finally:
+                limiter.release()
+                self._exit()
+
+        return guarded
+
+    def _enter(self) -> None:
+        self.in_flight += 1
+        if self._idle is not None:
+            self._idle.clear()
+
+    def _exit(self) -> None:
+        self.in_flight -= 1
+        if self.in_flight == 0 and self._idle is not None:
+            self._idle.set()
+
+    def stats(self) -> str:
+        lines = [f"in flight: {self.in_flight}" + (" (draining)" if self.draining else "")]
+        for lim in self.limiters.values():
+            if lim.running or lim.waiting or lim.shed:
+                lines.append(f"{lim.name}: running {lim.running}/{lim.max_concurrency}, "
+                             f"queued {lim.waiting}/{lim.max_queue}, shed {lim.shed}")
+        return "\n".join(lines)
+
+    # =====================
+    # SHUTDOWN
+    # =====================
+
+    async def drain(self, timeout_s: Optional[float] = None) -> bool:
+        """Refuses new calls and waits for in-flight ones. True if all finished in time."""
+        self.draining = True
+        timeout_s = self.config.drain_timeout_s if timeout_s is None else timeout_s
+        if self.in_flight == 0:
+            return True
+        self._idle = asyncio.Event()
+        if self.in_flight == 0:
+            return True
+        self._log(f"Draining {self.in_flight} in-flight tool call(s) (up to {timeout_s:g}s)")
+        t0 = time.monotonic()
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout_s)
+        except asyncio.TimeoutError:
+            self._log(f"Drain timed out with {self.in_flight} call(s) still running")
+            return False
+        self._log(f"Drained in {time.monotonic() - t0:.2f}s")
+        return True
+
+    def close(self, wait: bool = True) -> None:
+        if self._threads is not None:
+            self._threads.shutdown(wait=wait, cancel_futures=not wait)
+        if self._processes is not None:
+            self._processes.shutdown(wait=wait, cancel_futures=not wait)
@@ -1,13 +1,20 @@
 #!/usr/bin/env python3
 
 import argparse
+import asyncio
 import json
 import os
+import signal
 import sys
 import time
+from contextlib import suppress
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, Optional, Sequence, Tuple
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+from mcp_runtime import RuntimeConfig, ToolRuntime
+from metrics import REGISTRY, STATS_TOOL, MetricsRegistry, instrument_tool
+from profiling import Profiler
 
 try:
     from dotenv import load_dotenv
@@ -17,6 +24,9 @@ except Exception:
 
 JSONDict = Dict[str, Any]
 
+# After the last in-flight call returns, time for its reply to be written before the transport is cancelled
+DRAIN_FLUSH_S = 0.25
+
 
 @dataclass(frozen=True)
 class MCPEnvSpec:
@@ -41,6 +51,8 @@ class MCPServerSpec:
     default_port: int = 3001
     env: MCPEnvSpec = MCPEnvSpec()
     paths: MCPPathsSpec = MCPPathsSpec()
+    # Defaults for the tool runtime; MCP_WORKERS, MCP_TOOL_CONCURRENCY, ... override them
+    runtime: RuntimeConfig = RuntimeConfig()
 
 
 class MCPBaseError(RuntimeError):
@@ -54,11 +66,22 @@ class MCPServerBase:
     - required env validation
     - portable machine-local path config
     - safe logging (never prints secrets)
+    - metrics (tool-call histograms, per-stage timers; see metrics.py)
+    - opt-in profiling of slow calls (--profile / MCP_PROFILE=1; see profiling.py)
+    - asyncio lifecycle: startup -> warmup -> serve, graceful drain on SIGINT/SIGTERM
+    - tool runtime: sync tools run on a bounded thread pool, per-tool
+      concurrency limits shed load once their queue is full (see mcp_runtime.py)
     - minimal CLI and lifecycle hooks
     """
 
     def __init__(self, spec: MCPServerSpec):
         self.spec = spec
+        self.transport = "stdio"
+        self.mcp: Any = None
+        self.metrics: MetricsRegistry = REGISTRY
+        self.profiler = Profiler.from_env(log=lambda msg: self._log("info", msg))
+        self.runtime = ToolRuntime(RuntimeConfig.from_env(spec.runtime), log=lambda msg: self._log("info", msg))
+        self._stopped = False
         self.repo_root = self._resolve_repo_root()
         self.paths_cfg = self._load_local_paths_config()
         self.env = self._load_and_validate_env()
@@ -67,8 +90,55 @@ class MCPServerBase:
     # OVERRIDE THESE
     # =====================
 
+    def register_tools(self) -> None:
+        """Register tools with self.add_tool / @self.tool(); called by the default startup()."""
+        return
+
+    async def startup(self) -> None:
+        """
+        Load indexes, open connections. The default creates the FastMCP app,
+        registers tools and adds `server_stats` (outside the limits, so it
+        answers under load).
+        """
+        if self.mcp is None:
+            self.create_mcp()
+            self.register_tools()
+            self.mcp.add_tool(self.server_stats, name=STATS_TOOL)
+
+    async def warmup(self) -> None:
+        """Optional: prime caches before the first request (runs after startup, before serving)."""
+        return
+
+    async def serve(self, host: str, port: int) -> None:
+        """Serves self.mcp over --transport until the client disconnects or the task is cancelled."""
+        if self.mcp is None:
+            raise NotImplementedError("Subclass must set up self.mcp in startup() or implement serve(host, port)")
+        self._log("info", f"Serving {len(self.mcp._tool_manager.list_tools())} tools over {self.transport}")
+        if self.transport == "stdio":
+            await self.mcp.run_stdio_async()
+            return
+        self.mcp.settings.host = host
+        self.mcp.settings.port = port
+        if self.transport == "sse":
+            await self.mcp.run_sse_async()
+        else:
+            await self.mcp.run_streamable_http_async()
+
     def run(self, host: str, port: int) -> None:
-        raise NotImplementedError("Subclass must implement run(host, port)")
+        # Not asyncio.run(): its shutdown joins the default executor, where the
+        # stdio transport keeps a thread blocked reading stdin
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            loop.run_until_complete(self._lifecycle(host, port))
+            pending = [t for t in asyncio.all_tasks(loop) if not t.done()]
+            for task in pending:
+                task.cancel()
+            loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+            loop.run_until_complete(loop.shutdown_asyncgens())
+        finally:
+            asyncio.set_event_loop(None)
+            loop.close()
 
     def shutdown(self) -> None:
         return
@@ -86,17 +156,109 @@ class MCPServerBase:
         self._log("info", f"Repo root: {self.repo_root}")
         self._log("info", f"Local paths loaded: {bool(self.paths_cfg)}")
         self._log("info", f"Secrets loaded: {self._secrets_loaded_summary()}")
+        self.profiler.start()
 
         try:
             self.run(args.host, args.port)
         except KeyboardInterrupt:
             self._log("warn", "Shutdown requested (Ctrl+C)")
-            self.shutdown()
-            self._log("info", "Shutdown complete")
+            self._stop()
         except Exception as e:
             self._log("error", f"Unhandled exception: {type(e).__name__}: {e}")
             raise
 
+    # =====================
+    # LIFECYCLE
+    # =====================
+
+    async def _lifecycle(self, host: str, port: int) -> None:
+        loop = asyncio.get_running_loop()
+        stop = asyncio.Event()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            with suppress(NotImplementedError, RuntimeError, ValueError):
+                loop.add_signal_handler(sig, stop.set)
+
+        drained = True
+        try:
+            with self.timed("startup"):
+                await self.startup()
+            with self.timed("warmup"):
+                await self.warmup()
+
+            serving = asyncio.ensure_future(self.serve(host, port))
+            stopping = asyncio.ensure_future(stop.wait())
+            await asyncio.wait({serving, stopping}, return_when=asyncio.FIRST_COMPLETED)
+            if stop.is_set():
+                self._log("warn", "Shutdown requested")
+
+            # Let in-flight tool calls finish (and their replies go out) before the transport stops
+            drained = await self.runtime.drain()
+            stopping.cancel()
+            if not serving.done():
+                await asyncio.sleep(DRAIN_FLUSH_S)
+                serving.cancel()
+                with suppress(asyncio.CancelledError):
+                    await serving
+            elif not serving.cancelled() and serving.exception() is not None:
+                raise serving.exception()
+        finally:
+            self._stop(wait=drained)
+
+    def _stop(self, wait: bool = True) -> None:
+        if self._stopped:
+            return
+        self._stopped = True
+        self.shutdown()
+        self.runtime.close(wait=wait)
+        self._log("info", "Shutdown complete")
+
+    # =====================
+    # TOOLS
+    # =====================
+
+    def create_mcp(self) -> Any:
+        from mcp.server.fastmcp import FastMCP
+
+        self.mcp = FastMCP(self.spec.name)
+        return self.mcp
+
+    def add_tool(
+        self,
+        fn: Callable,
+        name: Optional[str] = None,
+        title: Optional[str] = None,
+        description: Optional[str] = None,
+        max_concurrency: Optional[int] = None,
+        max_queue: Optional[int] = None,
+        offload: bool = True,
+        metrics_labels: Optional[Tuple[str, str]] = None,
+    ) -> str:
+        """
+        Registers fn on self.mcp with profiling, the per-tool limit (sync tools
+        run on the worker pool unless offload=False) and call metrics.
+        Returns the tool name.
+        """
+        name = name or fn.__name__
+        server, tool = metrics_labels or (self.spec.name, name)
+        wrapped = self.runtime.guard(self.profiled(fn, name), name, max_concurrency, max_queue, offload)
+        wrapped = instrument_tool(wrapped, server, tool, self.metrics)
+        self.mcp.add_tool(wrapped, name=name, title=title, description=description or fn.__doc__)
+        return name
+
+    def tool(self, name: Optional[str] = None, **options: Any) -> Callable[[Callable], Callable]:
+        """Decorator form of add_tool: @self.tool(max_concurrency=2)."""
+        def register(fn: Callable) -> Callable:
+            self.add_tool(fn, name, **options)
+            return fn
+        return register
+
+    def server_stats(self) -> str:
+        """
+        Tool-call latency (p50/p95/p99), response sizes and error counts, plus
+        in-flight calls, queue depth and shed calls per tool.
+        """
+        return self.metrics.summary() + "\n\n" + self.runtime.stats()
+
     # =====================
     # ENV
     # =====================
@@ -179,13 +341,24 @@ class MCPServerBase:
         return {}
 
     # =====================
-    # LOGGING
+    # LOGGING / METRICS
     # =====================
 
-    def _log(self, level: str, msg: str) -> None:
+    def _format_log(self, level: str, msg: str, fields: JSONDict) -> str:
         ts = time.strftime("%Y-%m-%d %H:%M:%S")
-        out = sys.stderr if level in ("warn", "error") else sys.stdout
-        print(f"[{self.spec.name}][{level.upper()}][{ts}] {msg}", file=out, flush=True)
+        extra = "".join(f" {k}={v}" for k, v in fields.items())
+        return f"[{self.spec.name}][{level.upper()}][{ts}] {msg}{extra}"
+
+    def _log(self, level: str, msg: str, **fields: Any) -> None:
+        # Under stdio, stdout is the protocol channel
+        out = sys.stderr if level in ("warn", "error") or self.transport == "stdio" else sys.stdout
+        print(self._format_log(level, msg, fields), file=out, flush=True)
+
+    def timed(self, stage: str, **labels: str):
+        """Context manager: records the block in mcp_stage_seconds{server,stage,...}."""
+        return self.metrics.timer(
+            "mcp_stage_seconds", "Server stage latency", server=self.spec.name, stage=stage, **labels
+        )
 
     def _fatal(self, msg: str) -> None:
         self._log("error", msg)
@@ -195,8 +368,26 @@ class MCPServerBase:
     # CLI
     # =====================
 
-    def _parse_args(self, argv: Optional[Sequence[str]]) -> argparse.Namespace:
+    def _arg_parser(self) -> argparse.ArgumentParser:
         p = argparse.ArgumentParser(prog=self.spec.name)
         p.add_argument("--host", default=self.spec.default_host)
         p.add_argument("--port", type=int, default=self.spec.default_port)
-        return p.parse_args(list(argv) if argv is not None else None)
\ No newline at end of file
+        p.add_argument("--transport", choices=("stdio", "sse", "streamable-http"), default="stdio")
+        p.add_argument("--profile", action="store_true", default=None,
+                       help="profile calls slower than --profile-threshold-ms (also MCP_PROFILE=1)")
+        p.add_argument("--profile-threshold-ms", type=float, default=None)
+        p.add_argument("--profile-dir", default=None)
+        return p
+
+    def _parse_args(self, argv: Optional[Sequence[str]]) -> argparse.Namespace:
+        args = self._arg_parser().parse_args(list(argv) if argv is not None else None)
+        self._apply_common_args(args)
+        return args
+
+    def _apply_common_args(self, args: argparse.Namespace) -> None:
+        self.transport = args.transport
+        self.profiler.configure(args.profile, args.profile_dir, args.profile_threshold_ms)
+
+    def profiled(self, fn: Any, label: str) -> Any:
+        """fn wrapped for slow-call profiling; fn itself when profiling is off."""
+        return self.profiler.wrap(fn, label)
\ No newline at end of file
@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""
+In-process metrics for the MCP servers and the JUCE RAG HTTP server.
+
+Fixed-bucket histograms and counters, keyed by name + labels, guarded by one
+lock each (an observation is a bisect and three adds, well under a
+microsecond). Exposed as Prometheus text (`render_prometheus`, served on the
+RAG server's /metrics), as a plain-text summary with bucket-estimated
+percentiles (`summary`, returned by the `server_stats` MCP tool) or as JSON
+(`snapshot`, written at exit when MCP_METRICS_DUMP names a file).
+
+Tool calls are recorded by `instrument_tool` / `instrument_server`:
+    mcp_tool_seconds{server,tool}        latency histogram
+    mcp_tool_response_bytes{server,tool} response size histogram
+    mcp_tool_errors_total{server,tool}   exceptions and "Error..." results
+"""
+
+import atexit
+import bisect
+import functools
+import inspect
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+LATENCY_BUCKETS_S: Tuple[float, ...] = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+SIZE_BUCKETS_BYTES: Tuple[float, ...] = tuple(float(4 ** i * 64) for i in range(9))  # 64 B .. 4 MiB
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+# Name of the stats tool on every MCP server, standalone or hosted.
+STATS_TOOL = "server_stats"
+
+
+class Histogram:
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS_S):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.count += 1
+            self.sum += value
+            if value < self.min:
+                self.min = value
+            if value > self.max:
+                self.max = value
+
+    def quantile(self, q: float) -> float:
+        """Linear interpolation inside the bucket holding the q-th observation."""
+        with self._lock:
+            counts = list(self.counts)
+            total, lo_seen, hi_seen = self.count, self.min, self.max
+        if total == 0:
+            return 0.0
+        rank = q * total
+        seen = 0
+        for i, c in enumerate(counts):
+            if c and seen + c >= rank:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else hi_seen
+                lower, upper = max(lower, lo_seen), min(upper, hi_seen)
+                return lower + (upper - lower) * ((rank - seen) / c)
+            seen += c
+        return hi_seen
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "min": self.min if self.count else 0.0,
+            "max": self.max,
+            "p50": self.quantile(0.50),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+        }
+
+
+class Counter:
+    def __init__(self) -> None:
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._help: Dict[str, str] = {}
+        self._histograms: Dict[str, Dict[LabelKey, Histogram]] = {}
+        self._counters: Dict[str, Dict[LabelKey, Counter]] = {}
+
+    # =====================
+    # RECORDING
+    # =====================
+
+    def histogram(self, name: str, help: str = "", buckets: Sequence[float] = LATENCY_BUCKETS_S,
+                  **labels: str) -> Histogram:
+        key = tuple(sorted((k, str(v)) for k, v in labels.items()))
+        family = self._histograms.get(name)
+        hist = family.get(key) if family is not None else None
+        if hist is None:
+            with self._lock:
+                family = self._histograms.setdefault(name, {})
+                hist = family.get(key)
+                if hist is None:
+                    hist = family[key] = Histogram(buckets)
+                    self._help.setdefault(name, help)
+        return hist
+
+    def counter(self, name: str, help: str = "", **labels: str) -> Counter:
+        key = tuple(sorted((k, str(v)) for k, v in labels.items()))
+        family = self._counters.get(name)
+        ctr = family.get(key) if family is not None else None
+        if ctr is None:
+            with self._lock:
+                family = self._counters.setdefault(name, {})
+                ctr = family.get(key)
+                if ctr is None:
+                    ctr = family[key] = Counter()
+                    self._help.setdefault(name, help)
+        return ctr
+
+    @contextmanager
+    def timer(self, name: str, help: str = "", **labels: str) -> Iterator[None]:
+        """Observes the block's wall time (seconds) in histogram `name`, even if it raises."""
+        hist = self.histogram(name, help, **labels)
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            hist.observe(time.perf_counter() - t0)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+    # =====================
+    # EXPORT
+    # =====================
+
+    def render_prometheus(self) -> str:
+        lines: List[str] = []
+        with self._lock:
+            histograms = {n: dict(f) for n, f in self._histograms.items()}
+            counters = {n: dict(f) for n, f in self._counters.items()}
+        for name in sorted(counters):
+            lines.append(f"# HELP {name} {self._help.get(name) or name}")
+            lines.append(f"# TYPE {name} counter")
+            for key, ctr in sorted(counters[name].items()):
+                lines.append(f"{name}{_labels(key)} {_num(ctr.value)}")
+        for name in sorted(histograms):
+            lines.append(f"# HELP {name} {self._help.get(name) or name}")
+            lines.append(f"# TYPE {name} histogram")
+            for key, hist in sorted(histograms[name].items()):
+                with hist._lock:
+                    counts, count, total = list(hist.counts), hist.count, hist.sum
+                cumulative = 0
+                for bound, c in zip(hist.buckets, counts):
+                    cumulative += c
+                    lines.append(f"{name}_bucket{_labels(key + (('le', _num(bound)),))} {cumulative}")
+                lines.append(f"{name}_bucket{_labels(key + (('le', '+Inf'),))} {count}")
+                lines.append(f"{name}_sum{_labels(key)} {_num(total)}")
+                lines.append(f"{name}_count{_labels(key)} {count}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            histograms = {n: dict(f) for n, f in self._histograms.items()}
+            counters = {n: dict(f) for n, f in self._counters.items()}
+        return {
+            "counters": {
+                name: [{"labels": dict(key), "value": c.value} for key, c in sorted(family.items())]
+                for name, family in sorted(counters.items())
+            },
+            "histograms": {
+                name: [{"labels": dict(key), **h.snapshot()} for key, h in sorted(family.items())]
+                for name, family in sorted(histograms.items())
+            },
+        }
+
+    def summary(self, prefix: str = "", labels: Optional[Dict[str, str]] = None) -> str:
+        """
+        One line per series: count, mean and p50/p95/p99/max (ms for *_seconds,
+        B for *_bytes). `labels` keeps only the series carrying all of them.
+        """
+        snap = self.snapshot()
+        wanted = (labels or {}).items()
+
+        def keep(s: Dict[str, Any]) -> bool:
+            return all(s["labels"].get(k) == v for k, v in wanted)
+
+        lines: List[str] = []
+        for name, series in snap["histograms"].items():
+            if not name.startswith(prefix):
+                continue
+            scale, unit = (1000.0, "ms") if name.endswith("_seconds") else (1.0, "B" if name.endswith("_bytes") else "")
+            for s in series:
+                if not s["count"] or not keep(s):
+                    continue
+                mean = s["sum"] / s["count"] * scale
+                lines.append(
+                    f"{name}{_labels(tuple(s['labels'].items()))} n={s['count']} mean={mean:.2f}{unit} "
+                    f"p50={s['p50'] * scale:.2f}{unit} p95={s['p95'] * scale:.2f}{unit} "
+                    f"p99={s['p99'] * scale:.2f}{unit} max={s['max'] * scale:.2f}{unit}"
+                )
+        for name, series in snap["counters"].items():
+            if name.startswith(prefix):
+                lines.extend(
+                    f"{name}{_labels(tuple(s['labels'].items()))} {_num(s['value'])}" for s in series if keep(s)
+                )
+        return "\n".join(lines) if lines else "No metrics recorded yet."
+
+    def dump(self, path: str) -> None:
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f, indent=2)
+        os.replace(tmp, path)
+
+
+def _num(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _labels(key: Sequence[Tuple[str, str]]) -> str:
+    if not key:
+        return ""
+    escaped = (
+        f'{k}="' + str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"' for k, v in key
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+REGISTRY = MetricsRegistry()
+
+
+# =====================
+# MCP TOOLS
+# =====================
+
+def _record_call(registry: MetricsRegistry, server: str, tool: str, seconds: float,
+                 result: Any, error: bool) -> None:
+    registry.histogram("mcp_tool_seconds", "MCP tool call latency", server=server, tool=tool).observe(seconds)
+    if isinstance(result, str):
+        registry.histogram(
+            "mcp_tool_response_bytes", "MCP tool response size", SIZE_BUCKETS_BYTES, server=server, tool=tool
+        ).observe(len(result.encode("utf-8")))
+        error = error or result.startswith("Error")
+    if error:
+        registry.counter("mcp_tool_errors_total", "MCP tool calls that raised or returned an error",
+                         server=server, tool=tool).inc()
+
+
+def instrument_tool(fn: Callable, server: str, tool: str, registry: Optional[MetricsRegistry] = None) -> Callable:
+    """Wraps a tool function (sync or async) so every call is timed and sized; the signature is kept."""
+    registry = registry or REGISTRY
+    if getattr(fn, "__metrics_wrapped__", False):
+        return fn
+
+    if inspect.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            t0 = time.perf_counter()
+            result, error = None, True
+            try:
+                result = await fn(*args, **kwargs)
+                error = False
+                return result
+            finally:
+                _record_call(registry, server, tool, time.perf_counter() - t0, result, error)
+    else:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            t0 = time.perf_counter()
+            result, error = None, True
+            try:
+                result = fn(*args, **kwargs)
+                error = False
+                return result
+            finally:
+                _record_call(registry, server, tool, time.perf_counter() - t0, result, error)
+
+    wrapper.__metrics_wrapped__ = True
+    return wrapper
+
+
+def instrument_server(mcp: Any, server: str, stats_tool: str = STATS_TOOL,
+                      registry: Optional[MetricsRegistry] = None) -> None:
+    """
+    Instruments every tool registered on a FastMCP instance, adds a `stats_tool`
+    returning the summary, and dumps JSON at exit if MCP_METRICS_DUMP is set.
+    """
+    registry = registry or REGISTRY
+    for tool in mcp._tool_manager.list_tools():
+        tool.fn = instrument_tool(tool.fn, server, tool.name, registry)
+
+    def stats() -> str:
+        """Latency, response-size and error metrics for this server's tool calls."""
+        return registry.summary()
+
+    mcp.add_tool(stats, name=stats_tool)
+    dump_on_exit(registry)
+
+
+_dumps_registered: set = set()
+
+
+def dump_on_exit(registry: Optional[MetricsRegistry] = None, path: Optional[str] = None) -> Optional[str]:
+    registry = registry or REGISTRY
+    path = path or os.getenv("MCP_METRICS_DUMP", "").strip()
+    if not path or (id(registry), path) in _dumps_registered:
+        return path or None
+    _dumps_registered.add((id(registry), path))
+    atexit.register(registry.dump, path)
+    return path
@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+Compact, memory-mappable record index shared by the MCP servers.
+
+The ingest scripts write records (flat JSON objects) into a columnar binary
+file instead of pretty-printed JSON. Servers open it with mmap and decode
+only the records and fields a tool actually touches, so startup time and
+resident memory stay flat as indexes grow.
+
+Layout (native byte order, sections 8-byte aligned):
+    b"MCPPACK1"  u32 header length  JSON header {version, byteorder, count, fields, sections}
+    values       u64 offsets[n_values + 1] + value bytes (interned, deduplicated)
+    columns      one per field: u32 value id per record (MISSING if absent),
+                 or u64 offsets[count + 1] into the blob section for blob fields
+    blob         large text fields (snippets), never interned
+
+Every value starts with a one-byte tag: s = UTF-8 string, i = integer,
+j = any other JSON value (lists, bools, null, floats).
+
+Converter:
+    python packed_index.py dsp_index.json dsp_index.idx
+    python packed_index.py juce_docs/ juce_docs.idx     # directory of JSONL shards
+"""
+
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+MAGIC = b"MCPPACK1"
+FORMAT_VERSION = 1
+PACKED_SUFFIX = ".idx"
+
+MISSING = 0xFFFFFFFF
+
+# Fields stored in the blob section unless the caller says otherwise
+DEFAULT_BLOB_FIELDS = ("code_snippet", "api_signature")
+
+Record = Dict[str, Any]
+
+
+def _encode(value: Any) -> bytes:
+    if isinstance(value, str):
+        return b"s" + value.encode("utf-8")
+    if isinstance(value, int) and not isinstance(value, bool):
+        return b"i" + str(value).encode("ascii")
+    return b"j" + json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _decode(raw: bytes) -> Any:
+    tag, body = raw[:1], raw[1:]
+    if tag == b"s":
+        return body.decode("utf-8")
+    if tag == b"i":
+        return int(body)
+    return json.loads(body.decode("utf-8"))
+
+
+def _pad(f) -> None:
+    f.write(b"\0" * (-f.tell() % 8))
+
+
+def is_packed(path: str) -> bool:
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+# =====================
+# WRITE
+# =====================
+
+def write_packed(path: str, records: Iterable[Record], blob_fields: Sequence[str] = DEFAULT_BLOB_FIELDS) -> int:
+    """
+    Streams records into a packed index at `path` (atomic replace).
+    Blob fields are spooled to a temp file, so only the interned values and
+    the u32/u64 columns are held in memory. Returns the record count.
+    """
+    blob_set = set(blob_fields)
+    fields: List[str] = []
+    columns: Dict[str, array] = {}
+    interned: Dict[bytes, int] = {}
+    values: List[bytes] = []
+    count = 0
+
+    with tempfile.TemporaryFile() as blob:
+        for record in records:
+            for name in record:
+                if name not in columns:
+                    fields.append(name)
+                    if name in blob_set:
+                        # Earlier records lack the field: empty slices
+                        columns[name] = array("Q", [blob.tell()] * (count + 1))
+                    else:
+                        columns[name] = array("I", [MISSING] * count)
+
+            for name in fields:
+                column = columns[name]
+                present = name in record
+                if name in blob_set:
+                    if present:
+                        blob.write(_encode(record[name]))
+                    column.append(blob.tell())
+                elif present:
+                    raw = _encode(record[name])
+                    vid = interned.get(raw)
+                    if vid is None:
+                        vid = interned[raw] = len(values)
+                        values.append(raw)
+                    column.append(vid)
+                else:
+                    column.append(MISSING)
+            count += 1
+
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            # Section offsets are relative to the end of the header, which is
+            # only known once everything else has been laid out.
+            body = tempfile.TemporaryFile()
+            with body:
+                sections: Dict[str, Any] = {"columns": {}}
+
+                sections["values"] = body.tell()
+                offsets = array("Q", [0])
+                for raw in values:
+                    offsets.append(offsets[-1] + len(raw))
+                body.write(offsets.tobytes())
+                for raw in values:
+                    body.write(raw)
+                _pad(body)
+
+                for name in fields:
+                    sections["columns"][name] = body.tell()
+                    body.write(columns[name].tobytes())
+                    _pad(body)
+
+                sections["blob"] = body.tell()
+                blob.seek(0)
+                for chunk in iter(lambda: blob.read(1 << 20), b""):
+                    body.write(chunk)
+
+                header = json.dumps({
+                    "version": FORMAT_VERSION,
+                    "byteorder": sys.byteorder,
+                    "count": count,
+                    "n_values": len(values),
+                    "fields": [[name, "blob" if name in blob_set else "value"] for name in fields],
+                    "sections": sections,
+                }).encode("utf-8")
+                f.write(MAGIC)
+                f.write(struct.pack("<I", len(header)))
+                f.write(header)
+                _pad(f)
+
+                body.seek(0)
+                for chunk in iter(lambda: body.read(1 << 20), b""):
+                    f.write(chunk)
+        os.replace(tmp, path)
+    return count
+
+
+# =====================
+# READ
+# =====================
+
+class PackedIndex(Sequence):
+    """
+    Read-only, mmap-backed view of a packed index. Indexing returns a fresh
+    dict per record; `get(i, field)` and `column(field)` decode only what
+    they are asked for.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty file
+            self._file.close()
+            raise ValueError(f"{path} is not a packed index")
+        if self._mm[: len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a packed index")
+
+        (header_len,) = struct.unpack_from("<I", self._mm, len(MAGIC))
+        start = len(MAGIC) + 4
+        header = json.loads(self._mm[start:start + header_len].decode("utf-8"))
+        if header.get("version") != FORMAT_VERSION or header.get("byteorder") != sys.byteorder:
+            self.close()
+            raise ValueError(f"{path}: unsupported packed index (version/byte order); re-run the converter")
+        base = start + header_len
+        base += -base % 8
+
+        self._count = header["count"]
+        self.fields: List[str] = [name for name, _ in header["fields"]]
+        self._blob_fields = {name for name, kind in header["fields"] if kind == "blob"}
+
+        view = memoryview(self._mm)
+        sections = header["sections"]
+        n_values = header["n_values"]
+        values_at = base + sections["values"]
+        self._value_offsets = view[values_at:values_at + 8 * (n_values + 1)].cast("Q")
+        self._values_data = values_at + 8 * (n_values + 1)
+        self._blob_data = base + sections["blob"]
+        self._columns = {}
+        for name in self.fields:
+            at = base + sections["columns"][name]
+            if name in self._blob_fields:
+                self._columns[name] = view[at:at + 8 * (self._count + 1)].cast("Q")
+            else:
+                self._columns[name] = view[at:at + 4 * self._count].cast("I")
+        self._decoded: Dict[int, Any] = {}
+
+    def close(self) -> None:
+        # Views must be released before the mmap can close
+        for column in getattr(self, "_columns", {}).values():
+            column.release()
+        if hasattr(self, "_value_offsets"):
+            self._value_offsets.release()
+        self._columns = {}
+        if hasattr(self, "_mm"):
+            self._mm.close()
+        self._file.close()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self.record(j) for j in range(*i.indices(self._count))]
+        if i < 0:
+            i += self._count
+        if not 0 <= i < self._count:
+            raise IndexError(i)
+        return self.record(i)
+
+    def _value(self, vid: int) -> Any:
+        value = self._decoded.get(vid)
+        if value is None:
+            lo, hi = self._value_offsets[vid], self._value_offsets[vid + 1]
+            value = _decode(self._mm[self._values_data + lo:self._values_data + hi])
+            if isinstance(value, (str, int)):
+                # Immutable: safe to share between records
+                self._decoded[vid] = value
+        return value
+
+    def _field(self, i: int, name: str, default: Any = None) -> Any:
+        column = self._columns[name]
+        if name in self._blob_fields:
+            lo, hi = column[i], column[i + 1]
+            if lo == hi:
+                return default
+            return _decode(self._mm[self._blob_data + lo:self._blob_data + hi])
+        vid = column[i]
+        return default if vid == MISSING else self._value(vid)
+
+    def get(self, i: int, name: str, default: Any = None) -> Any:
+        if name not in self._columns:
+            return default
+        return self._field(i, name, default)
+
+    def record(self, i: int, fields: Optional[Iterable[str]] = None) -> Record:
+        out: Record = {}
+        for name in (self.fields if fields is None else fields):
+            if name not in self._columns:
+                continue
+            value = self._field(i, name, MISSING)
+            if value is not MISSING:
+                out[name] = value
+        return out
+
+    def column(self, name: str) -> List[Any]:
+        return [self.get(i, name) for i in range(self._count)]
+
+    def iter_records(self, fields: Optional[Iterable[str]] = None) -> Iterator[Record]:
+        wanted = list(self.fields if fields is None else fields)
+        for i in range(self._count):
+            yield self.record(i, wanted)
+
+
+# =====================
+# CONVERTER
+# =====================
+
+def iter_json_records(path: str) -> Iterator[Record]:
+    """Records from a JSON list, a .jsonl file or a directory of .jsonl shards."""
+    if os.path.isdir(path):
+        for name in sorted(os.listdir(path)):
+            if name.endswith(".jsonl"):
+                yield from iter_json_records(os.path.join(path, name))
+        return
+    if path.endswith(".jsonl"):
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        return
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if not isinstance(data, list):
+        raise ValueError(f"{path} must contain a JSON list")
+    yield from data
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    p = argparse.ArgumentParser(description="Convert a JSON index (list, .jsonl or shard directory) to a packed index")
+    p.add_argument("source")
+    p.add_argument("output", nargs="?", help=f"default: source with {PACKED_SUFFIX}")
+    p.add_argument("--blob", action="append", help="blob field (repeatable); default: code_snippet, api_signature")
+    args = p.parse_args(argv)
+
+    output = args.output or os.path.splitext(args.source.rstrip("/\\"))[0] + PACKED_SUFFIX
+    count = write_packed(output, iter_json_records(args.source), args.blob or DEFAULT_BLOB_FIELDS)
+    before = (
+        sum(os.path.getsize(os.path.join(args.source, n)) for n in os.listdir(args.source))
+        if os.path.isdir(args.source) else os.path.getsize(args.source)
+    )
+    print(f"Packed {count} records: {args.source} ({before:,} B) -> {output} ({os.path.getsize(output):,} B)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Opt-in profiling for MCP tool handlers and RAG server request paths.
+
+Disabled (the default), `Profiler.wrap` returns the function unchanged and
+nothing else is installed, so there is no per-call cost. Enabled with
+MCP_PROFILE=1 or --profile:
+
+- each wrapped call runs under cProfile (or a MCP_PROFILE_SAMPLE fraction of
+  calls); calls slower than MCP_PROFILE_THRESHOLD_MS write
+  <dir>/<time>-<label>-<ms>ms.prof (load with pstats / snakeviz) plus a
+  .txt with the top functions by cumulative time
+- SIGUSR1 writes a tracemalloc report (top allocation sites, and the growth
+  since the previous report). The first signal starts tracing unless
+  MCP_TRACEMALLOC=1 already started it at launch.
+
+Reports go to MCP_PROFILE_DIR (default <repo>/profiles). Async handlers are
+profiled in the event loop thread, so their reports can include other
+coroutines that ran while they were awaiting.
+"""
+
+import cProfile
+import functools
+import inspect
+import io
+import os
+import pstats
+import random
+import re
+import signal
+import sys
+import threading
+import time
+import tracemalloc
+from typing import Any, Callable, Optional
+
+_REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", ".."))
+DEFAULT_PROFILE_DIR = os.path.join(_REPO_ROOT, "profiles")
+
+_LABEL = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+def _env_flag(name: str) -> bool:
+    return os.getenv(name, "").strip().lower() in ("1", "true", "yes", "on")
+
+
+class Profiler:
+    def __init__(
+        self,
+        enabled: bool = False,
+        directory: str = DEFAULT_PROFILE_DIR,
+        threshold_ms: float = 100.0,
+        sample: float = 1.0,
+        top: int = 40,
+        max_reports: int = 200,
+        log: Optional[Callable[[str], None]] = None,
+    ):
+        self.enabled = enabled
+        self.directory = directory
+        self.threshold_ms = threshold_ms
+        self.sample = sample
+        self.top = top
+        self.max_reports = max_reports
+        self.reports_written = 0
+        self._log = log or (lambda msg: print(f"[profiling] {msg}", file=sys.stderr, flush=True))
+        self._lock = threading.Lock()
+        self._last_snapshot: Optional[tracemalloc.Snapshot] = None
+        self._signals_installed = False
+
+    @classmethod
+    def from_env(cls, log: Optional[Callable[[str], None]] = None) -> "Profiler":
+        return cls(
+            enabled=_env_flag("MCP_PROFILE"),
+            directory=os.getenv("MCP_PROFILE_DIR", "").strip() or DEFAULT_PROFILE_DIR,
+            threshold_ms=float(os.getenv("MCP_PROFILE_THRESHOLD_MS", "100")),
+            sample=float(os.getenv("MCP_PROFILE_SAMPLE", "1.0")),
+            top=int(os.getenv("MCP_PROFILE_TOP", "40")),
+            log=log,
+        )
+
+    def configure(self, enabled: Optional[bool] = None, directory: Optional[str] = None,
+                  threshold_ms: Optional[float] = None) -> None:
+        """Applies CLI overrides; call before wrapping anything."""
+        if enabled is not None:
+            self.enabled = enabled
+        if directory:
+            self.directory = directory
+        if threshold_ms is not None:
+            self.threshold_ms = threshold_ms
+
+    def start(self) -> None:
+        """Installs the SIGUSR1 handler (and starts tracemalloc if MCP_TRACEMALLOC=1). No-op when disabled."""
+        if not self.enabled:
+            return
+        if _env_flag("MCP_TRACEMALLOC") and not tracemalloc.is_tracing():
+            tracemalloc.start(int(os.getenv("MCP_TRACEMALLOC_FRAMES", "10")))
+        self.install_signal_handler()
+        self._log(
+            f"profiling on: calls over {self.threshold_ms:g} ms -> {self.directory}"
+            + (f" (sampling {self.sample:g})" if self.sample < 1 else "")
+            + ("; SIGUSR1 = tracemalloc report" if self._signals_installed else "")
+        )
+
+    # =====================
+    # CALL PROFILING
+    # =====================
+
+    def wrap(self, fn: Callable, label: str) -> Callable:
+        """fn itself when disabled; otherwise a wrapper (same signature, sync or async) that profiles slow calls."""
+        if not self.enabled:
+            return fn
+
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                prof = self._begin()
+                if prof is None:
+                    return await fn(*args, **kwargs)
+                t0 = time.perf_counter()
+                try:
+                    return await fn(*args, **kwargs)
+                finally:
+                    self._end(prof, label, t0)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            prof = self._begin()
+            if prof is None:
+                return fn(*args, **kwargs)
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self._end(prof, label, t0)
+        return wrapper
+
+    def _begin(self) -> Optional[cProfile.Profile]:
+        if self.reports_written >= self.max_reports:
+            return None
+        if self.sample < 1.0 and random.random() >= self.sample:
+            return None
+        prof = cProfile.Profile()
+        try:
+            prof.enable()
+        except ValueError:
+            # Another profiler is already active on this thread (nested wrapped call)
+            return None
+        return prof
+
+    def _end(self, prof: cProfile.Profile, label: str, t0: float) -> None:
+        prof.disable()
+        ms = (time.perf_counter() - t0) * 1000.0
+        if ms < self.threshold_ms:
+            return
+        with self._lock:
+            if self.reports_written >= self.max_reports:
+                return
+            self.reports_written += 1
+            last = self.reports_written == self.max_reports
+        try:
+            base = self._report_path(f"{label}-{ms:.0f}ms")
+            prof.dump_stats(base + ".prof")
+            out = io.StringIO()
+            stats = pstats.Stats(prof, stream=out)
+            stats.sort_stats("cumulative").print_stats(self.top)
+            with open(base + ".txt", "w", encoding="utf-8") as f:
+                f.write(f"{label}: {ms:.1f} ms (threshold {self.threshold_ms:g} ms)\n\n")
+                f.write(out.getvalue())
+            self._log(f"slow call {label} {ms:.1f} ms -> {base}.prof")
+        except Exception as e:
+            self._log(f"failed to write profile for {label}: {type(e).__name__}: {e}")
+        if last:
+            self._log(f"profile report limit ({self.max_reports}) reached; no further call profiles")
+
+    def _report_path(self, name: str) -> str:
+        os.makedirs(self.directory, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S") + f"-{int(time.time() * 1000) % 1000:03d}"
+        return os.path.join(self.directory, f"{stamp}-{_LABEL.sub('_', name)}")
+
+    # =====================
+    # TRACEMALLOC
+    # =====================
+
+    def install_signal_handler(self) -> bool:
+        if self._signals_installed or not hasattr(signal, "SIGUSR1"):
+            return self._signals_installed
+        if threading.current_thread() is not threading.main_thread():
+            return False
+        signal.signal(signal.SIGUSR1, lambda *_: self.memory_report())
+        self._signals_installed = True
+        return True
+
+    def memory_report(self) -> Optional[str]:
+        """Starts tracemalloc on first use; afterwards writes top allocation sites and growth. Returns the path."""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(int(os.getenv("MCP_TRACEMALLOC_FRAMES", "10")))
+            self._log("tracemalloc started; send SIGUSR1 again for a report")
+            return None
+
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+        current, peak = tracemalloc.get_traced_memory()
+        path = self._report_path("tracemalloc") + ".txt"
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(f"traced: current {current / 1e6:.1f} MB, peak {peak / 1e6:.1f} MB\n\n")
+            f.write(f"Top {self.top} allocation sites:\n")
+            for stat in snapshot.statistics("lineno")[: self.top]:
+                f.write(f"{stat}\n")
+            if self._last_snapshot is not None:
+                f.write(f"\nGrowth since previous report (top {self.top}):\n")
+                for stat in snapshot.compare_to(self._last_snapshot, "lineno")[: self.top]:
+                    f.write(f"{stat}\n")
+        self._last_snapshot = snapshot
+        self._log(f"tracemalloc report -> {path}")
+        return path
+
+
+PROFILER = Profiler.from_env()
+
+
+def profile_server(mcp: Any, profiler: Optional[Profiler] = None) -> None:
+    """Wraps every tool on a FastMCP instance when profiling is enabled (MCP_PROFILE=1)."""
+    profiler = profiler or PROFILER
+    if not profiler.enabled:
+        return
+    for tool in mcp._tool_manager.list_tools():
+        tool.fn = profiler.wrap(tool.fn, tool.name)
+    profiler.start()
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Single MCP host process for all MelechDSP tool servers.
+
+Instead of one Python interpreter per server (each importing FastMCP and
+loading its own data), this host imports every server module once and
+re-registers its tools on one FastMCP instance under a namespace prefix:
+
+    dsp_search_dsp, juce_juce_class, melech_who_includes, rag_search_juce_docs, ...
+
+Indexes, graphs and HTTP sessions are loaded once and shared by all tools
+(and by live reindexing, when MCP_LIVE_REINDEX=1). Each server's load()
+runs concurrently on the runtime's CPU pool, as do live-reindex builds. Cold-start time is
+measured per server, logged, and reported by the `host_status` tool;
+`--startup-report` prints it as JSON and exits, for checking in CI. Every
+tool call is timed and sized (metrics.py); `server_stats` reports it per
+server, and MCP_METRICS_DUMP=<file> writes it as JSON at exit. Tools run on the base
+class's bounded worker pool with per-tool limits (MCP_TOOL_CONCURRENCY /
+MCP_TOOL_QUEUE), and SIGTERM drains in-flight calls before exiting.
+
+    python tools/mcp/mcp_host.py                      # stdio (Claude Desktop / Cursor)
+    python tools/mcp/mcp_host.py --transport sse --port 3001
+    MCP_HOST_SERVERS=dsp,juce python tools/mcp/mcp_host.py --startup-report
+"""
+
+import time
+
+_T0 = time.perf_counter()
+
+import argparse  # noqa: E402
+import asyncio  # noqa: E402
+import functools  # noqa: E402
+import importlib.util  # noqa: E402
+import json  # noqa: E402
+import os  # noqa: E402
+import sys  # noqa: E402
+from typing import Any, Dict, List, Optional, Sequence  # noqa: E402
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "common"))
+from mcp_server_base import MCPEnvSpec, MCPServerBase, MCPServerSpec  # noqa: E402
+from metrics import STATS_TOOL, dump_on_exit  # noqa: E402
+
+# namespace -> (server directory, module file), relative to the repo root
+SERVERS: Dict[str, tuple] = {
+    "dsp": ("dsp_algorithms_server", "server.py"),
+    "juce": ("juce_api_server", "server.py"),
+    "melech": ("melech_internal_server", "server.py"),
+    "rag": ("juce-rag-server", "mcp_juce_bridge.py"),
+}
+DEFAULT_SERVERS = ("dsp", "juce", "melech")
+
+# local_paths.json keys that seed the servers' env vars (env always wins)
+PATHS_CFG_ENV = {
+    "juce_modules_dir": "JUCE_MODULES_PATH",
+    "melechdsp_hq_dir": "DSP_SOURCE_DIRS",
+}
+
+SPEC = MCPServerSpec(
+    name="melechdsp-mcp-host",
+    env=MCPEnvSpec(
+        required=(),
+        optional=("MCP_HOST_SERVERS", "MCP_LIVE_REINDEX", "JUCE_RAG_URL", "MCP_METRICS_DUMP", "MCP_PROFILE"),
+    ),
+)
+
+
+class MCPHost(MCPServerBase):
+    def __init__(self, spec: MCPServerSpec = SPEC):
+        super().__init__(spec)
+        self.report_only = False
+        self.modules: Dict[str, Any] = {}
+        self.tools: Dict[str, List[str]] = {}
+        self.startup_ms: Dict[str, float] = {}
+        self.reindexers: List[Any] = []
+
+    # =====================
+    # MOUNTING
+    # =====================
+
+    def selected_servers(self) -> List[str]:
+        raw = self.get_env("MCP_HOST_SERVERS") or ",".join(DEFAULT_SERVERS)
+        names = [n.strip() for n in raw.split(",") if n.strip()]
+        unknown = [n for n in names if n not in SERVERS]
+        if unknown:
+            self._fatal(f"Unknown MCP_HOST_SERVERS entries: {', '.join(unknown)} (known: {', '.join(SERVERS)})")
+        return names
+
+    def _import_server(self, namespace: str) -> Any:
+        directory, filename = SERVERS[namespace]
+        server_dir = str(self.repo_root / directory)
+        # Servers import their sibling modules by bare name
+        if server_dir not in sys.path:
+            sys.path.insert(0, server_dir)
+        spec = importlib.util.spec_from_file_location(f"mcp_host_{namespace}", os.path.join(server_dir, filename))
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[spec.name] = module
+        spec.loader.exec_module(module)
+        return module
+
+    def mount_all(self) -> None:
+        t = time.perf_counter()
+        self.create_mcp()
+        self.startup_ms["fastmcp_import"] = (time.perf_counter() - t) * 1000
+
+        for key, env_name in PATHS_CFG_ENV.items():
+            if self.paths_cfg.get(key) and not os.environ.get(env_name):
+                os.environ[env_name] = str(self.paths_cfg[key])
+
+        for namespace in self.selected_servers():
+            t = time.perf_counter()
+            try:
+                with self.timed("import", namespace=namespace):
+                    module = self._import_server(namespace)
+            except Exception as e:
+                self._log("error", f"Failed to load '{namespace}' server: {type(e).__name__}: {e}")
+                continue
+            self.modules[namespace] = module
+            self.tools[namespace] = self._mount(namespace, module.mcp)
+            self.startup_ms[namespace] = (time.perf_counter() - t) * 1000
+
+        self.mcp.add_tool(self.host_status, name="host_status")
+        self.mcp.add_tool(self.server_stats, name=STATS_TOOL)
+
+    async def load_all(self) -> None:
+        """Runs every mounted server's load() (indexes, graphs) concurrently on the CPU pool."""
+        async def load(namespace: str, fn) -> None:
+            t = time.perf_counter()
+            try:
+                with self.timed("load", namespace=namespace):
+                    await self.runtime.run_cpu(fn, in_process=True)
+            except Exception as e:
+                self._log("error", f"Failed to load '{namespace}' data: {type(e).__name__}: {e}")
+            self.startup_ms[namespace] = self.startup_ms.get(namespace, 0.0) + (time.perf_counter() - t) * 1000
+
+        loads = [(ns, getattr(m, "load", None)) for ns, m in self.modules.items()]
+        await asyncio.gather(*(load(ns, fn) for ns, fn in loads if callable(fn)))
+        self.startup_ms["total"] = (time.perf_counter() - _T0) * 1000
+        self._log("info", f"Cold start: {self._startup_summary()}")
+
+    def _mount(self, namespace: str, server) -> List[str]:
+        names = []
+        for tool in server._tool_manager.list_tools():
+            names.append(self.add_tool(
+                tool.fn, f"{namespace}_{tool.name}", tool.title, tool.description,
+                metrics_labels=(namespace, tool.name),
+            ))
+        return names
+
+    def start_live_reindex(self) -> None:
+        submit = functools.partial(self.runtime.submit_cpu, in_process=True)
+        for module in self.modules.values():
+            start = getattr(module, "start_live_reindex", None)
+            reindexer = start(submit) if start else None
+            if reindexer is not None:
+                self.reindexers.append(reindexer)
+
+    def _startup_summary(self) -> str:
+        parts = [f"{ns} {ms:.0f} ms" for ns, ms in self.startup_ms.items() if ns != "total"]
+        return f"{self.startup_ms.get('total', 0):.0f} ms ({', '.join(parts)})"
+
+    def host_status(self) -> str:
+        """
+        Mounted tool servers, their tools and the host's cold-start timings.
+        """
+        lines = [f"{self.spec.name}: {len(self.modules)} servers, cold start {self._startup_summary()}"]
+        for namespace, names in self.tools.items():
+            lines.append(f"{namespace} ({len(names)} tools): {', '.join(names)}")
+        if self.reindexers:
+            lines.append("Live reindex: " + ", ".join(f"{r.name} gen {r.generation}" for r in self.reindexers))
+        return "\n".join(lines)
+
+    def server_stats(self) -> str:
+        """
+        Per-tool call latency (p50/p95/p99), response sizes and error counts
+        since the host started, broken down by mounted server, plus the host's
+        own stage timings and in-flight, queued and shed calls.
+        """
+        sections = [f"== {ns} ==\n{self.metrics.summary(labels={'server': ns})}" for ns in self.tools]
+        sections.append(f"== {self.spec.name} ==\n{self.metrics.summary(labels={'server': self.spec.name})}")
+        return "\n\n".join(sections) + "\n\n" + self.runtime.stats()
+
+    # =====================
+    # LIFECYCLE
+    # =====================
+
+    def run(self, host: str, port: int) -> None:
+        if self.report_only:
+            self.startup_report()
+            return
+        super().run(host, port)
+
+    async def startup(self) -> None:
+        self.mount_all()
+        await self.load_all()
+        self.start_live_reindex()
+        dump_on_exit(self.metrics)
+
+    async def warmup(self) -> None:
+        # Servers may define a module-level warmup() (e.g. to touch their index pages)
+        for namespace, module in self.modules.items():
+            warm = getattr(module, "warmup", None)
+            if callable(warm):
+                with self.timed("warmup", namespace=namespace):
+                    await self.runtime.run_blocking(warm)
+
+    def shutdown(self) -> None:
+        for reindexer in self.reindexers:
+            reindexer.stop()
+
+    def startup_report(self) -> None:
+        self.mount_all()
+        asyncio.run(self.load_all())
+        self.runtime.close()
+        report = {
+            "startup_ms": {k: round(v, 1) for k, v in self.startup_ms.items()},
+            "tools": self.tools,
+        }
+        print(json.dumps(report, indent=2))
+
+    def _log(self, level: str, msg: str, **fields: Any) -> None:
+        # stdout is the protocol channel under stdio: everything goes to stderr
+        print(self._format_log(level, msg, fields), file=sys.stderr, flush=True)
+
+    def _parse_args(self, argv: Optional[Sequence[str]]) -> argparse.Namespace:
+        p = self._arg_parser()
+        p.add_argument("--startup-report", action="store_true", help="mount everything, print timings as JSON, exit")
+        args = p.parse_args(list(argv) if argv is not None else None)
+        self._apply_common_args(args)
+        self.report_only = args.startup_report
+        return args
+
+
+if __name__ == "__main__":
+    MCPHost().main()